@@ -18,7 +18,7 @@ def main():
     try:
         while True:
             reader.write(REG.BitFraming, 7)
-            res = reader.transceive(PCD.TRANSCEIVE, [PICC.REQIDL])
+            res = reader.transceive(PCD.TRANSCEIVE, [PICC.REQIDL], profile='request')
             print(f'STATUS={res.status} DATA={res.data} SIZE={res.size}')
             time.sleep(timeout)
 
@@ -20,24 +20,22 @@ def main():
 
             print('\nDetected a card')
 
-            res = reader.anti_collision()
+            atqa = res.atqa
+
+            # Anticollision and SELECT, the UID without BCC (4, 7 or 10 bytes)
+            res = reader.select_card(atqa)
 
             if res.status != Status.OK:
-                print(f'AntiCollision error: {res.status.name}')
+                print(f'Selection error: {res.status.name}')
                 continue
 
             uid = res.uid
+            sak = res.sak
 
             print(f'UID: {" ".join([f"0x{x:02X}" for x in uid])}')
 
             key = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
 
-            res = reader.select_tag(res.uid)
-
-            if res.status != Status.OK:
-                print(f'Selection error: {res.status.name}')
-                continue
-
             print('Dumping 1k:')
             res = reader.read_blocks(key, uid, 64)
             reader.stop_crypto1()
@@ -51,7 +49,7 @@ def main():
 
             filename = '_'.join([f'{x:02X}' for x in uid]) + '.dump.bin'
 
-            if save_blocks(filename, res) == Status.OK:
+            if save_blocks(filename, res, uid=uid, atqa=atqa, sak=sak) == Status.OK:
                 print(f'Saved data to {filename}')
                 break
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# Example on how to run the reader against the software emulator, no Pi or module needed
+# Prints SPI transfers used by every step
+
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+
+
+def main():
+    card = MifareClassic([0xDE, 0xAD, 0xBE, 0xEF])
+    chip = EmulatedMFRC522([card])
+
+    reader = MFRC522(transport=chip, gpio=EmulatedGPIO())
+
+    print('MFRC522 emulator example')
+
+    def step(name, result):
+        status = result if isinstance(result, Status) else result.status
+        print(f'{name:16} {status.name:24} transfers={chip.transfers}')
+        chip.transfers = 0
+        return result
+
+    chip.transfers = 0
+
+    step('request', reader.request(PICC.REQIDL))
+
+    res = step('anti_collision', reader.anti_collision())
+    uid = res.uid
+
+    print(f'UID: {" ".join([f"0x{x:02X}" for x in uid])}')
+
+    key = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
+
+    step('select_tag', reader.select_tag(uid))
+    step('authenticate', reader.authenticate(PICC.AUTHENT1A, 8, key, uid))
+    step('write_block', reader.write_block(8, [0x42 for _ in range(16)]))
+
+    res = step('read_block', reader.read_block(8))
+    print(' '.join(f'0x{x:02X}' for x in res.data))
+
+    res = step('read_blocks', reader.read_blocks(key, uid, 64))
+    reader.stop_crypto1()
+
+    for sector_id, sector_data in res.data.items():
+        print(f'{sector_id:03}: {" ".join([f"0x{x:02X}" for x in sector_data])}')
+
+    reader.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# Example on how to get card arrival / departure events instead of polling in a tight loop
+
+from mfrc522pi import *
+from mfrc522pi.presence import PresenceTracker
+import traceback
+
+
+def main():
+    reader = MFRC522(reset=22)
+
+    print('MFRC522 presence example')
+    print('Press ^C to stop')
+
+    try:
+        for event in PresenceTracker(reader, debounce=3):
+            uid = " ".join([f"0x{x:02X}" for x in event.uid])
+            print(f'{event.kind.name}: {uid}')
+
+            # On ARRIVED and PRESENT the card is selected until the next event, here it can be read/written
+
+    except KeyboardInterrupt:
+        print('Exiting...')
+    except Exception as e:
+        print(traceback.format_exc())
+    finally:
+        reader.cleanup()
+
+
+if __name__ == '__main__':
+    main()
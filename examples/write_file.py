@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
-# Example on how to detect and read card UID and write specific blocks
+# Example on how to detect and read card UID and restore a dump, only blocks that differ are written
 
 from mfrc522pi import *
 import traceback
 import sys
 
-BLOCK = 8
-
 
 def main():
     if len(sys.argv) != 2:
@@ -46,19 +44,17 @@ def main():
                 print(f'Selection error: {res.status.name}')
                 continue
 
-            status = reader.authenticate(PICC.AUTHENT1A, 8, key, uid)
-
-            if status != Status.OK:
-                print(f'Authentication error: {status.name}')
-                continue
+            res = reader.write_blocks_diff(key, uid, data_from_file.value)
+            reader.stop_crypto1()
 
-            status = reader.write_blocks(data_from_file.value)
+            report = res.value
+            print(f'Written: {report.count(WriteOutcome.WRITTEN)}, skipped: {report.count(WriteOutcome.SKIPPED)}, '
+                  f'failed: {report.count(WriteOutcome.FAILED)}')
 
-            if status != Status.OK:
-                print(f'Write error: {status.name}')
+            if res.status != Status.OK:
+                print(f'Write error: {res.status.name}')
                 continue
 
-            reader.stop_crypto1()
             break
 
     except KeyboardInterrupt:
@@ -1,7 +1,48 @@
-from .mfrc522 import *
-from .logger import logger
-from .status import *
-from .result import *
-from .utils import *
-from .data import *
-from .abi import *
+# Public API of mfrc522pi. Submodules are imported on first use of one of their names (PEP 562), so
+# `import mfrc522pi` or `from mfrc522pi import load_blocks` don't pull in the reader, dataclasses etc.
+from .logger import logger, setup_logging
+import importlib
+
+_EXPORTS = {
+    'mfrc522': ('MFRC522',),
+    'transport': ('Transport', 'SpiTransport', 'CountingTransport', 'POLLED_REGISTERS'),
+    'shadow': ('RegisterShadow', 'SHADOWED_REGISTERS'),
+    'irq': ('IrqPin',),
+    'status': ('Status',),
+    'result': ('Result',),
+    'utils': ('save_blocks', 'load_blocks', 'load_v1', 'open_dump', 'map_dump', 'DumpFile', 'MAGIC', 'MAGIC_V2',
+              'DUMP_VERSION', 'DUMP_HEADER', 'INDEX_ENTRY'),
+    'data': ('TransceiveResult', 'RequestResult', 'AntiCollisionResult', 'SelectTagResult', 'CardSelection',
+             'BlockData', 'PagesData', 'BlocksData', 'SectorsData', 'DumpHeader', 'BlockMap', 'CompactBlocks',
+             'WriteOutcome', 'WriteReport', 'CardEventKind', 'CardEvent'),
+    'abi': ('PCD', 'PICC', 'REG', 'AUTOTEST_RESULTS'),
+    'mifare': ('CLASSIC_MINI_BLOCKS', 'CLASSIC_1K_BLOCKS', 'CLASSIC_4K_BLOCKS', 'BLOCK_SIZE', 'PAGE_SIZE',
+               'DEFAULT_KEY', 'DEFAULT_ACCESS_BITS', 'SEL_CODES', 'CASCADE_TAG', 'SAK_CASCADE', 'sector_of',
+               'sector_first_block', 'sector_size', 'sector_blocks', 'sector_trailer', 'is_trailer', 'sector_count',
+               'access_group', 'decode_access_bits', 'encode_access_bits', 'default_trailer', 'value_block',
+               'parse_value_block', 'bcc', 'cascade_levels'),
+    'crc': ('CRC_A_INIT', 'CRC_A_POLY', 'CRC_A_TABLE', 'crc_a', 'crc_corpus', 'READ_FRAMES', 'WRITE_FRAMES',
+            'HALT_FRAME'),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+# logger is imported eagerly: importing the submodule would replace a lazily resolved logger with the module
+__all__ = ['logger', 'setup_logging'] + list(_MODULES)
+
+
+def __getattr__(name: str):
+    module = _MODULES.get(name)
+    if module is None:
+        # Submodules, e.g. mfrc522pi.utils without importing it explicitly
+        try:
+            return importlib.import_module(f'{__name__}.{name}')
+        except ModuleNotFoundError:
+            raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
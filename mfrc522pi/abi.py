@@ -8,6 +8,7 @@ class PCD:
     TRANSCEIVE = 0x0C
     RESETPHASE = 0x0F
     CALCCRC    = 0x03
+    MEM        = 0x01
 
 class PICC:
     REQIDL    = 0x26
@@ -18,6 +19,9 @@ class PICC:
     AUTHENT1B = 0x61
     READ      = 0x30
     WRITE     = 0xA0
+    UL_WRITE  = 0xA2
+    FAST_READ = 0x3A
+    GET_VERSION = 0x60
     DECREMENT = 0xC0
     INCREMENT = 0xC1
     RESTORE   = 0xC2
@@ -93,3 +97,20 @@ class REG:
     Reserved32     = 0x3D
     Reserved33     = 0x3E
     Reserved34     = 0x3F
+
+
+# FIFO contents after the digital self test (AutoTest 0x09 + CalcCRC) per Version register value
+AUTOTEST_RESULTS = {
+    0x91: (
+        0x00, 0xC6, 0x37, 0xD5, 0x32, 0xB7, 0x57, 0x5C, 0xC2, 0xD8, 0x7C, 0x4D, 0xD9, 0x70, 0xC7, 0x73,
+        0x10, 0xE6, 0xD2, 0xAA, 0x5E, 0xA1, 0x3E, 0x5A, 0x14, 0xAF, 0x30, 0x61, 0xC9, 0x70, 0xDB, 0x2E,
+        0x64, 0x22, 0x72, 0xB5, 0xBD, 0x65, 0xF4, 0xEC, 0x22, 0xBC, 0xD3, 0x72, 0x35, 0xCD, 0xAA, 0x41,
+        0x1F, 0xA7, 0xF3, 0x53, 0x14, 0xDE, 0x7E, 0x02, 0xD9, 0x0F, 0xB5, 0x5E, 0x25, 0x1D, 0x29, 0x79,
+    ),
+    0x92: (
+        0x00, 0xEB, 0x66, 0xBA, 0x57, 0xBF, 0x23, 0x95, 0xD0, 0xE3, 0x0D, 0x3D, 0x27, 0x89, 0x5C, 0xDE,
+        0x9D, 0x3B, 0xA7, 0x00, 0x21, 0x5B, 0x89, 0x82, 0x51, 0x3A, 0xEB, 0x02, 0x0C, 0xA5, 0x00, 0x49,
+        0x7C, 0x84, 0x4D, 0xB3, 0xCC, 0xD2, 0x1B, 0x81, 0x5D, 0x48, 0x76, 0xD5, 0x71, 0x61, 0x21, 0xA9,
+        0x86, 0x96, 0x83, 0x38, 0xCF, 0x9D, 0x5B, 0x6D, 0xDC, 0x15, 0xBA, 0x3E, 0x7D, 0x95, 0x3B, 0x2F,
+    ),
+}
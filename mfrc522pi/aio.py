@@ -0,0 +1,116 @@
+# asyncio facade for MFRC522, blocking calls run on a per reader worker thread
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.result import *
+from mfrc522pi.status import *
+from mfrc522pi.data import *
+from mfrc522pi.abi import *
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+
+class AsyncMFRC522:
+    def __init__(self, reader: MFRC522, name: str = None, poll_interval: float = 0.05, executor=None):
+        self.reader = reader
+        self.name = name
+        self.poll_interval = poll_interval
+        # A single worker keeps calls to one reader serialized, the event loop only awaits them.
+        # In IRQ mode the worker sleeps on the pin instead of polling CommIrq.
+        # executor - e.g. shared by several readers, close() leaves it running
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='mfrc522pi')
+
+    async def call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, method, *args)
+
+    async def request(self, reg_mode: int) -> Result[RequestResult]:
+        return await self.call(self.reader.request, reg_mode)
+
+    async def anti_collision(self, level: int = 0) -> Result[AntiCollisionResult]:
+        return await self.call(self.reader.anti_collision, level)
+
+    async def select_tag(self, serial: list[int], level: int = 0) -> Result[SelectTagResult]:
+        return await self.call(self.reader.select_tag, serial, level)
+
+    async def select_card(self, atqa: list[int] = None) -> Result[CardSelection]:
+        return await self.call(self.reader.select_card, atqa)
+
+    async def activate(self, reg_mode: int = PICC.REQIDL) -> Result[CardSelection]:
+        return await self.call(self.reader.activate, reg_mode)
+
+    async def inventory(self, max_cards: int = 16, handler=None,
+                        reset_field: bool = False) -> Result[list[CardSelection]]:
+        # handler runs on the worker thread
+        return await self.call(self.reader.inventory, max_cards, handler, reset_field)
+
+    async def authenticate(self, mode: int, addr: int, key: list[int], serial: list[int]) -> Status:
+        return await self.call(self.reader.authenticate, mode, addr, key, serial)
+
+    async def halt(self) -> Status:
+        return await self.call(self.reader.halt)
+
+    async def stop_crypto1(self):
+        return await self.call(self.reader.stop_crypto1)
+
+    async def read_block(self, addr: int) -> Result[BlockData]:
+        return await self.call(self.reader.read_block, addr)
+
+    async def fast_read(self, start: int, end: int) -> Result[PagesData]:
+        return await self.call(self.reader.fast_read, start, end)
+
+    async def write_block(self, addr: int, data: list[int]) -> Status:
+        return await self.call(self.reader.write_block, addr, data)
+
+    async def increment(self, addr: int, delta: int) -> Status:
+        return await self.call(self.reader.increment, addr, delta)
+
+    async def decrement(self, addr: int, delta: int) -> Status:
+        return await self.call(self.reader.decrement, addr, delta)
+
+    async def restore(self, addr: int) -> Status:
+        return await self.call(self.reader.restore, addr)
+
+    async def transfer(self, addr: int) -> Status:
+        return await self.call(self.reader.transfer, addr)
+
+    async def read_value(self, addr: int) -> Result[int]:
+        return await self.call(self.reader.read_value, addr)
+
+    async def write_value(self, addr: int, value: int) -> Status:
+        return await self.call(self.reader.write_value, addr, value)
+
+    async def apply_values(self, key: list[int], uid: list[int], operations,
+                           backups: dict[int, int] = None) -> Result[WriteReport]:
+        return await self.call(self.reader.apply_values, key, uid, operations, backups)
+
+    async def read_blocks(self, key: list[int], uid: list[int], block_count: int) -> Result[BlocksData]:
+        return await self.call(self.reader.read_blocks, key, uid, block_count)
+
+    async def read_sectors(self, key: list[int], uid: list[int], sectors=None, blocks=None) -> Result[SectorsData]:
+        return await self.call(self.reader.read_sectors, key, uid, sectors, blocks)
+
+    async def write_blocks(self, data: BlocksData) -> Status:
+        return await self.call(self.reader.write_blocks, data)
+
+    async def cards(self):
+        # Yields a CardEvent every time a card enters the field. Every pass sleeps poll_interval, also
+        # while a card stays in the field, so the worker and the SPI bus stay free for other calls
+        present = None
+        while True:
+            uid = await self.call(self.reader.detect, present is not None)
+            if uid is not None and uid != present:
+                yield CardEvent(uid, time.time(), self.name)
+            present = uid
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self):
+        await self.call(self.reader.cleanup)
+        if self.owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
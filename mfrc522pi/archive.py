@@ -0,0 +1,352 @@
+# Append-only archive of many card dumps in one file, with a UID index and deduplicated blocks
+#
+# Data file: header, then records appended in order
+#   block record - b'B', 16 bytes of block data, crc32. Every distinct block content is stored once
+#   card record  - b'C', UID, SAK, ATQA, block count, crc32, then (block id, block record offset) per block
+# Blocks of a card are appended before its card record, so a crash can leave unused blocks or a torn last
+# record, never a card pointing at missing data. The latest record of a UID wins. A torn last record (one
+# running past the end of the file) is cut off by a writer, damaged records elsewhere are skipped up to the
+# next intact one and the rest of the file is kept.
+#
+# Index file (<archive>.idx): header, then (UID, card record offset, record end) per appended card.
+# It is only a cache of the data file, a missing or stale index is rebuilt by scanning the data file
+from mfrc522pi.mifare import BLOCK_SIZE
+from mfrc522pi.logger import logger
+from mfrc522pi.status import *
+from mfrc522pi.result import *
+from mfrc522pi.data import *
+from dataclasses import dataclass
+import struct
+import mmap
+import zlib
+import os
+
+
+MAGIC = bytes('MFRC522PI_ARCH'.encode('utf-8'))
+INDEX_MAGIC = bytes('MFRC522PI_AIDX'.encode('utf-8'))
+ARCHIVE_VERSION = 1
+
+FILE_HEADER = struct.Struct('>14sH')
+# type, data, crc32
+BLOCK_RECORD = struct.Struct('>c16sI')
+# type, uid length, uid, sak (0xFFFF unknown), atqa, block count, crc32
+CARD_RECORD = struct.Struct('>cB10sH2sHI')
+# block id, offset of its block record (offsets are 32 bit, an archive is limited to 4 GiB)
+CARD_ENTRY = struct.Struct('>HI')
+# uid length, uid, card record offset, record end
+INDEX_ENTRY = struct.Struct('>B10sII')
+
+
+@dataclass
+class ArchiveStats:
+    # Block counts are only known after a full scan, i.e. for a writable archive
+    cards: int = 0
+    # Card records, including older dumps of a UID
+    records: int = 0
+    blocks_referenced: int = 0
+    blocks_stored: int = 0
+    file_bytes: int = 0
+    # Bytes of damaged records skipped by the scan
+    damaged_bytes: int = 0
+
+    def dedup_ratio(self) -> float:
+        return self.blocks_referenced / self.blocks_stored if self.blocks_stored else 0.0
+
+
+def uid_key(uid) -> bytes:
+    return bytes(uid)
+
+
+class CardArchive:
+    def __init__(self, path: str, writable: bool = True, sync: bool = False):
+        # sync - fsync the data file before the index is updated, for power loss safety
+        self.path = path
+        self.index_path = path + '.idx'
+        self.writable = writable
+        self.sync = sync
+
+        if writable and not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(FILE_HEADER.pack(MAGIC, ARCHIVE_VERSION))
+
+        self.file = open(path, 'r+b' if writable else 'rb')
+        self.map = None
+        # uid -> (card record offset, record end)
+        self.index = dict()
+        # block content -> block record offset, only needed to append
+        self.blocks = dict()
+        self.stats = ArchiveStats()
+        # Data file is scanned and indexed up to here
+        self.end = FILE_HEADER.size
+
+        if self.view(0, FILE_HEADER.size) != FILE_HEADER.pack(MAGIC, ARCHIVE_VERSION):
+            self.file.close()
+            raise ValueError(f'{path} is not a mfrc522pi archive')
+
+        if writable:
+            # Appending needs every stored block for deduplication, that is a full scan anyway
+            self.rebuild_index()
+        elif not self.load_index():
+            self.scan_records(FILE_HEADER.size)
+        else:
+            self.refresh()
+
+    def view(self, offset: int, size: int) -> bytes:
+        if self.map is None or offset + size > len(self.map):
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map[offset:offset + size]
+
+    def file_size(self) -> int:
+        return os.fstat(self.file.fileno()).st_size
+
+    def load_index(self) -> bool:
+        # False when the index is missing, damaged or points past the data file
+        try:
+            with open(self.index_path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return False
+
+        if raw[:FILE_HEADER.size] != FILE_HEADER.pack(INDEX_MAGIC, ARCHIVE_VERSION):
+            return False
+        body = raw[FILE_HEADER.size:]
+        # A torn last entry is dropped, the tail scan picks its card up again
+        body = body[:len(body) - len(body) % INDEX_ENTRY.size]
+
+        size = self.file_size()
+        index = dict()
+        end = FILE_HEADER.size
+        for uid_len, uid, offset, record_end in INDEX_ENTRY.iter_unpack(body):
+            if record_end > size:
+                return False
+            index[uid[:uid_len]] = (offset, record_end)
+            end = max(end, record_end)
+
+        self.index = index
+        self.end = end
+        self.stats.cards = len(index)
+        self.stats.records = len(body) // INDEX_ENTRY.size
+        return True
+
+    def write_index(self):
+        entries = b''.join(INDEX_ENTRY.pack(len(uid), uid, offset, end)
+                           for uid, (offset, end) in sorted(self.index.items(), key=lambda item: item[1]))
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(FILE_HEADER.pack(INDEX_MAGIC, ARCHIVE_VERSION) + entries)
+        os.replace(tmp, self.index_path)
+
+    def append_index(self, uid: bytes, offset: int, end: int):
+        if not os.path.exists(self.index_path):
+            self.write_index()
+            return
+        with open(self.index_path, 'ab') as f:
+            f.write(INDEX_ENTRY.pack(len(uid), uid, offset, end))
+
+    def read_record(self, offset: int, size: int):
+        # Parses the record at offset, returns (kind, value, record end) or None for a torn/damaged record
+        kind = self.view(offset, 1) if offset < size else b''
+        if kind == b'B' and offset + BLOCK_RECORD.size <= size:
+            _, data, crc = BLOCK_RECORD.unpack(self.view(offset, BLOCK_RECORD.size))
+            if zlib.crc32(data) == crc:
+                return kind, data, offset + BLOCK_RECORD.size
+        elif kind == b'C' and offset + CARD_RECORD.size <= size:
+            header = self.view(offset, CARD_RECORD.size)
+            _, uid_len, uid, sak, atqa, count, crc = CARD_RECORD.unpack(header)
+            end = offset + CARD_RECORD.size + count * CARD_ENTRY.size
+            if end <= size:
+                entries = self.view(offset + CARD_RECORD.size, count * CARD_ENTRY.size)
+                if zlib.crc32(entries, zlib.crc32(header[:-4])) == crc:
+                    return kind, uid[:uid_len], end
+        return None
+
+    def incomplete(self, offset: int, size: int) -> bool:
+        # The record at offset runs past the end of the file, i.e. its write was cut short
+        kind = self.view(offset, 1)
+        if kind == b'B':
+            return offset + BLOCK_RECORD.size > size
+        if kind == b'C':
+            if offset + CARD_RECORD.size > size:
+                return True
+            count = CARD_RECORD.unpack(self.view(offset, CARD_RECORD.size))[5]
+            return offset + CARD_RECORD.size + count * CARD_ENTRY.size > size
+        return False
+
+    def resync(self, offset: int, size: int) -> int:
+        # Offset of the next intact record from offset on, None when there is none
+        rest = self.view(offset, size - offset)
+        for position in range(len(rest)):
+            if rest[position] in b'BC' and self.read_record(offset + position, size) is not None:
+                return offset + position
+        return None
+
+    def scan_records(self, offset: int):
+        # Indexes every complete record from offset on. A writer cuts a torn tail off the data file,
+        # damaged records are skipped
+        size = self.file_size()
+        while offset < size:
+            record = self.read_record(offset, size)
+            if record is None:
+                following = self.resync(offset + 1, size)
+                if following is None and self.incomplete(offset, size):
+                    break
+                end = size if following is None else following
+                logger.error(f'archive: skipping {end - offset} bytes of damaged records at {offset}')
+                self.stats.damaged_bytes += end - offset
+                offset = end
+                continue
+            kind, value, end = record
+            if kind == b'B':
+                self.blocks[value] = offset
+                self.stats.blocks_stored += 1
+            else:
+                if value not in self.index:
+                    self.stats.cards += 1
+                self.index[value] = (offset, end)
+                self.stats.records += 1
+                self.stats.blocks_referenced += (end - offset - CARD_RECORD.size) // CARD_ENTRY.size
+            offset = end
+
+        if offset < size:
+            # Only a torn last record is left here
+            if self.writable:
+                logger.error(f'archive: dropping {size - offset} bytes of a torn record at {offset}')
+                if self.map is not None:
+                    self.map.close()
+                    self.map = None
+                self.file.truncate(offset)
+            else:
+                # Possibly a record another process is writing right now
+                logger.debug(f'archive: incomplete record at {offset}')
+        self.end = offset
+        self.stats.file_bytes = offset
+
+    def refresh(self):
+        # Picks up cards appended (by this or another process) since the archive was opened
+        self.scan_records(self.end)
+
+    def rebuild_index(self):
+        self.index = dict()
+        self.blocks = dict()
+        self.stats = ArchiveStats()
+        self.scan_records(FILE_HEADER.size)
+        if self.writable:
+            self.write_index()
+
+    def append(self, data: BlocksData, uid: list[int], atqa: list[int] = None, sak: int = None) -> Status:
+        if not self.writable:
+            return Status.ERROR
+        # Records hold up to 10 UID bytes, a longer UID would be stored cut and never found again
+        if len(uid) > 10:
+            return Status.ANTI_COLLISION_BAD_UID_SIZE_ERROR
+
+        self.file.seek(self.end)
+        offset = self.end
+        records = bytearray()
+        entries = bytearray()
+        new_blocks = dict()
+
+        for block_id in sorted(data.data):
+            content = bytes(data.data[block_id])
+            if len(content) != BLOCK_SIZE:
+                return Status.WRITE_BLOCK_BAD_SIZE_ERROR
+            ref = self.blocks.get(content, new_blocks.get(content))
+            if ref is None:
+                ref = offset + len(records)
+                new_blocks[content] = ref
+                records += BLOCK_RECORD.pack(b'B', content, zlib.crc32(content))
+            entries += CARD_ENTRY.pack(block_id, ref)
+
+        uid = uid_key(uid)
+        header = CARD_RECORD.pack(b'C', len(uid), uid, 0xFFFF if sak is None else sak, bytes(atqa or b'\0\0'),
+                                  len(data.data), 0)
+        card_offset = offset + len(records)
+        records += header[:-4] + struct.pack('>I', zlib.crc32(entries, zlib.crc32(header[:-4]))) + entries
+
+        self.file.write(records)
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+
+        end = offset + len(records)
+        self.blocks.update(new_blocks)
+        if uid not in self.index:
+            self.stats.cards += 1
+        self.index[uid] = (card_offset, end)
+        self.stats.records += 1
+        self.stats.blocks_stored += len(new_blocks)
+        self.stats.blocks_referenced += len(data.data)
+        self.stats.file_bytes = end
+        self.end = end
+
+        self.append_index(uid, card_offset, end)
+        return Status.OK
+
+    def info(self, uid: list[int]) -> DumpHeader:
+        entry = self.index.get(uid_key(uid))
+        return self.info_at(entry[0]) if entry is not None else None
+
+    def get(self, uid: list[int], compact: bool = False) -> Result[BlocksData]:
+        # Latest dump of the card, NO_TAG_ERROR when the archive doesn't have it, DATA_CORRUPTED_ERROR when
+        # one of its blocks was damaged
+        entry = self.index.get(uid_key(uid))
+        if entry is None:
+            return Result(Status.NO_TAG_ERROR, None)
+        status = Status.OK if self.blocks_intact(*entry) else Status.DATA_CORRUPTED_ERROR
+        return Result(status, self.read_card(*entry, compact))
+
+    def scan(self, compact: bool = False):
+        # Every card record in file order (older dumps of a UID too), also ones appended while iterating
+        offset = FILE_HEADER.size
+        while True:
+            size = self.file_size()
+            record = self.read_record(offset, size)
+            if record is None:
+                return
+            kind, value, end = record
+            if kind == b'C':
+                yield self.info_at(offset), self.read_card(offset, end, compact)
+            offset = end
+
+    def info_at(self, offset: int) -> DumpHeader:
+        _, uid_len, uid, sak, atqa, count, crc = CARD_RECORD.unpack(self.view(offset, CARD_RECORD.size))
+        return DumpHeader(ARCHIVE_VERSION, list(uid[:uid_len]), list(atqa), None if sak == 0xFFFF else sak,
+                          BLOCK_SIZE, count, crc)
+
+    def blocks_intact(self, offset: int, end: int) -> bool:
+        for _, ref in CARD_ENTRY.iter_unpack(self.view(offset + CARD_RECORD.size, end - offset - CARD_RECORD.size)):
+            _, data, crc = BLOCK_RECORD.unpack(self.view(ref, BLOCK_RECORD.size))
+            if zlib.crc32(data) != crc:
+                return False
+        return True
+
+    def read_card(self, offset: int, end: int, compact: bool = False) -> BlocksData:
+        blocks = {block_id: self.view(ref + 1, BLOCK_SIZE)
+                  for block_id, ref in CARD_ENTRY.iter_unpack(self.view(offset + CARD_RECORD.size,
+                                                                        end - offset - CARD_RECORD.size))}
+        if compact:
+            return CompactBlocks(max(blocks, default=-1) + 1, blocks)
+        return BlocksData({block_id: list(block) for block_id, block in blocks.items()})
+
+    def uids(self) -> list[list[int]]:
+        return [list(uid) for uid in self.index]
+
+    def __contains__(self, uid) -> bool:
+        return uid_key(uid) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
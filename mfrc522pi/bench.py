@@ -0,0 +1,597 @@
+# Benchmarks of reader operations and example flows against the emulator with SPI transaction accounting
+# Usage: python3 -m mfrc522pi.bench [-h] [--json] [--output FILE] [--compare FILE] [SCENARIO ...]
+from mfrc522pi.transport import CountingTransport
+from mfrc522pi.emulator import *
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.utils import save_blocks, load_blocks, map_dump
+from mfrc522pi.archive import CardArchive
+from mfrc522pi.metrics import Metrics
+from mfrc522pi.ultralight import UltralightReader
+from mfrc522pi.timing import TimeoutProfiles
+from mfrc522pi.data import BlocksData, CompactBlocks, WriteOutcome
+from mfrc522pi.mifare import *
+from mfrc522pi.abi import *
+import subprocess
+import tracemalloc
+import struct
+import tempfile
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+
+KEY = DEFAULT_KEY
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+BLOCK = 8
+
+# name -> (group, prepare, run)
+SCENARIOS = dict()
+
+
+def scenario(name: str, group: str, prepare=None):
+    # prepare(env) runs before every iteration and is not measured, run(env) is.
+    # run may return a dict of extra metrics that are reported as they are
+    def register(run):
+        SCENARIOS[name] = (group, prepare, run)
+        return run
+    return register
+
+
+class BenchEnv:
+    def __init__(self, latency: float = 0.0, speed: int = 1000000, sleep: bool = False, metrics: bool = False,
+                 adaptive: bool = False, **reader_args):
+        self.card = MifareClassic(UID)
+        self.chip = EmulatedMFRC522([self.card])
+        self.transport = CountingTransport(self.chip, latency=latency, speed=speed, sleep=sleep)
+        if metrics:
+            reader_args['metrics'] = Metrics()
+        if adaptive:
+            # Tightens over the iterations of a scenario, every scenario gets a new environment
+            reader_args['timeouts'] = TimeoutProfiles(adaptive=True)
+        self.reader = MFRC522(transport=self.transport, gpio=EmulatedGPIO(), **reader_args)
+        self.uid = None
+        self.tmpdir = tempfile.mkdtemp(prefix='mfrc522pi-bench-')
+
+    def field(self, present: bool = True):
+        if present and self.card not in self.chip.cards:
+            self.chip.add_card(self.card)
+        elif not present and self.card in self.chip.cards:
+            self.chip.remove_card(self.card)
+
+    def idle(self):
+        # Card back to power-on state and the chip out of any Crypto1 session
+        self.field()
+        self.reader.stop_crypto1()
+        self.card.power_off()
+
+    def activate(self):
+        self.idle()
+        self.reader.request(PICC.REQIDL)
+        self.uid = self.reader.anti_collision().uid
+        self.reader.select_tag(self.uid)
+
+    def authenticate(self, block: int = BLOCK):
+        self.activate()
+        self.reader.authenticate(PICC.AUTHENT1A, block, KEY, self.uid)
+
+    def cleanup(self):
+        if hasattr(self, 'archive'):
+            self.archive.close()
+        for name in os.listdir(self.tmpdir):
+            os.remove(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+
+
+def restore_data() -> BlocksData:
+    # 1K dump without the manufacturer block and sector trailers, which a restore can't write
+    return BlocksData({
+        block: [block & 0xFF] * BLOCK_SIZE
+        for block in range(1, CLASSIC_1K_BLOCKS) if not is_trailer(block)
+    })
+
+
+# Public MFRC522 methods
+
+scenario('version', 'methods')(lambda env: env.reader.version())
+scenario('antenna_on', 'methods')(lambda env: env.reader.antenna_on())
+scenario('write', 'methods')(lambda env: env.reader.write(REG.TReloadL, 30))
+scenario('read', 'methods')(lambda env: env.reader.read(REG.TReloadL))
+scenario('read_registers', 'methods')(lambda env: env.reader.read_registers(REG.Error, REG.FIFOLevel, REG.Control))
+scenario('set_bit_mask', 'methods')(lambda env: env.reader.set_bit_mask(REG.TxControl, 0x03))
+scenario('clear_bit_mask', 'methods')(lambda env: env.reader.clear_bit_mask(REG.BitFraming, 0x80))
+scenario('write_fifo', 'methods')(lambda env: env.reader.write_fifo([0x00] * BLOCK_SIZE))
+scenario('calculate_crc', 'methods')(lambda env: env.reader.calculate_crc([PICC.READ, BLOCK]))
+scenario('crc', 'methods')(lambda env: env.reader.crc([PICC.READ, BLOCK]))
+scenario('init', 'methods')(lambda env: env.reader.init())
+scenario('request', 'methods', prepare=BenchEnv.idle)(lambda env: env.reader.request(PICC.REQIDL))
+scenario('request_idle', 'methods', prepare=lambda env: env.field(False))(lambda env: env.reader.request(PICC.REQIDL))
+scenario('anti_collision', 'methods', prepare=lambda env: (env.idle(), env.reader.request(PICC.REQIDL)))(
+    lambda env: env.reader.anti_collision())
+scenario('select_tag', 'methods', prepare=lambda env: (env.activate(), env.card.power_off(),
+                                                       env.reader.request(PICC.REQIDL)))(
+    lambda env: env.reader.select_tag(env.uid))
+scenario('authenticate', 'methods', prepare=BenchEnv.activate)(
+    lambda env: env.reader.authenticate(PICC.AUTHENT1A, BLOCK, KEY, env.uid))
+scenario('stop_crypto1', 'methods', prepare=BenchEnv.authenticate)(lambda env: env.reader.stop_crypto1())
+scenario('read_block', 'methods', prepare=BenchEnv.authenticate)(lambda env: env.reader.read_block(BLOCK))
+scenario('write_block', 'methods', prepare=BenchEnv.authenticate)(
+    lambda env: env.reader.write_block(BLOCK, [0x42] * BLOCK_SIZE))
+scenario('read_blocks', 'methods', prepare=BenchEnv.activate)(
+    lambda env: env.reader.read_blocks(KEY, env.uid, CLASSIC_1K_BLOCKS))
+scenario('write_blocks', 'methods', prepare=BenchEnv.authenticate)(
+    lambda env: env.reader.write_blocks(BlocksData({b: [0x42] * BLOCK_SIZE for b in sector_blocks(2)[:-1]})))
+
+
+# Flows, the examples/*.py scenarios
+
+@scenario('detect_idle', 'flows', prepare=lambda env: env.field(False))
+def detect_idle(env):
+    # examples/detect.py with an empty field
+    env.reader.write(REG.BitFraming, 7)
+    env.reader.transceive(PCD.TRANSCEIVE, [PICC.REQIDL], profile='request')
+
+
+@scenario('detect', 'flows', prepare=BenchEnv.idle)
+def detect(env):
+    env.reader.write(REG.BitFraming, 7)
+    env.reader.transceive(PCD.TRANSCEIVE, [PICC.REQIDL], profile='request')
+
+
+def dump(env) -> BlocksData:
+    env.reader.request(PICC.REQIDL)
+    uid = env.reader.anti_collision().uid
+    env.reader.select_tag(uid)
+    res = env.reader.read_blocks(KEY, uid, CLASSIC_1K_BLOCKS)
+    env.reader.stop_crypto1()
+    return res.value
+
+
+@scenario('dump_1k', 'flows', prepare=BenchEnv.idle)
+def dump_1k(env):
+    # examples/dump.py
+    dump(env)
+
+
+@scenario('dump_file', 'flows', prepare=BenchEnv.idle)
+def dump_file(env):
+    # examples/dump_file.py
+    save_blocks(os.path.join(env.tmpdir, 'dump.bin'), dump(env))
+
+
+@scenario('read_card', 'flows', prepare=BenchEnv.idle)
+def read_card(env):
+    # examples/read.py
+    env.reader.request(PICC.REQIDL)
+    uid = env.reader.anti_collision().uid
+    env.reader.select_tag(uid)
+    env.reader.authenticate(PICC.AUTHENT1A, BLOCK, KEY, uid)
+    env.reader.read_block(BLOCK)
+    env.reader.stop_crypto1()
+
+
+@scenario('write_card', 'flows', prepare=BenchEnv.idle)
+def write_card(env):
+    # examples/write.py
+    env.reader.request(PICC.REQIDL)
+    uid = env.reader.anti_collision().uid
+    env.reader.select_tag(uid)
+    env.reader.authenticate(PICC.AUTHENT1A, BLOCK, KEY, uid)
+    original = env.reader.read_block(BLOCK).data
+    env.reader.write_block(BLOCK, [0xFF] * BLOCK_SIZE)
+    env.reader.read_block(BLOCK)
+    env.reader.write_block(BLOCK, original)
+    env.reader.read_block(BLOCK)
+    env.reader.stop_crypto1()
+
+
+@scenario('restore_1k', 'flows', prepare=BenchEnv.idle)
+def restore_1k(env):
+    # examples/write_file.py, authenticating every sector it writes to
+    data = restore_data()
+    env.reader.request(PICC.REQIDL)
+    uid = env.reader.anti_collision().uid
+    env.reader.select_tag(uid)
+    for sector in range(sector_count(CLASSIC_1K_BLOCKS)):
+        env.reader.authenticate(PICC.AUTHENT1A, sector_trailer(sector), KEY, uid)
+        env.reader.write_blocks(BlocksData({b: data.data[b] for b in sector_blocks(sector) if b in data.data}))
+    env.reader.stop_crypto1()
+
+
+def prepare_restore_diff(env, changed: int = 4):
+    # Card already holds the dump except for a few blocks
+    env.idle()
+    data = restore_data()
+    for block, block_data in data.data.items():
+        env.card.blocks[block] = list(block_data)
+    for block in list(data.data)[:changed]:
+        env.card.blocks[block] = [0x00] * BLOCK_SIZE
+
+
+@scenario('restore_1k_diff', 'flows', prepare=prepare_restore_diff)
+def restore_1k_diff(env):
+    # examples/write_file.py, writing only blocks that differ
+    env.reader.request(PICC.REQIDL)
+    uid = env.reader.anti_collision().uid
+    env.reader.select_tag(uid)
+    report = env.reader.write_blocks_diff(KEY, uid, restore_data()).value
+    env.reader.stop_crypto1()
+    return {'written': report.count(WriteOutcome.WRITTEN)}
+
+
+def prepare_value(env, authenticate: bool = True):
+    env.card.blocks[BLOCK] = value_block(1000, BLOCK)
+    env.card.blocks[BLOCK + 1] = value_block(1000, BLOCK + 1)
+    if authenticate:
+        env.authenticate()
+    else:
+        env.activate()
+
+
+@scenario('value_debit', 'flows', prepare=prepare_value)
+def value_debit(env):
+    env.reader.decrement(BLOCK, 25)
+    env.reader.transfer(BLOCK)
+
+
+@scenario('value_debit_rmw', 'flows', prepare=prepare_value)
+def value_debit_rmw(env):
+    # The same debit as read-modify-write
+    env.reader.write_value(BLOCK, env.reader.read_value(BLOCK).value - 25)
+
+
+@scenario('value_batch', 'flows', prepare=lambda env: prepare_value(env, False))
+def value_batch(env):
+    # Three debits and a top-up on two blocks of one sector, the first one backed up to the third block
+    report = env.reader.apply_values(KEY, env.uid, [(BLOCK, -25), (BLOCK, -5), (BLOCK + 1, -3), (BLOCK + 1, 10)],
+                                     backups={BLOCK: BLOCK + 2}).value
+    return {'written': report.count(WriteOutcome.WRITTEN)}
+
+
+# Batch provisioning tray: the bench card plus 4, 7 and 10 byte UID cards sharing UID prefixes, so
+# anticollision has to resolve bit collisions on every cascade level
+TRAY_UIDS = [
+    [0xDE, 0xAD, 0xBE, 0xE0],
+    [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66],
+    [0x04, 0x11, 0x22, 0x37, 0x44, 0x55, 0x66],
+    [0x05, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66, 0x77, 0x88, 0x99],
+]
+
+
+def prepare_tray(env):
+    if len(env.chip.cards) == 1:
+        for uid in TRAY_UIDS:
+            env.chip.add_card(MifareClassic(uid) if len(uid) == 4 else
+                              MifareUltralight(uid) if len(uid) == 7 else EmulatedCard(uid, [0x84, 0x00], 0x20))
+    env.idle()
+    env.chip.field_off()
+
+
+@scenario('inventory_tray', 'flows', prepare=prepare_tray)
+def inventory_tray(env):
+    return {'cards': len(env.reader.inventory().value)}
+
+
+NTAG_UID = [0x04, 0x10, 0x20, 0x30, 0x40, 0x50, 0x60]
+
+
+def prepare_ntag(env):
+    # NTAG216 alone in the field, selected
+    if not hasattr(env, 'ntag'):
+        env.ntag = Ntag21x(NTAG_UID, 216)
+        env.field(False)
+        env.chip.add_card(env.ntag)
+    env.reader.stop_crypto1()
+    env.ntag.power_off()
+    env.reader.activate()
+
+
+@scenario('ntag216_fast_read', 'flows', prepare=prepare_ntag)
+def ntag216_fast_read(env):
+    # Whole card with FAST_READ, 64 pages per exchange
+    return {'pages': len(UltralightReader(env.reader).read_card(NTAG_UID).data) // PAGE_SIZE}
+
+
+@scenario('ntag216_read', 'flows', prepare=prepare_ntag)
+def ntag216_read(env):
+    # Whole card with 4 page READs
+    data = []
+    for page in range(0, 231, 4):
+        data.extend(env.reader.read_block(page).data)
+    return {'pages': 231}
+
+
+# In-memory dump layouts: memory per 1K dump and cost of reading every byte back
+
+DUMPS = 200
+
+
+def list_dump(seed: int) -> BlocksData:
+    # As read_blocks builds it, a fresh list of ints per block
+    return BlocksData({block: [(seed + block + i) & 0xFF for i in range(BLOCK_SIZE)]
+                       for block in range(CLASSIC_1K_BLOCKS)})
+
+
+def compact_dump(seed: int) -> CompactBlocks:
+    dump = CompactBlocks(CLASSIC_1K_BLOCKS)
+    for block in range(CLASSIC_1K_BLOCKS):
+        dump.set(block, bytes((seed + block + i) & 0xFF for i in range(BLOCK_SIZE)))
+    return dump
+
+
+def dump_memory(build) -> dict:
+    tracemalloc.start()
+    dumps = [build(seed) for seed in range(DUMPS)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dumps
+    return {'bytes_per_dump': round(size / DUMPS)}
+
+
+scenario('dump_memory_list', 'data')(lambda env: dump_memory(list_dump))
+scenario('dump_memory_compact', 'data')(lambda env: dump_memory(compact_dump))
+
+
+def prepare_dumps(env):
+    env.list_dump = list_dump(0)
+    env.compact_dump = compact_dump(0)
+
+
+@scenario('block_access_list', 'data', prepare=prepare_dumps)
+def block_access_list(env):
+    data = env.list_dump.data
+    return {'sum': sum(sum(data[block]) for block in range(CLASSIC_1K_BLOCKS))}
+
+
+@scenario('block_access_compact', 'data', prepare=prepare_dumps)
+def block_access_compact(env):
+    dump = env.compact_dump
+    return {'sum': sum(sum(dump.block(block)) for block in range(CLASSIC_1K_BLOCKS))}
+
+
+@scenario('block_access_compat', 'data', prepare=prepare_dumps)
+def block_access_compat(env):
+    # CompactBlocks through the list based .data accessor
+    data = env.compact_dump.data
+    return {'sum': sum(sum(data[block]) for block in range(CLASSIC_1K_BLOCKS))}
+
+
+def prepare_dump_file(env):
+    env.dump_path = os.path.join(env.tmpdir, 'dump.bin')
+    save_blocks(env.dump_path, list_dump(0), uid=UID)
+
+
+scenario('dump_save', 'data', prepare=prepare_dumps)(
+    lambda env: save_blocks(os.path.join(env.tmpdir, 'dump.bin'), env.list_dump, uid=UID))
+scenario('dump_load', 'data', prepare=prepare_dump_file)(lambda env: load_blocks(env.dump_path))
+
+
+@scenario('dump_map_block', 'data', prepare=prepare_dump_file)
+def dump_map_block(env):
+    # One block out of a dump through mmap, without parsing the rest
+    with map_dump(env.dump_path).value as dump:
+        dump.block(BLOCK)
+
+
+# Synthetic fleet of provisioned 1K cards: a few card specific blocks, zero blocks and default trailers
+
+FLEET = 500
+
+
+def fleet_card(i: int):
+    uid = list(struct.pack('>I', 0x10000000 + i))
+    data = {block: [0] * BLOCK_SIZE for block in range(CLASSIC_1K_BLOCKS)}
+    for sector in range(sector_count(CLASSIC_1K_BLOCKS)):
+        data[sector_trailer(sector)] = default_trailer()
+    data[0] = uid + [uid[0] ^ uid[1] ^ uid[2] ^ uid[3], 0x08, 0x04, 0x00] + [0x62] * 8
+    data[4] = list(struct.pack('>IIII', i, 0x5A5A5A5A, i * 7, 0))
+    data[5] = [0x01, 0x02] + [0] * 14
+    return uid, BlocksData(data)
+
+
+def fleet_archive(env) -> str:
+    path = os.path.join(env.tmpdir, 'fleet.arc')
+    if not os.path.exists(path):
+        with CardArchive(path) as archive:
+            for i in range(FLEET):
+                uid, data = fleet_card(i)
+                archive.append(data, uid, [0x04, 0x00], 0x08)
+    return path
+
+
+@scenario('archive_size', 'data')
+def archive_size(env):
+    path = fleet_archive(env)
+    uid, data = fleet_card(0)
+    save_blocks(os.path.join(env.tmpdir, 'card.bin'), data, uid=uid)
+    archive_bytes = os.path.getsize(path) + os.path.getsize(path + '.idx')
+    return {'archive_bytes_per_card': round(archive_bytes / FLEET),
+            'file_bytes_per_card': os.path.getsize(os.path.join(env.tmpdir, 'card.bin'))}
+
+
+def prepare_archive(env):
+    if not hasattr(env, 'archive'):
+        env.archive = CardArchive(fleet_archive(env), writable=False)
+
+
+scenario('archive_open', 'data', prepare=fleet_archive)(
+    lambda env: CardArchive(fleet_archive(env), writable=False).close())
+scenario('archive_lookup', 'data', prepare=prepare_archive)(
+    lambda env: env.archive.get(fleet_card(FLEET // 2)[0]))
+
+
+# Startup of a fresh interpreter, e.g. a script spawned per scan event. Interpreter startup itself isn't counted
+
+def import_time(statement: str) -> dict:
+    code = f'import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)'
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (package_dir, os.environ.get('PYTHONPATH')))))
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+    return {'import_us': round(float(out.stdout.split()[-1]) * 1e6)}
+
+
+scenario('import_package', 'startup')(lambda env: import_time('import mfrc522pi'))
+scenario('import_utils', 'startup')(lambda env: import_time('from mfrc522pi import load_blocks'))
+scenario('import_reader', 'startup')(lambda env: import_time('from mfrc522pi import MFRC522'))
+scenario('import_all', 'startup')(lambda env: import_time('from mfrc522pi import *'))
+scenario('reader_startup', 'startup')(lambda env: import_time(
+    'from mfrc522pi import MFRC522\n'
+    'from mfrc522pi.emulator import EmulatedMFRC522, EmulatedGPIO\n'
+    'MFRC522(transport=EmulatedMFRC522(), gpio=EmulatedGPIO())'))
+
+
+def prepare_compact(env):
+    env.reader.compact = True
+    env.activate()
+
+
+scenario('read_blocks_compact', 'methods', prepare=prepare_compact)(
+    lambda env: env.reader.read_blocks(KEY, env.uid, CLASSIC_1K_BLOCKS))
+
+
+def run_scenario(name: str, repeat: int, env_args: dict) -> dict:
+    group, prepare, run = SCENARIOS[name]
+    env = BenchEnv(**env_args)
+    walls = []
+    transfers = bytes_moved = polls = 0
+    bus_time = rf_time = 0.0
+    extra = dict()
+
+    try:
+        for _ in range(repeat):
+            if prepare:
+                prepare(env)
+            env.transport.reset()
+            env.chip.rf_time = 0.0
+
+            start = time.perf_counter()
+            result = run(env)
+            walls.append(time.perf_counter() - start)
+
+            transfers += env.transport.transfers
+            bytes_moved += env.transport.bytes
+            polls += env.transport.polls
+            bus_time += env.transport.bus_time
+            rf_time += env.chip.rf_time
+            if isinstance(result, dict):
+                extra = result
+    finally:
+        env.cleanup()
+
+    walls.sort()
+    return {
+        'name': name,
+        'group': group,
+        'runs': repeat,
+        'wall_mean_us': sum(walls) / repeat * 1e6,
+        'wall_median_us': walls[repeat // 2] * 1e6,
+        'wall_min_us': walls[0] * 1e6,
+        'bus_us': bus_time / repeat * 1e6,
+        # Frames on air, answer delays and chip timer expiries
+        'rf_us': rf_time / repeat * 1e6,
+        'transfers': transfers / repeat,
+        'bytes': bytes_moved / repeat,
+        'polls': polls / repeat,
+        **extra
+    }
+
+
+def package_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version('mfrc522pi')
+    except Exception:
+        return 'unknown'
+
+
+def run(names: list[str] = None, repeat: int = 20, env_args: dict = None) -> dict:
+    return {
+        'version': package_version(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'env': env_args or dict(),
+        'results': [run_scenario(name, repeat, env_args or dict()) for name in names or SCENARIOS]
+    }
+
+
+REPORT_FIELDS = ('name', 'group', 'runs', 'wall_mean_us', 'wall_median_us', 'wall_min_us', 'bus_us', 'rf_us',
+                 'transfers', 'bytes', 'polls')
+
+
+def print_report(report: dict, baseline: dict = None):
+    previous = {r['name']: r for r in baseline['results']} if baseline else dict()
+    print(f'{"scenario":18} {"wall us":>10} {"bus us":>10} {"rf us":>10} {"transfers":>10} {"bytes":>8} {"polls":>7}')
+    for r in report['results']:
+        line = (f'{r["name"]:18} {r["wall_median_us"]:10.1f} {r["bus_us"]:10.1f} {r["rf_us"]:10.1f} '
+                f'{r["transfers"]:10.1f} {r["bytes"]:8.1f} {r["polls"]:7.1f}')
+        extra = {k: v for k, v in r.items() if k not in REPORT_FIELDS}
+        if extra:
+            line += '   ' + ' '.join(f'{k}={v}' for k, v in extra.items())
+        old = previous.get(r['name'])
+        if old and old['transfers']:
+            line += f'   transfers {(r["transfers"] - old["transfers"]) / old["transfers"] * 100:+.1f}%'
+        if old and old['wall_median_us']:
+            line += f' wall {(r["wall_median_us"] - old["wall_median_us"]) / old["wall_median_us"] * 100:+.1f}%'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mfrc522pi benchmarks (emulated chip, modelled SPI bus)')
+    parser.add_argument('scenarios', nargs='*', help='scenarios or groups to run (default all)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=20.0, help='modelled cost per SPI transfer in us')
+    parser.add_argument('--speed', type=int, default=1000000, help='modelled SPI clock in Hz')
+    parser.add_argument('--sleep', action='store_true', help='really spend the modelled bus time')
+    parser.add_argument('--shadow', action='store_true', help='enable the register shadow cache')
+    parser.add_argument('--metrics', action='store_true', help='instrument the reader with mfrc522pi.metrics')
+    parser.add_argument('--adaptive', action='store_true', help='adaptive timeout profiles (mfrc522pi.timing)')
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--compare', help='JSON report of a previous run to compare against')
+    parser.add_argument('--list', action='store_true', help='list scenarios and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (group, _, _) in SCENARIOS.items():
+            print(f'{group:10} {name}')
+        return
+
+    names = []
+    for name in args.scenarios or SCENARIOS:
+        if name in SCENARIOS:
+            names.append(name)
+        else:
+            group = [n for n, s in SCENARIOS.items() if s[0] == name]
+            if not group:
+                exit(f'Unknown scenario {name}')
+            names.extend(group)
+
+    env_args = {'latency': args.latency / 1e6, 'speed': args.speed, 'sleep': args.sleep}
+    if args.shadow:
+        env_args['shadow'] = True
+    if args.metrics:
+        env_args['metrics'] = True
+    if args.adaptive:
+        env_args['adaptive'] = True
+
+    report = run(names, args.repeat, env_args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        print_report(report, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# UID keyed cache of card contents with LRU eviction, TTL and a cheap validation read
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.mifare import BLOCK_SIZE, sector_of
+from mfrc522pi.result import *
+from mfrc522pi.status import *
+from mfrc522pi.data import *
+from mfrc522pi.abi import *
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Entries dropped because the validation block changed on the card
+    stale: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CacheEntry:
+    data: BlocksData
+    size: int
+    stored: float
+
+
+def copy_blocks(blocks: dict) -> BlocksData:
+    # Callers get their own lists, changing them doesn't change the cache
+    return BlocksData({addr: list(block) for addr, block in blocks.items()})
+
+
+class CardCache:
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 1024 * 1024, ttl: float = None,
+                 validate_block: int = None):
+        # ttl - seconds an entry stays usable, None keeps it until evicted.
+        # validate_block - block read from the card on every hit and compared with the cached copy
+        # (e.g. a counter that changes whenever the content does), it has to be one of the cached blocks
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.validate_block = validate_block
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.stats = CacheStats()
+
+    @staticmethod
+    def key(uid: list[int], sak: int = None, atqa: list[int] = None) -> tuple:
+        return tuple(uid), sak, tuple(atqa) if atqa is not None else None
+
+    def get(self, key: tuple) -> BlocksData:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.monotonic() - entry.stored > self.ttl:
+            self.stats.expired += 1
+            self.invalidate(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry.data
+
+    def put(self, key: tuple, data: BlocksData):
+        self.invalidate(key)
+        size = len(data.data) * BLOCK_SIZE
+        if size > self.max_bytes:
+            return
+        self.entries[key] = CacheEntry(data, size, time.monotonic())
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.stats.evictions += 1
+
+    def invalidate(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def validate(self, reader: MFRC522, data: BlocksData, key: list[int], uid: list[int], mode: int) -> bool:
+        cached = data.data.get(self.validate_block)
+        if cached is None:
+            return False
+        if reader.authenticate(mode, self.validate_block, key, uid) != Status.OK:
+            # The card dropped out of ACTIVE state, the full read has to start over
+            reader.reselect(uid)
+            return False
+        res = reader.read_block(self.validate_block)
+        return res.status == Status.OK and list(res.data) == list(cached)
+
+    def lookup(self, reader: MFRC522, cache_key: tuple, blocks: range, key: list[int], uid: list[int],
+               mode: int) -> BlocksData:
+        data = self.get(cache_key)
+        if data is None or any(addr not in data.data for addr in blocks):
+            return None
+
+        if self.validate_block is not None:
+            if not self.validate(reader, data, key, uid, mode):
+                self.stats.stale += 1
+                self.invalidate(cache_key)
+                return None
+        return data
+
+    def read_blocks(self, reader: MFRC522, key: list[int], uid: list[int], block_count: int,
+                    sak: int = None, atqa: list[int] = None, mode: int = PICC.AUTHENT1A) -> Result[BlocksData]:
+        # Same as reader.read_blocks, but answered from the cache when the card is known and still valid
+        cache_key = self.key(uid, sak, atqa)
+        data = self.lookup(reader, cache_key, range(block_count), key, uid, mode)
+        if data is not None:
+            self.stats.hits += 1
+            return Result(Status.OK, copy_blocks({addr: data.data[addr] for addr in range(block_count)}))
+
+        self.stats.misses += 1
+        res = reader.read_blocks(key, uid, block_count, mode)
+        if res.status == Status.OK:
+            self.put(cache_key, copy_blocks(res.value.data))
+        return res
+
+    def read_block(self, reader: MFRC522, key: list[int], uid: list[int], addr: int,
+                   sak: int = None, atqa: list[int] = None, mode: int = PICC.AUTHENT1A) -> Result[BlockData]:
+        # Authenticate + read_block of one block, misses are added to the card's entry together with
+        # validate_block, so the next lookup can validate it
+        cache_key = self.key(uid, sak, atqa)
+        data = self.lookup(reader, cache_key, [addr], key, uid, mode)
+        if data is not None:
+            self.stats.hits += 1
+            return Result(Status.OK, BlockData(addr, list(data.data[addr])))
+
+        self.stats.misses += 1
+        status = reader.authenticate(mode, addr, key, uid)
+        if status != Status.OK:
+            return Result(status, BlockData(addr, []))
+        res = reader.read_block(addr)
+        if res.status != Status.OK:
+            return res
+
+        data = self.get(cache_key)
+        blocks = dict(data.data) if data is not None else dict()
+        blocks[addr] = res.data
+        if self.validate_block is not None and self.validate_block not in blocks:
+            if sector_of(self.validate_block) != sector_of(addr):
+                status = reader.authenticate(mode, self.validate_block, key, uid)
+            if status == Status.OK:
+                validation = reader.read_block(self.validate_block)
+                status = validation.status
+            if status != Status.OK:
+                # The block itself was read, only the entry can't be validated later
+                reader.reselect(uid)
+                return res
+            blocks[self.validate_block] = validation.data
+        self.put(cache_key, copy_blocks(blocks))
+        return res
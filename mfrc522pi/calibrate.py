@@ -0,0 +1,252 @@
+# SPI clock calibration: steps the clock up and validates every step with register write/read-back patterns,
+# FIFO loopback and the chip's digital self test (AutoTest), then picks the fastest reliable clock with a safety
+# margin. SpeedGovernor steps the clock down at runtime when failures pile up and the link check fails.
+# Usage: python3 -m mfrc522pi.calibrate [--dev DEV] [--reset PIN] [--output FILE]
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.logger import logger
+from mfrc522pi.result import *
+from mfrc522pi.status import *
+from mfrc522pi.abi import *
+from dataclasses import dataclass, field, asdict
+from random import Random
+import argparse
+import json
+import time
+import os
+
+
+# The MFRC522 takes up to 10 MHz
+SPEEDS = (1000000, 2000000, 4000000, 5000000, 8000000, 10000000)
+
+# Written to and read back from the timer reload registers, which are unused while the chip is idle
+PATTERNS = (0x00, 0xFF, 0x55, 0xAA, 0x0F, 0xF0, 0x5A, 0xA5, 0x01, 0x80)
+PATTERN_REGISTERS = (REG.TReloadH, REG.TReloadL)
+
+
+@dataclass
+class SpeedStep:
+    speed: int
+    # Bytes compared and how many of them were wrong
+    checks: int = 0
+    errors: int = 0
+    self_test: bool = True
+
+    def error_rate(self) -> float:
+        return self.errors / self.checks if self.checks else 0.0
+
+    def passed(self) -> bool:
+        return self.errors == 0 and self.self_test
+
+
+@dataclass
+class Calibration:
+    dev: str
+    speed: int
+    steps: list[SpeedStep] = field(default_factory=list)
+    timestamp: float = 0.0
+
+
+def register_check(reader: MFRC522, step: SpeedStep):
+    for register in PATTERN_REGISTERS:
+        for pattern in PATTERNS:
+            reader.write(register, pattern)
+            step.checks += 1
+            if reader.read(register) != pattern:
+                step.errors += 1
+
+
+def fifo_loopback(reader: MFRC522, step: SpeedStep, rng: Random):
+    # A full FIFO in one burst each way, the longest transfers the driver makes
+    data = [rng.randrange(256) for _ in range(reader.MAX_LEN)]
+    reader.write(REG.FIFOLevel, 0x80)
+    reader.write_fifo(data)
+    level = reader.read(REG.FIFOLevel)
+    result = reader.read_fifo(level)
+    step.checks += len(data) + 1
+    step.errors += sum(1 for a, b in zip(data, result) if a != b) + abs(len(data) - len(result))
+    if level != len(data):
+        step.errors += 1
+
+
+def test_speed(reader: MFRC522, speed: int, rounds: int, reference: list[int], rng: Random) -> SpeedStep:
+    reader.set_speed(speed)
+    step = SpeedStep(speed)
+    for _ in range(rounds):
+        register_check(reader, step)
+        fifo_loopback(reader, step, rng)
+    res = reader.self_test()
+    step.self_test = res.status == Status.OK and res.value == reference
+    return step
+
+
+def choose_speed(steps: list[SpeedStep], margin: int = 1) -> int:
+    # Fastest step of the passing run from the bottom. If a faster step failed, the last passing one is
+    # close to the edge and margin more steps are given up
+    passing = []
+    for step in steps:
+        if not step.passed():
+            break
+        passing.append(step.speed)
+    if not passing:
+        return None
+    if len(passing) == len(steps):
+        return passing[-1]
+    return passing[max(0, len(passing) - 1 - margin)]
+
+
+def calibrate(reader: MFRC522, speeds=SPEEDS, rounds: int = 20, margin: int = 1, filename: str = None,
+              seed: int = None) -> Result[Calibration]:
+    # Tests speeds in increasing order until one fails. The reader is left initialised at the chosen speed,
+    # filename - also store the result (see load_calibration)
+    rng = Random(seed)
+    speeds = sorted(speeds)
+    dev = getattr(reader.transport, 'dev', '')
+
+    # Self test output at the lowest clock is what the faster ones have to reproduce
+    reader.set_speed(speeds[0])
+    res = reader.self_test()
+    if res.status != Status.OK:
+        logger.error(f'calibrate: self test fails at {speeds[0]} Hz')
+        return Result(res.status, Calibration(dev, None))
+    reference = res.value
+
+    steps = []
+    for speed in speeds:
+        step = test_speed(reader, speed, rounds, reference, rng)
+        steps.append(step)
+        logger.debug(f'calibrate: {speed} Hz {step.errors}/{step.checks} errors, self test {step.self_test}')
+        if not step.passed():
+            break
+
+    speed = choose_speed(steps, margin)
+    if speed is None:
+        speed = speeds[0]
+        status = Status.ERROR
+    else:
+        status = Status.OK
+
+    # Whatever a failing step wrote to the wrong registers is reset
+    reader.set_speed(speed)
+    reader.init()
+
+    calibration = Calibration(dev, speed, steps, time.time())
+    if filename is not None and status == Status.OK:
+        save_calibration(filename, calibration)
+    return Result(status, calibration)
+
+
+def save_calibration(filename: str, calibration: Calibration):
+    # One file for all readers of a host, keyed by SPI device
+    try:
+        with open(filename) as f:
+            entries = json.load(f)
+    except (FileNotFoundError, ValueError):
+        entries = dict()
+    entries[calibration.dev] = asdict(calibration)
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp, filename)
+
+
+def load_calibration(filename: str, dev: str = '/dev/spidev0.0') -> Calibration:
+    # None when the file or the device's entry is missing, e.g. MFRC522(speed=...) falls back to its default
+    try:
+        with open(filename) as f:
+            entry = json.load(f).get(dev)
+    except (FileNotFoundError, ValueError):
+        return None
+    if entry is None:
+        return None
+    steps = [SpeedStep(**step) for step in entry.pop('steps', [])]
+    return Calibration(steps=steps, **entry)
+
+
+class SpeedGovernor:
+    # Counts failed transceives (TRANSCEIVE_ERROR) and blocks with a bad CRC per window of transceives.
+    # At max_errors the link itself is checked (Version read-back and FIFO loopback): when it fails too the
+    # clock goes one step down, RF trouble alone keeps the speed
+    def __init__(self, reader: MFRC522, speeds=SPEEDS, window: int = 200, max_errors: int = 5, seed: int = None):
+        self.reader = reader
+        self.speeds = sorted(speeds)
+        self.window = window
+        self.max_errors = max_errors
+        self.rng = Random(seed)
+        self.version = reader.version()
+        self.operations = 0
+        self.errors = 0
+        self.downshifts = 0
+        self.checks = 0
+
+    def instrument(self) -> 'SpeedGovernor':
+        transceive = self.reader.transceive
+        read_block = self.reader.read_block
+
+        def counted_transceive(*args, **kwargs):
+            res = transceive(*args, **kwargs)
+            self.record(res.status == Status.TRANSCEIVE_ERROR)
+            return res
+
+        def counted_read_block(*args, **kwargs):
+            res = read_block(*args, **kwargs)
+            if res.status == Status.BAD_CRC_ERROR:
+                self.record(True, False)
+            return res
+
+        self.reader.transceive = counted_transceive
+        self.reader.read_block = counted_read_block
+        return self
+
+    def record(self, failed: bool, operation: bool = True):
+        if operation:
+            self.operations += 1
+        if failed:
+            self.errors += 1
+            if self.errors >= self.max_errors:
+                self.errors = 0
+                self.operations = 0
+                if not self.link_ok():
+                    self.downshift()
+        if self.operations >= self.window:
+            self.operations = 0
+            self.errors = 0
+
+    def link_ok(self) -> bool:
+        self.checks += 1
+        step = SpeedStep(getattr(self.reader.transport, 'speed', 0))
+        fifo_loopback(self.reader, step, self.rng)
+        return step.errors == 0 and self.reader.version() == self.version
+
+    def downshift(self) -> bool:
+        current = getattr(self.reader.transport, 'speed', self.speeds[-1])
+        lower = [speed for speed in self.speeds if speed < current]
+        if not lower:
+            logger.error(f'SpeedGovernor: link errors at the lowest clock {current} Hz')
+            return False
+        logger.error(f'SpeedGovernor: link errors, SPI clock {current} -> {lower[-1]} Hz')
+        self.reader.set_speed(lower[-1])
+        self.reader.init()
+        self.downshifts += 1
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mfrc522pi SPI clock calibration')
+    parser.add_argument('--dev', default='/dev/spidev0.0')
+    parser.add_argument('--reset', type=int, default=22, help='reset pin (board numbering)')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--margin', type=int, default=1, help='steps to give up below a failing one')
+    parser.add_argument('--output', help='store the result in this JSON file')
+    args = parser.parse_args()
+
+    reader = MFRC522(dev=args.dev, reset=args.reset)
+    res = calibrate(reader, rounds=args.rounds, margin=args.margin, filename=args.output)
+    for step in res.value.steps:
+        print(f'{step.speed:>9} Hz  {step.errors:5}/{step.checks:<6} errors  '
+              f'self test {"ok" if step.self_test else "FAILED"}')
+    print(f'{res.status.name}: {res.value.speed} Hz')
+    reader.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# ISO/IEC 14443-A CRC (CRC_A) computed on the host instead of the MFRC522 coprocessor
+from mfrc522pi.abi import PICC
+
+
+CRC_A_INIT = 0x6363
+CRC_A_POLY = 0x8408
+
+
+def _make_table() -> tuple[int, ...]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ CRC_A_POLY if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+CRC_A_TABLE = _make_table()
+
+
+def crc_a(data) -> list[int]:
+    crc = CRC_A_INIT
+    table = CRC_A_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return [crc & 0xFF, crc >> 8]
+
+
+def _make_frames(command: int) -> tuple[tuple[int, ...], ...]:
+    return tuple((command, addr, *crc_a((command, addr))) for addr in range(256))
+
+
+# Complete [command, addr, CRC_L, CRC_M] frames for every block address
+READ_FRAMES = _make_frames(PICC.READ)
+WRITE_FRAMES = _make_frames(PICC.WRITE)
+HALT_FRAME = _make_frames(PICC.HALT)[0]
+
+
+def crc_corpus() -> list[list[int]]:
+    # Frames to compare host and chip CRC on: every READ/WRITE header, HALT and payloads of all FIFO friendly sizes
+    frames = [list(frame[:2]) for frame in READ_FRAMES + WRITE_FRAMES]
+    frames.append([PICC.HALT, 0x00])
+    for size in range(0, 19):
+        frames.append([(i * 37 + size) & 0xFF for i in range(size)])
+        frames.append([0xFF] * size)
+    return frames
@@ -1,36 +1,190 @@
 # Status (Error) and various Data Classes that represent the data returned by the API
 
+from mfrc522pi.status import Status
+from mfrc522pi.mifare import BLOCK_SIZE
+from collections.abc import Mapping
 from dataclasses import dataclass
+from enum import Enum
 
 
+# Result types are slotted (spelled out, dataclass(slots=True) needs Python 3.10)
+
 @dataclass
 class TransceiveResult:
+    __slots__ = ('data', 'size')
     data: list[int]
     size: int
 
 
 @dataclass
 class RequestResult:
+    __slots__ = ('size', 'atqa')
     size: int
+    # Bits of all cards that answered overlaid
+    atqa: list[int]
 
 
 @dataclass
 class AntiCollisionResult:
+    __slots__ = ('uid',)
     uid: list[int]
 
 
 @dataclass
 class SelectTagResult:
+    __slots__ = ('tag_type',)
     # TODO: Check if this is really the type
     tag_type: int
 
 
+@dataclass
+class CardSelection:
+    __slots__ = ('uid', 'sak', 'atqa')
+    # Complete UID (4, 7 or 10 bytes) without cascade tags and BCCs, SAK of the last cascade level
+    uid: list[int]
+    sak: int
+    atqa: list[int]
+
+
 @dataclass
 class BlockData:
+    __slots__ = ('sector', 'data')
+    # data is bytes when the reader runs in compact mode
     sector: int
     data: list[int]
 
 
+@dataclass
+class PagesData:
+    __slots__ = ('start', 'data')
+    # Ultralight/NTAG pages from start on, PAGE_SIZE bytes each. bytes in compact mode
+    start: int
+    data: list[int]
+
+
 @dataclass
 class BlocksData:
+    __slots__ = ('data',)
     data: dict[int, list[int]]
+
+
+@dataclass
+class SectorsData(BlocksData):
+    __slots__ = ('sectors',)
+    # Status of every sector that was read, blocks of failed sectors are missing from data
+    sectors: dict[int, Status]
+
+
+@dataclass
+class DumpHeader:
+    __slots__ = ('version', 'uid', 'atqa', 'sak', 'block_size', 'block_count', 'crc32')
+    version: int
+    uid: list[int]
+    atqa: list[int]
+    # None when the dump was saved without it
+    sak: int
+    block_size: int
+    block_count: int
+    crc32: int
+
+
+class BlockMap(Mapping):
+    # Read-only dict[int, list[int]] view of CompactBlocks for code written against BlocksData.data
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks: 'CompactBlocks'):
+        self.blocks = blocks
+
+    def __getitem__(self, block: int) -> list[int]:
+        return list(self.blocks.block(block))
+
+    def __iter__(self):
+        return iter(self.blocks.ids())
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+
+class CompactBlocks:
+    # A card dump in one contiguous buffer, 16 bytes per block instead of a list of 16 ints.
+    # block() returns a zero-copy memoryview, .data keeps the BlocksData API (copies to lists)
+    __slots__ = ('buffer', 'present')
+
+    def __init__(self, block_count: int, data: dict = None):
+        self.buffer = bytearray(block_count * BLOCK_SIZE)
+        # 1 for every block that was read, failed sectors stay 0
+        self.present = bytearray(block_count)
+        for block, block_data in (data or {}).items():
+            self.set(block, block_data)
+
+    @classmethod
+    def from_blocks(cls, data: BlocksData, block_count: int = None) -> 'CompactBlocks':
+        if block_count is None:
+            block_count = max(data.data, default=-1) + 1
+        return cls(block_count, data.data)
+
+    def set(self, block: int, data):
+        offset = block * BLOCK_SIZE
+        self.buffer[offset:offset + BLOCK_SIZE] = bytes(data)
+        self.present[block] = 1
+
+    def block(self, block: int) -> memoryview:
+        if not 0 <= block < len(self.present) or not self.present[block]:
+            raise KeyError(block)
+        offset = block * BLOCK_SIZE
+        return memoryview(self.buffer)[offset:offset + BLOCK_SIZE]
+
+    def ids(self) -> list[int]:
+        return [block for block, present in enumerate(self.present) if present]
+
+    def __len__(self) -> int:
+        return sum(self.present)
+
+    def __contains__(self, block: int) -> bool:
+        return 0 <= block < len(self.present) and self.present[block] == 1
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactBlocks):
+            return self.present == other.present and self.buffer == other.buffer
+        if isinstance(other, BlocksData):
+            return dict(self.data) == other.data
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'CompactBlocks({len(self)} of {len(self.present)} blocks)'
+
+    @property
+    def data(self) -> BlockMap:
+        return BlockMap(self)
+
+    def to_blocks(self) -> BlocksData:
+        return BlocksData(dict(self.data))
+
+
+class WriteOutcome(Enum):
+    WRITTEN = 0
+    # Already had the target content, or excluded (manufacturer block, trailers)
+    SKIPPED = 1
+    FAILED = 2
+
+
+@dataclass
+class WriteReport:
+    blocks: dict[int, WriteOutcome]
+
+    def count(self, outcome: WriteOutcome) -> int:
+        return sum(1 for value in self.blocks.values() if value == outcome)
+
+
+class CardEventKind(Enum):
+    ARRIVED = 0
+    PRESENT = 1
+    DEPARTED = 2
+
+
+@dataclass
+class CardEvent:
+    uid: list[int]
+    timestamp: float
+    reader: str = None
+    kind: CardEventKind = CardEventKind.ARRIVED
@@ -0,0 +1,834 @@
+# Software emulator of the MFRC522 register file and FIFO with emulated PICCs in the RF field
+# Can be passed to MFRC522 as transport (together with EmulatedGPIO) to run without hardware
+from mfrc522pi.transport import Transport
+from mfrc522pi.mifare import *
+from mfrc522pi.crc import crc_a
+from mfrc522pi.abi import *
+from mfrc522pi.timing import CARRIER, BYTE_TIME
+from random import Random
+
+FIFO_SIZE = 64
+
+ACK = 0xA
+NAK_INVALID = 0x4
+NAK_CRC = 0x5
+
+RESET_VALUES = {
+    REG.Command: 0x20,
+    REG.CommIEn: 0x80,
+    REG.CommIrq: 0x14,
+    REG.Status1: 0x21,
+    REG.WaterLevel: 0x08,
+    REG.Control: 0x10,
+    REG.Coll: 0xA0,
+    REG.Mode: 0x3F,
+    REG.TxControl: 0x80,
+    REG.TxSel: 0x10,
+    REG.RxSel: 0x84,
+    REG.RxThreshold: 0x84,
+    REG.Demod: 0x4D,
+    REG.Mifare: 0x62,
+    REG.SerialSpeed: 0xEB,
+    REG.CRCResultM: 0xFF,
+    REG.CRCResultL: 0xFF,
+    REG.ModWidth: 0x26,
+    REG.RFCfg: 0x48,
+    REG.GsN: 0x88,
+    REG.CWGsP: 0x20,
+    REG.ModGsP: 0x20,
+}
+
+# FIFO after the digital self test as the chips leave it (datasheet section 16.1.1), kept apart from the
+# driver's AUTOTEST_RESULTS so the emulator checks that table instead of echoing it
+SELF_TEST_FIFO = {
+    0x91: bytes.fromhex(
+        '00c637d532b7575cc2d87c4dd970c773'
+        '10e6d2aa5ea13e5a14af3061c970db2e'
+        '642272b5bd65f4ec22bcd37235cdaa41'
+        '1fa7f35314de7e02d90fb55e251d2979'),
+    0x92: bytes.fromhex(
+        '00eb66ba57bf2395d0e30d3d27895cde'
+        '9d3ba700215b8982513aeb020ca50049'
+        '7c844db3ccd21b815d4876d5716121a9'
+        '86968338cf9d5b6ddc15ba3e7d953b2f'),
+}
+
+READ_ONLY = (REG.Error, REG.Status1, REG.Coll, REG.Version, REG.CRCResultM, REG.CRCResultL, REG.TCounterValueH,
+             REG.TCounterValueL)
+
+
+def to_bits(data, last_bits: int = 0) -> list[int]:
+    bits = []
+    for i, b in enumerate(data):
+        n = last_bits if last_bits and i == len(data) - 1 else 8
+        bits.extend((b >> j) & 1 for j in range(n))
+    return bits
+
+
+def from_bits(bits, align: int = 0) -> tuple[list[int], int]:
+    data = [0] * ((align + len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        pos = align + i
+        data[pos // 8] |= bit << (pos % 8)
+    return data, (align + len(bits)) % 8
+
+
+def with_crc(data) -> list[int]:
+    data = list(data)
+    return to_bits(data + crc_a(data))
+
+
+class EmulatedCard:
+    IDLE = 0
+    READY = 1
+    ACTIVE = 2
+    HALT = 3
+
+    def __init__(self, uid, atqa, sak: int):
+        if len(uid) not in (4, 7, 10):
+            raise ValueError(f'Invalid UID length {len(uid)}')
+        self.uid = list(uid)
+        self.atqa = list(atqa)
+        self.sak = sak
+        self.level = 0
+        self.state = self.IDLE
+        self.halted = False
+        self.auth = None
+
+    def cascade_levels(self) -> list[list[int]]:
+        return cascade_levels(self.uid)
+
+    def power_off(self):
+        self.state = self.IDLE
+        self.level = 0
+        self.halted = False
+        self.reset_session()
+
+    def reset_session(self):
+        self.auth = None
+
+    def deselect(self):
+        self.state = self.HALT if self.halted else self.IDLE
+        self.level = 0
+        self.reset_session()
+
+    def receive(self, bits: list[int], crypto: bool):
+        if len(bits) == 7:
+            return self.short_frame(from_bits(bits)[0][0])
+
+        if self.state == self.READY:
+            data, _ = from_bits(bits)
+            if len(bits) >= 16 and data[0] == SEL_CODES[self.level]:
+                return self.anticollision(bits)
+            self.deselect()
+            return None
+
+        if self.state != self.ACTIVE or len(bits) % 8 or len(bits) < 24:
+            return None
+
+        if (self.auth is not None) != crypto:
+            # Frame enciphered by only one side is garbage to the card
+            self.deselect()
+            return None
+
+        data, _ = from_bits(bits)
+        if crc_a(data[:-2]) != data[-2:]:
+            return to_bits([NAK_CRC], 4)
+
+        return self.command(data[:-2])
+
+    def short_frame(self, command: int):
+        if command == PICC.REQIDL and self.state == self.IDLE:
+            self.state = self.READY
+        elif command == PICC.REQALL and self.state in (self.IDLE, self.HALT):
+            self.halted = self.state == self.HALT
+            self.state = self.READY
+        else:
+            if self.state in (self.READY, self.ACTIVE):
+                self.deselect()
+            return None
+        self.level = 0
+        return to_bits(self.atqa)
+
+    def anticollision(self, bits: list[int]):
+        data, _ = from_bits(bits)
+        nvb = data[1]
+        levels = self.cascade_levels()
+        own = to_bits(levels[self.level])
+
+        if nvb == 0x70:
+            if len(bits) != 72 or crc_a(data[:7]) != data[7:9]:
+                return None
+            if data[2:7] != levels[self.level]:
+                return None
+            if self.level + 1 < len(levels):
+                self.level += 1
+                return with_crc([0x04])
+            self.state = self.ACTIVE
+            return with_crc([self.sak])
+
+        known = ((nvb >> 4) - 2) * 8 + (nvb & 0xF)
+        if known < 0 or known > 32 or len(bits) != 16 + known:
+            return None
+        if bits[16:] != own[:known]:
+            return None
+        return own[known:]
+
+    def authenticate(self, mode: int, block: int, key, uid) -> bool:
+        return False
+
+    def command(self, data: list[int]):
+        if data[0] == PICC.HALT:
+            self.state = self.HALT
+            self.level = 0
+            self.reset_session()
+            return None
+        return to_bits([NAK_INVALID], 4)
+
+
+# Access conditions of data blocks indexed by (C1, C2, C3): (read, write, increment, decrement)
+# 'A' - key A only, 'B' - key B only, 'AB' - either key, '' - never
+DATA_ACCESS = {
+    (0, 0, 0): ('AB', 'AB', 'AB', 'AB'),
+    (0, 1, 0): ('AB', '', '', ''),
+    (1, 0, 0): ('AB', 'B', '', ''),
+    (1, 1, 0): ('AB', 'B', 'B', 'AB'),
+    (0, 0, 1): ('AB', '', '', 'AB'),
+    (0, 1, 1): ('B', 'B', '', ''),
+    (1, 0, 1): ('B', '', '', ''),
+    (1, 1, 1): ('', '', '', ''),
+}
+
+# Access conditions of sector trailers: (key A write, access bits read, access bits write, key B read, key B write)
+TRAILER_ACCESS = {
+    (0, 0, 0): ('A', 'A', '', 'A', 'A'),
+    (0, 1, 0): ('', 'A', '', 'A', ''),
+    (1, 0, 0): ('B', 'AB', '', '', 'B'),
+    (1, 1, 0): ('', 'AB', '', '', ''),
+    (0, 0, 1): ('A', 'A', 'A', 'A', 'A'),
+    (0, 1, 1): ('B', 'AB', 'B', '', 'B'),
+    (1, 0, 1): ('', 'AB', 'B', '', ''),
+    (1, 1, 1): ('', 'AB', '', '', ''),
+}
+
+
+class MifareClassic(EmulatedCard):
+    def __init__(self, uid, blocks: int = CLASSIC_1K_BLOCKS, data: dict = None):
+        if blocks == CLASSIC_4K_BLOCKS:
+            atqa, sak = [0x02, 0x00], 0x18
+        elif blocks == CLASSIC_MINI_BLOCKS:
+            atqa, sak = [0x04, 0x00], 0x09
+        else:
+            atqa, sak = [0x04, 0x00], 0x08
+        if len(uid) == 7:
+            atqa[0] |= 0x40
+
+        super().__init__(uid, atqa, sak)
+
+        self.blocks = [[0] * BLOCK_SIZE for _ in range(blocks)]
+        for sector in range(sector_count(blocks)):
+            self.blocks[sector_trailer(sector)] = default_trailer()
+
+        manufacturer = [0x62, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69]
+        if len(uid) == 4:
+            bcc = uid[0] ^ uid[1] ^ uid[2] ^ uid[3]
+            self.blocks[0] = list(uid) + [bcc, sak] + self.atqa + manufacturer
+        else:
+            self.blocks[0] = list(uid) + [sak] + self.atqa + manufacturer[:6]
+
+        for block, block_data in (data or {}).items():
+            self.blocks[block] = list(block_data)
+
+        self.pending = None
+        # (value, address byte) left by INCREMENT/DECREMENT/RESTORE for TRANSFER
+        self.transfer_buffer = None
+
+    def reset_session(self):
+        self.auth = None
+        self.pending = None
+        self.transfer_buffer = None
+
+    def key_b_readable(self, sector: int) -> bool:
+        groups = decode_access_bits(self.blocks[sector_trailer(sector)])
+        return groups is not None and 'A' in TRAILER_ACCESS[groups[3]][3]
+
+    def allowed(self, block: int, operation: int) -> bool:
+        if self.auth is None or block >= len(self.blocks):
+            return False
+        sector, key_type = self.auth
+        if sector_of(block) != sector:
+            return False
+        groups = decode_access_bits(self.blocks[sector_trailer(sector)])
+        if groups is None:
+            return False
+        key = 'A' if key_type == PICC.AUTHENT1A else 'B'
+        if key == 'B' and self.key_b_readable(sector):
+            return False
+        if is_trailer(block):
+            # Trailer parts are masked / protected individually in read() and write()
+            return True
+        return key in DATA_ACCESS[groups[access_group(block)]][operation]
+
+    def authenticate(self, mode: int, block: int, key, uid) -> bool:
+        if self.state != self.ACTIVE or block >= len(self.blocks) or list(uid) != self.uid[-4:]:
+            self.deselect()
+            return False
+        sector = sector_of(block)
+        trailer = self.blocks[sector_trailer(sector)]
+        expected = trailer[:6] if mode == PICC.AUTHENT1A else trailer[10:16]
+        if mode not in (PICC.AUTHENT1A, PICC.AUTHENT1B) or list(key) != expected:
+            self.deselect()
+            return False
+        self.auth = (sector, mode)
+        self.pending = None
+        return True
+
+    def read(self, block: int) -> list[int]:
+        data = list(self.blocks[block])
+        if is_trailer(block):
+            groups = decode_access_bits(data)
+            key = 'A' if self.auth[1] == PICC.AUTHENT1A else 'B'
+            access = TRAILER_ACCESS[groups[3]] if groups else ('',) * 5
+            data[:6] = [0] * 6
+            if key not in access[1]:
+                data[6:10] = [0] * 4
+            if key not in access[3]:
+                data[10:16] = [0] * 6
+        return data
+
+    def write(self, block: int, data: list[int]) -> bool:
+        if not is_trailer(block):
+            self.blocks[block] = list(data)
+            return True
+        current = self.blocks[block]
+        groups = decode_access_bits(current)
+        key = 'A' if self.auth[1] == PICC.AUTHENT1A else 'B'
+        access = TRAILER_ACCESS[groups[3]] if groups else ('',) * 5
+        updated = list(current)
+        if key in access[0]:
+            updated[:6] = data[:6]
+        if key in access[2]:
+            updated[6:10] = data[6:10]
+        if key in access[4]:
+            updated[10:16] = data[10:16]
+        self.blocks[block] = updated
+        return True
+
+    def command(self, data: list[int]):
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            return pending(data)
+
+        if data[0] == PICC.READ and len(data) == 2:
+            block = data[1]
+            if not self.allowed(block, 0):
+                self.deselect()
+                return to_bits([NAK_INVALID], 4)
+            return with_crc(self.read(block))
+
+        if data[0] == PICC.WRITE and len(data) == 2:
+            block = data[1]
+            if block == 0 or not self.allowed(block, 1):
+                self.deselect()
+                return to_bits([NAK_INVALID], 4)
+
+            def write_data(payload):
+                if len(payload) != BLOCK_SIZE:
+                    self.deselect()
+                    return to_bits([NAK_INVALID], 4)
+                self.write(block, payload)
+                return to_bits([ACK], 4)
+
+            self.pending = write_data
+            return to_bits([ACK], 4)
+
+        if data[0] in (PICC.INCREMENT, PICC.DECREMENT, PICC.RESTORE) and len(data) == 2:
+            block = data[1]
+            # Access bits: increment, and decrement/transfer/restore
+            if is_trailer(block) or not self.allowed(block, 2 if data[0] == PICC.INCREMENT else 3):
+                self.deselect()
+                return to_bits([NAK_INVALID], 4)
+            command = data[0]
+
+            def value_data(payload):
+                current = parse_value_block(self.blocks[block])
+                if len(payload) != 4 or current is None:
+                    self.deselect()
+                    return to_bits([NAK_INVALID], 4)
+                value, addr = current
+                operand = int.from_bytes(bytes(payload), 'little', signed=True)
+                if command == PICC.INCREMENT:
+                    value += operand
+                elif command == PICC.DECREMENT:
+                    value -= operand
+                self.transfer_buffer = (value, addr)
+                # Never answered on success
+                return None
+
+            self.pending = value_data
+            return to_bits([ACK], 4)
+
+        if data[0] == PICC.TRANSFER and len(data) == 2:
+            block = data[1]
+            if self.transfer_buffer is None or block == 0 or is_trailer(block) or not self.allowed(block, 3):
+                self.deselect()
+                return to_bits([NAK_INVALID], 4)
+            self.blocks[block] = value_block(*self.transfer_buffer)
+            return to_bits([ACK], 4)
+
+        return super().command(data)
+
+
+class MifareUltralight(EmulatedCard):
+    PAGE_SIZE = 4
+
+    def __init__(self, uid, pages: int = 16, data: dict = None):
+        if len(uid) != 7:
+            raise ValueError('Ultralight cards have 7 byte UIDs')
+        super().__init__(uid, [0x44, 0x00], 0x00)
+        self.pages = [[0] * self.PAGE_SIZE for _ in range(pages)]
+        bcc0 = CASCADE_TAG ^ uid[0] ^ uid[1] ^ uid[2]
+        bcc1 = uid[3] ^ uid[4] ^ uid[5] ^ uid[6]
+        self.pages[0] = list(uid[:3]) + [bcc0]
+        self.pages[1] = list(uid[3:7])
+        self.pages[2] = [bcc1, 0x48, 0x00, 0x00]
+        for page, page_data in (data or {}).items():
+            self.pages[page] = list(page_data)
+        self.pending = None
+
+    def reset_session(self):
+        self.auth = None
+        self.pending = None
+
+    def read_pages(self, start: int, count: int) -> list[int]:
+        data = []
+        for i in range(count):
+            data.extend(self.pages[(start + i) % len(self.pages)])
+        return data
+
+    def write_page(self, page: int, data) -> bool:
+        if page < 2 or page >= len(self.pages):
+            return False
+        self.pages[page] = list(data[:self.PAGE_SIZE])
+        return True
+
+    def command(self, data: list[int]):
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            return pending(data)
+
+        if data[0] == PICC.READ and len(data) == 2 and data[1] < len(self.pages):
+            return with_crc(self.read_pages(data[1], 4))
+
+        if data[0] == PICC.UL_WRITE and len(data) == 6:
+            if not self.write_page(data[1], data[2:6]):
+                self.deselect()
+                return to_bits([NAK_INVALID], 4)
+            return to_bits([ACK], 4)
+
+        if data[0] == PICC.WRITE and len(data) == 2 and 2 <= data[1] < len(self.pages):
+            page = data[1]
+
+            def write_data(payload):
+                if len(payload) != BLOCK_SIZE or not self.write_page(page, payload):
+                    self.deselect()
+                    return to_bits([NAK_INVALID], 4)
+                return to_bits([ACK], 4)
+
+            self.pending = write_data
+            return to_bits([ACK], 4)
+
+        if data[0] == PICC.HALT:
+            return super().command(data)
+
+        self.deselect()
+        return to_bits([NAK_INVALID], 4)
+
+
+class Ntag21x(MifareUltralight):
+    # model -> (GET_VERSION storage size, pages, capability container data area size)
+    MODELS = {
+        213: (0x0F, 45, 0x12),
+        215: (0x11, 135, 0x3E),
+        216: (0x13, 231, 0x6D),
+    }
+
+    def __init__(self, uid, model: int = 216, data: dict = None):
+        storage, pages, cc_size = self.MODELS[model]
+        self.version = [0x00, 0x04, 0x04, 0x02, 0x01, 0x00, storage, 0x03]
+        super().__init__(uid, pages, {3: [0xE1, 0x10, cc_size, 0x00], **(data or {})})
+
+    def command(self, data: list[int]):
+        if self.pending is None:
+            if data[0] == PICC.GET_VERSION and len(data) == 1:
+                return with_crc(self.version)
+
+            if data[0] == PICC.FAST_READ and len(data) == 3:
+                start, end = data[1], data[2]
+                if start > end or end >= len(self.pages):
+                    self.deselect()
+                    return to_bits([NAK_INVALID], 4)
+                return with_crc(self.read_pages(start, end - start + 1))
+
+        return super().command(data)
+
+
+class EmulatedMFRC522(Transport):
+    VERSION = 0x92
+
+    def __init__(self, cards=()):
+        self.cards = list(cards)
+        self.transfers = 0
+        self.bytes = 0
+        self.fifo = []
+        # Rest of an answer that didn't fit the FIFO yet
+        self.rx_pending = []
+        self.rx_last_bits = 0
+        # Seconds from the end of a frame to the start of the answer, ~90 us is the ISO 14443 minimum
+        self.response_time = 0.0001
+        # Modelled time on air: frames, answer delays and timer expiries
+        self.rf_time = 0.0
+        # FIFO contents of the digital self test, SELF_TEST_FIFO of the chip version when None. Set a different
+        # (e.g. corrupted) result to make self_test() fail
+        self.autotest_result = None
+        self.regs = [0] * 64
+        self.hard_reset()
+
+    def hard_reset(self):
+        self.regs = [0] * 64
+        for reg, value in RESET_VALUES.items():
+            self.regs[reg] = value
+        self.regs[REG.Version] = self.VERSION
+        self.fifo = []
+        self.rx_pending = []
+        self.field_off()
+
+    def add_card(self, card: EmulatedCard):
+        self.cards.append(card)
+        if not self.antenna():
+            card.power_off()
+
+    def remove_card(self, card: EmulatedCard):
+        self.cards.remove(card)
+        card.power_off()
+
+    def antenna(self) -> bool:
+        return self.regs[REG.TxControl] & 0x03 != 0
+
+    def field_off(self):
+        for card in self.cards:
+            card.power_off()
+
+    def crypto(self) -> bool:
+        return self.regs[REG.Status2] & 0x08 != 0
+
+    def irq(self) -> bool:
+        comm = self.regs[REG.CommIEn] & self.regs[REG.CommIrq] & 0x7F
+        div = self.regs[REG.DivlEn] & self.regs[REG.DivIrq] & 0x14
+        return comm != 0 or div != 0
+
+    def irq_level(self) -> int:
+        # IRqInv set in CommIEn makes the IRQ pin active low
+        inverted = self.regs[REG.CommIEn] & 0x80 != 0
+        return int(self.irq() != inverted)
+
+    def transfer(self, data) -> tuple:
+        self.transfers += 1
+        self.bytes += len(data)
+        result = [0] * len(data)
+        if not data:
+            return tuple(result)
+
+        if data[0] & 0x80:
+            for i in range(len(data) - 1):
+                result[i + 1] = self.read_register((data[i] >> 1) & 0x3F)
+        else:
+            addr = (data[0] >> 1) & 0x3F
+            for value in data[1:]:
+                self.write_register(addr, value)
+
+        return tuple(result)
+
+    def close(self):
+        pass
+
+    def read_register(self, addr: int) -> int:
+        if addr == REG.FIFOData:
+            return self.fifo.pop(0) if self.fifo else 0
+        if addr == REG.FIFOLevel:
+            return len(self.fifo)
+        return self.regs[addr]
+
+    def write_register(self, addr: int, value: int):
+        if addr == REG.FIFOData:
+            if len(self.fifo) < FIFO_SIZE:
+                self.fifo.append(value)
+            else:
+                self.regs[REG.Error] |= 0x10
+        elif addr == REG.FIFOLevel:
+            if value & 0x80:
+                self.fifo.clear()
+                self.rx_pending = []
+                self.regs[REG.Error] &= ~0x10
+        elif addr in (REG.CommIrq, REG.DivIrq):
+            if value & 0x80:
+                self.regs[addr] |= value & 0x7F
+            else:
+                self.regs[addr] &= ~value & 0x7F
+                if addr == REG.CommIrq and value & 0x08 and self.rx_pending:
+                    self.stream()
+        elif addr == REG.Command:
+            self.regs[REG.Command] = value & 0x3F
+            self.execute(value & 0x0F)
+        elif addr == REG.BitFraming:
+            self.regs[addr] = value
+            if value & 0x80 and self.regs[REG.Command] & 0x0F == PCD.TRANSCEIVE:
+                self.transceive()
+        elif addr == REG.TxControl:
+            was_on = self.antenna()
+            self.regs[addr] = value
+            if was_on and not self.antenna():
+                self.field_off()
+        elif addr == REG.Status2:
+            self.regs[addr] = value & 0xC8 | self.regs[addr] & 0x07
+        elif addr not in READ_ONLY:
+            self.regs[addr] = value
+
+    def execute(self, command: int):
+        if command == PCD.RESETPHASE:
+            self.hard_reset()
+        elif command == PCD.CALCCRC:
+            if self.regs[REG.AutoTest] & 0x0F == 0x09:
+                # Digital self test
+                result = self.autotest_result
+                self.fifo = list(SELF_TEST_FIFO[self.VERSION] if result is None else result)[:FIFO_SIZE]
+            else:
+                self.calculate_crc()
+        elif command == PCD.MEM:
+            # FIFO to the internal buffer, which isn't emulated
+            self.fifo = []
+        elif command == PCD.AUTHENT:
+            self.authenticate()
+        elif command == PCD.IDLE:
+            pass
+
+    def timer(self) -> tuple[float, int]:
+        # Seconds per tick and TReload
+        prescaler = (self.regs[REG.TMode] & 0x0F) << 8 | self.regs[REG.TPrescaler]
+        return (2 * prescaler + 1) / CARRIER, self.regs[REG.TReloadH] << 8 | self.regs[REG.TReloadL]
+
+    def timeout(self):
+        # With TAuto the timer starts at the end of transmission and fires when no answer arrives
+        if self.regs[REG.TMode] & 0x80:
+            tick, reload = self.timer()
+            self.rf_time += (reload + 1) * tick
+            self.regs[REG.CommIrq] |= 0x01
+
+    def answer(self) -> bool:
+        # The timer stops when the answer starts and keeps what is left in TCounterValue. An answer later
+        # than the timer is lost, the command ends with TimerIRq
+        if not self.regs[REG.TMode] & 0x80:
+            self.rf_time += self.response_time
+            return True
+        tick, reload = self.timer()
+        ticks = int(self.response_time / tick)
+        if ticks > reload:
+            self.timeout()
+            return False
+        self.rf_time += self.response_time
+        self.regs[REG.TCounterValueH] = (reload - ticks) >> 8
+        self.regs[REG.TCounterValueL] = (reload - ticks) & 0xFF
+        return True
+
+    def calculate_crc(self):
+        crc = crc_a(self.fifo)
+        self.fifo.clear()
+        self.regs[REG.CRCResultL] = crc[0]
+        self.regs[REG.CRCResultM] = crc[1]
+        self.regs[REG.DivIrq] |= 0x04
+
+    def authenticate(self):
+        frame, self.fifo = self.fifo, []
+        self.regs[REG.Error] = 0
+        self.regs[REG.Status2] &= ~0x08
+
+        if len(frame) >= 12 and self.antenna():
+            for card in self.cards:
+                if card.state != card.ACTIVE:
+                    continue
+                if card.authenticate(frame[0], frame[1], frame[2:8], frame[8:12]):
+                    if not self.answer():
+                        return
+                    self.regs[REG.Status2] |= 0x08
+                    self.regs[REG.CommIrq] |= 0x10
+                    self.regs[REG.Command] &= 0xF0
+                    return
+
+        self.timeout()
+
+    def transceive(self):
+        framing = self.regs[REG.BitFraming]
+        tx_last_bits = framing & 0x07
+        rx_align = (framing >> 4) & 0x07
+
+        frame, self.fifo = self.fifo, []
+        self.regs[REG.Error] = 0
+        self.regs[REG.Coll] = 0xA0
+        self.regs[REG.CommIrq] |= 0x40
+
+        responses = []
+        if self.antenna():
+            self.rf_time += len(frame) * BYTE_TIME
+            bits = to_bits(frame, tx_last_bits)
+            for card in self.cards:
+                response = card.receive(bits, self.crypto())
+                if response is not None:
+                    responses.append(response)
+
+        if not responses:
+            self.timeout()
+            return
+
+        if not self.answer():
+            return
+
+        bits, collision = self.combine(responses)
+        data, last_bits = from_bits(bits, rx_align)
+        self.rf_time += len(data) * BYTE_TIME
+
+        if collision is not None:
+            position = collision + rx_align + 1
+            self.regs[REG.Error] |= 0x08
+            self.regs[REG.Coll] = position & 0x1F if position <= 32 else 0x20
+
+        self.rx_pending = data
+        self.rx_last_bits = last_bits
+        self.stream()
+
+    def stream(self):
+        # Moves the answer into the FIFO. With HiAlertIEn set the host drains at HiAlert: the FIFO is filled,
+        # HiAlertIRq raised and the rest arrives once the host clears it. Otherwise whatever doesn't fit is
+        # lost (BufferOvfl), like with a host too slow to read
+        room = FIFO_SIZE - len(self.fifo)
+        if len(self.rx_pending) > room and self.regs[REG.CommIEn] & 0x08:
+            self.fifo.extend(self.rx_pending[:room])
+            self.rx_pending = self.rx_pending[room:]
+            if len(self.fifo) >= FIFO_SIZE - self.regs[REG.WaterLevel]:
+                self.regs[REG.CommIrq] |= 0x08
+            return
+
+        self.receive(self.rx_pending)
+        self.rx_pending = []
+        self.regs[REG.Control] = self.regs[REG.Control] & 0xF8 | self.rx_last_bits
+        self.regs[REG.CommIrq] |= 0x20
+
+    def receive(self, data: list[int]):
+        overflow = len(self.fifo) + len(data) - FIFO_SIZE
+        if overflow > 0:
+            data = data[:-overflow]
+            self.regs[REG.Error] |= 0x10
+        self.fifo.extend(data)
+
+    @staticmethod
+    def combine(responses: list[list[int]]):
+        # Overlay the answers of all cards, remembering the first bit where they disagree
+        if len(responses) == 1:
+            return responses[0], None
+        length = max(len(r) for r in responses)
+        bits = []
+        collision = None
+        for i in range(length):
+            values = {r[i] if i < len(r) else None for r in responses}
+            if len(values) > 1 and collision is None:
+                collision = i
+            bits.append(1 if 1 in values else 0)
+        return bits, collision
+
+
+class EmulatedLink(Transport):
+    # SPI wiring to an emulated chip that flips bits above max_speed, error_rate per byte at twice max_speed
+    # growing linearly from 0 at max_speed. Both directions are affected, a corrupted address byte hits
+    # another register like on a real bus
+    def __init__(self, chip: EmulatedMFRC522, speed: int = 1000000, max_speed: int = 4000000,
+                 error_rate: float = 0.05, seed: int = None):
+        self.chip = chip
+        self.speed = speed
+        self.max_speed = max_speed
+        self.error_rate = error_rate
+        self.random = Random(seed)
+
+    def set_speed(self, speed: int):
+        self.speed = speed
+
+    def corrupt(self, data) -> list[int]:
+        rate = self.error_rate * (self.speed - self.max_speed) / self.max_speed
+        return [x ^ (1 << self.random.randrange(8)) if self.random.random() < rate else x for x in data]
+
+    def transfer(self, data) -> tuple:
+        if self.speed <= self.max_speed:
+            return self.chip.transfer(data)
+        return tuple(self.corrupt(self.chip.transfer(tuple(self.corrupt(data)))))
+
+    def close(self):
+        self.chip.close()
+
+    def __getattr__(self, name: str):
+        # transfers, cards etc. of the chip
+        if name == 'chip':
+            raise AttributeError(name)
+        return getattr(self.chip, name)
+
+
+class EmulatedGPIO:
+    BOARD = 10
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self.mode = None
+        self.pins = dict()
+        self.irq_sources = dict()
+
+    def connect_irq(self, pin: int, chip: EmulatedMFRC522):
+        self.irq_sources[pin] = chip
+
+    def setmode(self, mode: int):
+        self.mode = mode
+
+    def setwarnings(self, flag: bool):
+        pass
+
+    def setup(self, channel: int, direction: int, pull_up_down: int = PUD_OFF, initial: int = LOW):
+        self.pins[channel] = initial if direction == self.OUT else self.HIGH
+
+    def output(self, channel: int, value: int):
+        self.pins[channel] = int(value)
+
+    def input(self, channel: int) -> int:
+        if channel in self.irq_sources:
+            return self.irq_sources[channel].irq_level()
+        return self.pins.get(channel, self.LOW)
+
+    def wait_for_edge(self, channel: int, edge: int, bouncetime: int = None, timeout: int = None):
+        # The emulated chip completes commands synchronously, so an edge is either there or never comes
+        level = self.input(channel)
+        if (edge == self.FALLING and level == self.LOW) or (edge == self.RISING and level == self.HIGH):
+            return channel
+        return None
+
+    def cleanup(self, channel=None):
+        if channel is None:
+            self.pins.clear()
+            self.mode = None
+            return
+        for pin in channel if isinstance(channel, (list, tuple)) else [channel]:
+            self.pins.pop(pin, None)
@@ -0,0 +1,24 @@
+# Waiting for MFRC522 interrupts on the IRQ pin instead of polling the interrupt registers
+
+
+class IrqPin:
+    def __init__(self, gpio, pin: int, slice: float = 0.005):
+        # gpio is the RPi.GPIO module or anything with the same interface
+        self.gpio = gpio
+        self.pin = pin
+        self.slice = slice
+
+        self.gpio.setup(self.pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+
+    def asserted(self) -> bool:
+        # IRqInv is set in CommIEn, so the pin is held low while an enabled request is pending
+        return self.gpio.input(self.pin) == self.gpio.LOW
+
+    def wait(self, timeout: float) -> bool:
+        # The level is checked first, an edge that happened before the wait started is not lost
+        if self.asserted():
+            return True
+        if timeout <= 0:
+            return False
+        edge = self.gpio.wait_for_edge(self.pin, self.gpio.FALLING, timeout=max(1, int(timeout * 1000)))
+        return edge is not None or self.asserted()
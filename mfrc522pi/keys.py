@@ -0,0 +1,133 @@
+# Key dictionary authentication: tries an ordered list of A/B keys per sector and remembers
+# which one opened it, per card (UID) and per card family
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.mifare import *
+from mfrc522pi.logger import logger
+from mfrc522pi.result import *
+from mfrc522pi.status import *
+from mfrc522pi.data import *
+from mfrc522pi.abi import *
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class SectorKey:
+    mode: int
+    key: list[int]
+
+
+@dataclass
+class KeyStats:
+    # Sectors opened, sectors no key opened and authentications tried for both
+    sectors: int = 0
+    failures: int = 0
+    attempts: int = 0
+    # Sectors opened on the first attempt with a key remembered for the card or its family
+    memo_hits: int = 0
+
+    def average_attempts(self) -> float:
+        total = self.sectors + self.failures
+        return self.attempts / total if total else 0.0
+
+
+class KeyRing:
+    def __init__(self, keys: list = None, max_cards: int = 4096):
+        # keys - ordered (mode, key) pairs, e.g. [(PICC.AUTHENT1A, SITE_KEY), (PICC.AUTHENT1B, SITE_KEY)].
+        # max_cards - UIDs whose keys are remembered, the least recently seen are forgotten first
+        if keys is None:
+            keys = [(PICC.AUTHENT1A, DEFAULT_KEY), (PICC.AUTHENT1B, DEFAULT_KEY)]
+        self.keys = [SectorKey(mode, list(key)) for mode, key in keys]
+        self.max_cards = max_cards
+        # uid -> {sector: SectorKey}
+        self.cards = OrderedDict()
+        # family -> {sector: SectorKey}, family is anything hashable the caller identifies a card type with
+        self.families = dict()
+        self.stats = KeyStats()
+
+    def candidates(self, uid: list[int], sector: int, family=None) -> list[SectorKey]:
+        # Remembered key of the card first, then the one of its family, then the dictionary order
+        known = [
+            self.cards.get(tuple(uid), {}).get(sector),
+            self.families.get(family, {}).get(sector) if family is not None else None,
+        ]
+        result = []
+        for candidate in known + self.keys:
+            if candidate is not None and candidate not in result:
+                result.append(candidate)
+        return result
+
+    def remember(self, uid: list[int], sector: int, sector_key: SectorKey, family=None):
+        card = self.cards.setdefault(tuple(uid), dict())
+        self.cards.move_to_end(tuple(uid))
+        card[sector] = sector_key
+        if family is not None:
+            self.families.setdefault(family, dict())[sector] = sector_key
+        while len(self.cards) > self.max_cards:
+            self.cards.popitem(last=False)
+
+    def forget(self, uid: list[int]):
+        self.cards.pop(tuple(uid), None)
+
+    def authenticate(self, reader: MFRC522, uid: list[int], block: int, family=None) -> Result[SectorKey]:
+        # The card has to be selected. A failed attempt drops it out of ACTIVE state, it is reselected
+        # before the next key is tried and after the last one failed
+        sector = sector_of(block)
+        remembered = self.cards.get(tuple(uid), {}).get(sector) or \
+            (self.families.get(family, {}).get(sector) if family is not None else None)
+        status = Status.ERROR
+
+        for attempt, candidate in enumerate(self.candidates(uid, sector, family)):
+            if attempt:
+                status = reader.reselect(uid)
+                if status != Status.OK:
+                    # Card left the field
+                    self.stats.failures += 1
+                    return Result(status, None)
+
+            self.stats.attempts += 1
+            status = reader.authenticate(candidate.mode, block, candidate.key, uid)
+            if status == Status.OK:
+                self.stats.sectors += 1
+                if attempt == 0 and candidate == remembered:
+                    self.stats.memo_hits += 1
+                self.remember(uid, sector, candidate, family)
+                return Result(Status.OK, candidate)
+
+        logger.error(f'KeyRing: no key for sector {sector}')
+        self.stats.failures += 1
+        reader.reselect(uid)
+        return Result(status, None)
+
+    def read_sectors(self, reader: MFRC522, uid: list[int], sectors=None, block_count: int = CLASSIC_1K_BLOCKS,
+                     family=None) -> Result[SectorsData]:
+        # reader.read_sectors with the key of every sector looked up in the ring
+        if sectors is None:
+            sectors = range(sector_count(block_count))
+
+        buffer = dict()
+        statuses = dict()
+        broken = False
+
+        for sector in sectors:
+            blocks = sector_blocks(sector)
+            status = reader.reselect(uid) if broken else Status.OK
+            broken = False
+
+            if status == Status.OK:
+                # A sector no key opens leaves the card reselected already
+                status = self.authenticate(reader, uid, blocks[0], family).status
+
+            if status == Status.OK:
+                for block in blocks:
+                    res = reader.read_block(block)
+                    if res.status != Status.OK:
+                        status = res.status
+                        broken = True
+                        break
+                    buffer[block] = res.data
+
+            statuses[sector] = status
+
+        failed = [status for status in statuses.values() if status != Status.OK]
+        return Result(failed[0] if failed else Status.OK, SectorsData(buffer, statuses))
@@ -20,17 +20,27 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: format.format(bold_red, reset, cyan, reset)
     }
 
+    def __init__(self):
+        super().__init__()
+        self.formatters = {level: logging.Formatter(fmt) for level, fmt in self.FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self.formatters.get(record.levelno)
+        if formatter is None:
+            formatter = self.formatters[logging.INFO]
         return formatter.format(record)
 
 
 logger = logging.getLogger('mfrc522pi')
 logger.setLevel(logging.INFO)
 
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
-ch.setFormatter(CustomFormatter())
 
-logger.addHandler(ch)
+def setup_logging(level: int = logging.INFO):
+    # Colored console output, added on the first MFRC522() instead of at import. Nothing is added when the
+    # application configured a handler for 'mfrc522pi' itself
+    if logger.handlers:
+        return
+    ch = logging.StreamHandler()
+    ch.setLevel(level)
+    ch.setFormatter(CustomFormatter())
+    logger.addHandler(ch)
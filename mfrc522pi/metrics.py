@@ -0,0 +1,238 @@
+# Operation metrics: SPI traffic, completion polling, timeouts, Status outcomes and latency histograms
+# per method, with a Prometheus text format exporter (file or local HTTP).
+# Nothing is wrapped until instrument() is called, readers without metrics run the plain code
+from mfrc522pi.transport import Transport, POLLED_REGISTERS
+from mfrc522pi.status import Status
+from mfrc522pi.abi import REG
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+import os
+
+
+# Methods with latency histograms, all of them also count Status outcomes
+TIMED_METHODS = ('request', 'anti_collision', 'select_tag', 'authenticate', 'read_block', 'write_block')
+COUNTED_METHODS = TIMED_METHODS + ('transceive', 'halt', 'read_blocks', 'read_sectors', 'write_blocks',
+                                   'write_blocks_diff', 'check_crc', 'activate', 'inventory', 'fast_read',
+                                   'increment', 'decrement', 'restore', 'transfer', 'apply_values')
+
+# Seconds, the last bucket is +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+
+# Register waited on -> wait label
+WAITS = {REG.CommIrq: 'transceive', REG.DivIrq: 'crc'}
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Per bucket, not cumulative, the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return result
+
+
+class MetricsTransport(Transport):
+    # Counts transfers, bytes and completion polls on their way to the wrapped transport
+    def __init__(self, transport: Transport, metrics: 'Metrics'):
+        self.transport = transport
+        self.metrics = metrics
+
+    def transfer(self, data: tuple) -> tuple:
+        metrics = self.metrics
+        metrics.transfers += 1
+        metrics.bytes += len(data)
+        if len(data) == 2 and data[0] & 0x80 and (data[0] >> 1) & 0x3F in POLLED_REGISTERS:
+            metrics.polls += 1
+        return self.transport.transfer(data)
+
+    def close(self):
+        self.transport.close()
+
+    def __getattr__(self, name: str):
+        # dev, speed etc. of the wrapped transport
+        if name == 'transport':
+            raise AttributeError(name)
+        return getattr(self.transport, name)
+
+
+class Metrics:
+    def __init__(self, labels: dict = None):
+        # labels - constant labels of every exported sample, e.g. {'reader': 'door'}
+        self.labels = labels or dict()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.transfers = 0
+        self.bytes = 0
+        self.polls = 0
+        # wait -> count
+        self.waits = {name: 0 for name in WAITS.values()}
+        self.timeouts = {name: 0 for name in WAITS.values()}
+        # Commands ended by the chip's timer (TimerIRq) instead of an answer, i.e. no card or no answer
+        self.timer_expiries = 0
+        # method -> {status name: count}
+        self.statuses = dict()
+        self.latency = {method: Histogram() for method in TIMED_METHODS}
+
+    def instrument(self, reader) -> 'Metrics':
+        # Wraps the reader's transport and methods, the wrappers are instance attributes shadowing the class ones
+        reader.transport = MetricsTransport(reader.transport, self)
+        reader.metrics = self
+
+        for method in COUNTED_METHODS:
+            setattr(reader, method, self.wrap(method, getattr(reader, method)))
+
+        wait_for_irq = reader.wait_for_irq
+
+        def wait(reg: int, mask: int, timeout: float):
+            n, timed_out = wait_for_irq(reg, mask, timeout)
+            name = WAITS.get(reg)
+            if name is not None:
+                with self.lock:
+                    self.waits[name] += 1
+                    if timed_out:
+                        self.timeouts[name] += 1
+                    elif reg == REG.CommIrq and n & 0x01 and not n & mask & ~0x01:
+                        self.timer_expiries += 1
+            return n, timed_out
+
+        reader.wait_for_irq = wait
+        return self
+
+    def wrap(self, method: str, function):
+        histogram = self.latency.get(method)
+        statuses = self.statuses.setdefault(method, dict())
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            status = result if isinstance(result, Status) else getattr(result, 'status', None)
+            with self.lock:
+                if status is not None:
+                    statuses[status.name] = statuses.get(status.name, 0) + 1
+                if histogram is not None:
+                    histogram.observe(elapsed)
+            return result
+
+        return wrapper
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                'labels': dict(self.labels),
+                'spi': {'transfers': self.transfers, 'bytes': self.bytes, 'polls': self.polls},
+                'waits': dict(self.waits),
+                'timeouts': dict(self.timeouts),
+                'timer_expiries': self.timer_expiries,
+                'statuses': {method: dict(counts) for method, counts in self.statuses.items() if counts},
+                'latency': {
+                    method: {'count': h.count, 'sum': h.sum, 'buckets': dict(h.cumulative())}
+                    for method, h in self.latency.items()
+                },
+            }
+
+    def samples(self):
+        # (metric, type, help, labels, value) of everything exported
+        snapshot = self.snapshot()
+        labels = snapshot['labels']
+        spi = snapshot['spi']
+        yield 'spi_transfers_total', 'counter', 'SPI transfers', labels, spi['transfers']
+        yield 'spi_bytes_total', 'counter', 'Bytes moved over SPI', labels, spi['bytes']
+        yield 'irq_polls_total', 'counter', 'Completion polls of CommIrq/DivIrq over SPI', labels, spi['polls']
+        for wait, count in snapshot['waits'].items():
+            yield 'waits_total', 'counter', 'Waits for command completion', {**labels, 'wait': wait}, count
+        for wait, count in snapshot['timeouts'].items():
+            yield 'timeouts_total', 'counter', 'Waits that timed out', {**labels, 'wait': wait}, count
+        yield 'timer_expiries_total', 'counter', 'Commands ended by the chip timer without an answer', labels, \
+            snapshot['timer_expiries']
+        for method, counts in snapshot['statuses'].items():
+            for status, count in counts.items():
+                yield 'operations_total', 'counter', 'Operations by Status outcome', \
+                    {**labels, 'method': method, 'status': status}, count
+        for method, h in snapshot['latency'].items():
+            for le, count in h['buckets'].items():
+                yield 'operation_seconds_bucket', 'histogram', 'Operation latency', \
+                    {**labels, 'method': method, 'le': le}, count
+            yield 'operation_seconds_sum', 'histogram', 'Operation latency', {**labels, 'method': method}, h['sum']
+            yield 'operation_seconds_count', 'histogram', 'Operation latency', {**labels, 'method': method}, h['count']
+
+    def prometheus(self, prefix: str = 'mfrc522pi') -> str:
+        return prometheus_text([self], prefix)
+
+
+def escape_label(value) -> str:
+    # Label values in the text format escape backslash, double quote and line feed
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(metrics: list[Metrics], prefix: str = 'mfrc522pi') -> str:
+    # Text exposition format of one or more readers, HELP/TYPE are written once per metric family
+    families = dict()
+    for m in metrics:
+        for name, kind, help_text, labels, value in m.samples():
+            family = name[:-len('_bucket')] if name.endswith('_bucket') else name
+            for suffix in ('_sum', '_count'):
+                if kind == 'histogram' and family.endswith(suffix):
+                    family = family[:-len(suffix)]
+            families.setdefault(family, (kind, help_text, []))[2].append((name, labels, value))
+
+    lines = []
+    for family, (kind, help_text, samples) in families.items():
+        lines.append(f'# HELP {prefix}_{family} {help_text}')
+        lines.append(f'# TYPE {prefix}_{family} {kind}')
+        for name, labels, value in samples:
+            label_text = ','.join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+            lines.append(f'{prefix}_{name}{{{label_text}}} {value}' if label_text else f'{prefix}_{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(filename: str, metrics: list[Metrics], prefix: str = 'mfrc522pi'):
+    # For node_exporter's textfile collector, replaced atomically so it never reads half a file
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(prometheus_text(metrics, prefix))
+    os.replace(tmp, filename)
+
+
+def serve_prometheus(metrics: list[Metrics], port: int = 9522, addr: str = '127.0.0.1',
+                     prefix: str = 'mfrc522pi') -> ThreadingHTTPServer:
+    # Serves /metrics from a daemon thread, server.shutdown() stops it
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = prometheus_text(metrics, prefix).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, name='mfrc522pi-metrics', daemon=True).start()
+    return server
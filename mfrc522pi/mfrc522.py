@@ -1,47 +1,121 @@
 #!/usr/bin/env python3
 # Main class that works with RC522 using SPI
 
-from mfrc522pi.logger import logger
+from mfrc522pi.transport import Transport, SpiTransport
+from mfrc522pi.shadow import RegisterShadow
+from mfrc522pi.irq import IrqPin
+from mfrc522pi.timing import TimeoutProfiles, PRESCALER, TICK
+from mfrc522pi.mifare import *
+from mfrc522pi.crc import *
+from mfrc522pi.logger import logger, setup_logging
 from mfrc522pi.result import *
 from mfrc522pi.status import *
 from mfrc522pi.data import *
 from mfrc522pi.abi import *
-import RPi.GPIO as GPIO
-import spi
+import time
 
 
 class MFRC522:
-    MAX_LEN = 16
-
-    def __init__(self, dev: str = '/dev/spidev0.0', speed: int = 1000000, reset: int = 22):
-        self.spi = spi.openSPI(device=dev, mode=0, speed=speed)
+    # FIFO size
+    MAX_LEN = 64
+
+    def __init__(self, dev: str = '/dev/spidev0.0', speed: int = 1000000, reset: int = 22, shadow: bool = False,
+                 irq: int = None, irq_timeout: float = 0.05, verify_crc: bool = False,
+                 transport: Transport = None, gpio=None, compact: bool = False, metrics=None,
+                 timeouts: TimeoutProfiles = None):
+        # transport and gpio replace the SPI device and RPi.GPIO, e.g. with the emulator.
+        # timeouts - chip timer per command type (mfrc522pi.timing), irq_timeout is the deadline of waits
+        # without one (CRC calculation)
+        setup_logging()
+        if gpio is None:
+            import RPi.GPIO as gpio
+
+        self.transport = transport if transport is not None else SpiTransport(dev, speed)
+        self.gpio = gpio
         self.reset_pin = reset
+        self.shadow = RegisterShadow() if shadow else None
+        self.irq_timeout = irq_timeout
+        self.timeouts = timeouts if timeouts is not None else TimeoutProfiles()
+        # CRC_A is computed on the host, verify_crc additionally asks the chip and compares
+        self.verify_crc = verify_crc
+        # Blocks are returned as bytes and read_blocks fills one CompactBlocks buffer instead of lists
+        self.compact = compact
+
+        self.gpio.setmode(self.gpio.BOARD)
+        self.gpio.setup(self.reset_pin, self.gpio.OUT)
+        self.gpio.output(self.reset_pin, 1)
 
-        GPIO.setmode(GPIO.BOARD)
-        GPIO.setup(self.reset_pin, GPIO.OUT)
-        GPIO.output(self.reset_pin, 1)
+        # Without an IRQ pin command completion is busy polled over SPI
+        self.irq = IrqPin(self.gpio, irq) if irq is not None else None
 
         self.init()
 
+        # mfrc522pi.metrics.Metrics, instruments this reader's transport and methods
+        self.metrics = None
+        if metrics is not None:
+            metrics.instrument(self)
+
     def write(self, addr: int, value: int):
-        spi.transfer(self.spi, ((addr << 1) & 0x7E, value))
+        self.transport.transfer(((addr << 1) & 0x7E, value))
+        if self.shadow is not None:
+            self.shadow.update(addr, value)
+
+    def write_burst(self, addr: int, values):
+        # All bytes after the address byte are written to the same register in one transaction
+        self.transport.transfer(((addr << 1) & 0x7E, *values))
+        if self.shadow is not None and len(values):
+            self.shadow.update(addr, values[-1])
+
+    def write_fifo(self, data):
+        if len(data):
+            self.write_burst(REG.FIFOData, data)
 
     def read(self, addr: int) -> int:
-        result = spi.transfer(self.spi, (((addr << 1) & 0x7E) | 0x80, 0))
+        result = self.transport.transfer((((addr << 1) & 0x7E) | 0x80, 0))
         return result[1]
 
+    def read_burst(self, addr: int, count: int) -> bytes:
+        # Every address byte clocks out the value requested by the previous one
+        request = (((addr << 1) & 0x7E) | 0x80,) * count
+        result = self.transport.transfer(request + (0,))
+        return bytes(result[1:])
+
+    def read_registers(self, *addrs: int) -> list[int]:
+        request = tuple(((addr << 1) & 0x7E) | 0x80 for addr in addrs)
+        result = self.transport.transfer(request + (0,))
+        return list(result[1:])
+
+    def read_fifo(self, count: int) -> bytes:
+        if count <= 0:
+            return bytes()
+        return self.read_burst(REG.FIFOData, count)
+
+    def read_shadowed(self, reg: int) -> int:
+        # Served from the shadow cache when enabled and the register is not volatile
+        if self.shadow is None:
+            return self.read(reg)
+        value = self.shadow.get(reg)
+        if value is None:
+            value = self.read(reg)
+            self.shadow.update(reg, value)
+        return value
+
+    def invalidate_shadow(self):
+        if self.shadow is not None:
+            self.shadow.invalidate()
+
     def set_bit_mask(self, reg: int, mask: int):
-        tmp = self.read(reg)
+        tmp = self.read_shadowed(reg)
         self.write(reg, tmp | mask)
 
     def clear_bit_mask(self, reg: int, mask: int):
-        tmp = self.read(reg)
+        tmp = self.read_shadowed(reg)
         self.write(reg, tmp & (~mask))
 
     def antenna_on(self):
-        tmp = self.read(REG.TxControl)
-        if ~(tmp & 0x03):
-            self.set_bit_mask(REG.TxControl, 0x03)
+        tmp = self.read_shadowed(REG.TxControl)
+        if tmp & 0x03 != 0x03:
+            self.write(REG.TxControl, tmp | 0x03)
 
     def antenna_off(self):
         self.clear_bit_mask(REG.TxControl, 0x03)
@@ -51,32 +125,112 @@ class MFRC522:
 
     def reset(self):
         self.write(REG.Command, PCD.RESETPHASE)
+        self.invalidate_shadow()
+        # TReload as last programmed
+        self.timer_reload = None
 
     def init(self):
-        GPIO.output(self.reset_pin, 1)
+        self.gpio.output(self.reset_pin, 1)
 
         self.reset()
 
-        self.write(REG.TMode, 0x8D)
-        self.write(REG.TPrescaler, 0x3E)
-        self.write(REG.TReloadL, 30)
-        self.write(REG.TReloadH, 0)
+        # TAuto: the timer starts at the end of transmission and stops when an answer arrives
+        self.write(REG.TMode, 0x80 | PRESCALER >> 8)
+        self.write(REG.TPrescaler, PRESCALER & 0xFF)
+        self.set_timer(self.timeouts.ticks('default'))
+
+        # HiAlert once 32 bytes are left free, time to drain long answers before the FIFO overflows
+        self.write(REG.WaterLevel, 0x20)
 
         self.write(REG.TxAuto, 0x40)
         self.write(REG.Mode, 0x3D)
 
         self.antenna_on()
 
-    def cleanup(self):
+    def set_speed(self, speed: int):
+        # SPI clock, see mfrc522pi.calibrate for finding the fastest reliable one
+        self.transport.set_speed(speed)
+
+    def self_test(self) -> Result[list[int]]:
+        # Digital self test (datasheet 16.1.1), returns the 64 bytes it leaves in the FIFO. OK when they match
+        # the reference of the chip version or no reference is known. The chip is reset and initialised again
+        self.reset()
+        self.write(REG.FIFOLevel, 0x80)
+        # Clears the internal 25 byte buffer
+        self.write_fifo([0x00] * 25)
+        self.write(REG.Command, PCD.MEM)
+        self.write(REG.AutoTest, 0x09)
+        self.write_fifo([0x00])
+        self.write(REG.Command, PCD.CALCCRC)
+
+        level = 0
+        for _ in range(0xFF):
+            level = self.read(REG.FIFOLevel)
+            if level >= 64:
+                break
+
+        self.write(REG.Command, PCD.IDLE)
+        result = list(self.read_fifo(min(level, self.MAX_LEN)))
+        self.write(REG.AutoTest, 0x00)
+        self.init()
+
+        reference = AUTOTEST_RESULTS.get(self.version())
+        if reference is not None and result != list(reference):
+            return Result(Status.DATA_CORRUPTED_ERROR, result)
+        return Result(Status.OK, result)
+
+    def pins(self) -> list[int]:
+        return [self.reset_pin] + ([self.irq.pin] if self.irq else [])
+
+    def cleanup(self, gpio: bool = True):
+        # Only this reader's pins are released, other readers on the same Pi keep working
         self.stop_crypto1()
-        spi.closeSPI(self.spi)
-        GPIO.cleanup()
+        self.transport.close()
+        if gpio:
+            self.gpio.cleanup(self.pins())
+
+    def set_timer(self, ticks: int):
+        # Only the TReload bytes that changed are written
+        if self.timer_reload is None or self.timer_reload >> 8 != ticks >> 8:
+            self.write(REG.TReloadH, ticks >> 8)
+        if self.timer_reload is None or self.timer_reload & 0xFF != ticks & 0xFF:
+            self.write(REG.TReloadL, ticks & 0xFF)
+        self.timer_reload = ticks
+
+    def wait_for_irq(self, reg: int, mask: int, timeout: float) -> tuple[int, bool]:
+        # Returns the last value of the interrupt request register and whether the wait timed out.
+        # The chip timer normally ends a command first, timeout only guards against a stuck chip
+        deadline = time.monotonic() + timeout
+        if self.irq is None:
+            while True:
+                n = self.read(reg)
+                if n & mask:
+                    return n, False
+                if time.monotonic() > deadline:
+                    return n, True
 
-    def transceive(self, command: int, data) -> Result[TransceiveResult]:
+        while True:
+            remaining = deadline - time.monotonic()
+            if self.irq.wait(min(remaining, self.irq.slice)) or remaining <= 0:
+                n = self.read(reg)
+                if n & mask:
+                    return n, False
+                if remaining <= 0:
+                    return n, True
+
+    def transceive(self, command: int, data, drain: bool = False,
+                   profile: str = 'default') -> Result[TransceiveResult]:
+        # drain - the answer may be longer than the FIFO, it is read out at HiAlert (FIFO filled up to
+        # WaterLevel free bytes) while it is still arriving.
+        # profile - timeout profile (mfrc522pi.timing) the chip timer is set to
         buffer = []
         buffer_size = 0
         status = Status.TRANSCEIVE_ERROR
 
+        if len(data) > self.MAX_LEN:
+            logger.error(f'transceive: {len(data)} byte frame does not fit the FIFO')
+            return Result(status, TransceiveResult(buffer, buffer_size))
+
         if command == PCD.AUTHENT:
             irq_enable = 0x12
             wait_irq = 0x10
@@ -87,48 +241,76 @@ class MFRC522:
             irq_enable = 0
             wait_irq = 0
 
-        self.write(REG.CommIEn, irq_enable | 0x80)
-        self.clear_bit_mask(REG.CommIrq, 0x80)
-        self.set_bit_mask(REG.FIFOLevel, 0x80)
+        # Completion is either the expected interrupt or the timer running out
+        done_irq = wait_irq | 0x01
+
+        alert_irq = 0x08 if drain else 0
+
+        timeouts = self.timeouts
+        ticks = timeouts.ticks(profile)
+        if ticks != self.timer_reload:
+            self.set_timer(ticks)
+        deadline = timeouts.deadline(profile, len(data), self.MAX_LEN)
+
+        # In IRQ mode only the completion interrupts (and HiAlert) may pull the pin low
+        self.write(REG.CommIEn, (done_irq if self.irq else irq_enable) | alert_irq | 0x80)
+        # Clear all interrupt request bits and flush the FIFO, neither needs the current value
+        self.write(REG.CommIrq, 0x7F)
+        self.write(REG.FIFOLevel, 0x80)
 
         self.write(REG.Command, PCD.IDLE)
 
-        for b in data:
-            self.write(REG.FIFOData, b)
+        self.write_fifo(data)
 
         self.write(REG.Command, command)
 
         if command == PCD.TRANSCEIVE:
             self.set_bit_mask(REG.BitFraming, 0x80)
 
-        i = 2000
         while True:
-            n = self.read(REG.CommIrq)
-            i -= 1
-            # FIXME: WTF
-            if ~((i != 0) and ~(n & 1) and ~(n & wait_irq)):
+            n, timed_out = self.wait_for_irq(REG.CommIrq, done_irq | alert_irq, deadline)
+            if timed_out or n & done_irq or not alert_irq:
                 break
+            buffer.extend(self.read_fifo(self.read(REG.FIFOLevel)))
+            self.write(REG.CommIrq, alert_irq)
 
         self.clear_bit_mask(REG.BitFraming, 0x80)
 
-        if i != 0 and (self.read(REG.Error) & 0x1B) == 0:
-            status = Status.OK
+        if self.irq:
+            self.write(REG.CommIEn, 0x80)
+
+        if not timed_out:
+            if timeouts.adaptive:
+                # The timer stopped when the answer started, what it counted down is the response time
+                error, level, control, counter_h, counter_l = self.read_registers(
+                    REG.Error, REG.FIFOLevel, REG.Control, REG.TCounterValueH, REG.TCounterValueL)
+                if n & wait_irq:
+                    timeouts.observe(profile, (ticks - (counter_h << 8 | counter_l)) * TICK)
+                else:
+                    timeouts.missed(profile)
+            else:
+                error, level, control = self.read_registers(REG.Error, REG.FIFOLevel, REG.Control)
+
+            # A bit collision (CollErr alone) still delivers the bits received up to it
+            if (error & 0x1B) in (0, 0x08):
+                status = Status.COLLISION_ERROR if error & 0x08 else Status.OK
 
-            # FIXME: WTF
-            if n & irq_enable & 1:
-                status = Status.NO_TAG_ERROR
+                # Timer ran out before anything answered
+                if n & 0x01 and not n & wait_irq:
+                    status = Status.NO_TAG_ERROR
 
-            if command == PCD.TRANSCEIVE:
-                n = self.read(REG.FIFOLevel)
-                last_bits = self.read(REG.Control) & 7
+                if command == PCD.TRANSCEIVE:
+                    n = level
+                    last_bits = control & 7
 
-                buffer_size = (n-1) * 8 + last_bits if last_bits != 0 else n * 8
+                    # Bytes drained at HiAlert come first
+                    n += len(buffer)
+                    buffer_size = (n-1) * 8 + last_bits if last_bits != 0 else n * 8
 
-                n = 1 if n == 0 else n
-                n = self.MAX_LEN if n > self.MAX_LEN else n
+                    n = 1 if n == 0 else level
+                    n = self.MAX_LEN if n > self.MAX_LEN else n
 
-                for _ in range(n):
-                    buffer.append(self.read(REG.FIFOData))
+                    buffer.extend(self.read_fifo(n))
 
         return Result(status, TransceiveResult(buffer, buffer_size))
 
@@ -137,76 +319,224 @@ class MFRC522:
 
         self.write(REG.BitFraming, 7)
 
-        res = self.transceive(PCD.TRANSCEIVE, tag_type)
+        res = self.transceive(PCD.TRANSCEIVE, tag_type, profile='request')
+
+        # Cards of different types answer with different ATQAs at the same time, still an answer
+        if res.status == Status.COLLISION_ERROR:
+            res.status = Status.OK
 
         if res.size != 0x10:
            res.status = Status.REQUEST_BAD_SIZE_ERROR
 
-        return Result(res.status, RequestResult(res.size))
+        return Result(res.status, RequestResult(res.size, res.data[:2]))
 
-    def anti_collision(self) -> Result[AntiCollisionResult]:
-        self.write(REG.BitFraming, 0)
+    def anti_collision(self, level: int = 0) -> Result[AntiCollisionResult]:
+        # Bit oriented anticollision of one cascade level, returns its 4 UID bytes (or the cascade tag and 3)
+        # and the BCC. On a collision the bits before it are kept, a 1 is taken for the colliding bit and the
+        # longer prefix is sent again, only the cards sharing it answer. The first round is the plain
+        # SEL + NVB 0x20 frame, a single card costs nothing extra
+        serial = [0] * 5
+        known = 0
 
-        serial = [PICC.ANTICOLL, 0x20]
+        while True:
+            count, bits = divmod(known, 8)
+            # The answer continues the partly sent byte: RxAlign = TxLastBits
+            self.write(REG.BitFraming, (bits << 4) | bits)
 
-        res = self.transceive(PCD.TRANSCEIVE, serial)
+            buffer = [SEL_CODES[level], ((2 + count) << 4) | bits]
+            buffer.extend(serial[:count + (1 if bits else 0)])
 
-        if res.status == Status.OK:
-            if len(res.data) == 5:
-                serial_check = 0
-                for x in res.data[:4]:
-                    serial_check ^= x
-                if serial_check != res.data[4]:
-                    res.status = Status.BAD_CRC_ERROR
-            else:
+            res = self.transceive(PCD.TRANSCEIVE, buffer, profile='anticollision')
+
+            if res.status not in (Status.OK, Status.COLLISION_ERROR):
+                return Result(res.status, AntiCollisionResult(res.data))
+
+            if count + len(res.data) != 5:
                 res.status = Status.ANTI_COLLISION_BAD_UID_SIZE_ERROR
+                return Result(res.status, AntiCollisionResult(res.data))
+
+            for i, value in enumerate(res.data):
+                if i == 0 and bits:
+                    value = serial[count] & ((1 << bits) - 1) | value & (0xFF << bits) & 0xFF
+                serial[count + i] = value
+
+            if res.status == Status.OK:
+                break
 
-        return Result(res.status, AntiCollisionResult(res.data))
+            # CollPos counts from the first bit of the first received byte, 0 stands for 32
+            coll = self.read(REG.Coll)
+            position = count * 8 + ((coll & 0x1F) or 32)
+            if coll & 0x20 or position <= known or position > 32:
+                logger.error(f'anti_collision: unresolvable collision, Coll={coll:#04x}')
+                return Result(Status.COLLISION_ERROR, AntiCollisionResult(serial))
+
+            serial[(position - 1) // 8] |= 1 << ((position - 1) % 8)
+            known = position
+
+        if bcc(serial[:4]) != serial[4]:
+            return Result(Status.BAD_CRC_ERROR, AntiCollisionResult(serial))
+
+        return Result(Status.OK, AntiCollisionResult(serial))
+
+    def detect(self, retry: bool = False) -> list[int]:
+        # REQA + anticollision and SELECT on all cascade levels, returns the full 4, 7 or 10 byte UID or None.
+        # The card is left ACTIVE. A card that answered the previous poll sits in ACTIVE and ignores the
+        # next REQA, which drops it back to IDLE, retry asks once more
+        res = self.activate()
+        if res.status != Status.OK and retry:
+            res = self.activate()
+        return res.value.uid if res.status == Status.OK else None
 
     def calculate_crc(self, data: list[int]):
-        self.clear_bit_mask(REG.DivIrq, 4)
-        self.set_bit_mask(REG.FIFOLevel, 0x80)
+        # Writing CRCIRq with Set2 cleared clears it
+        self.write(REG.DivIrq, 0x04)
+        self.write(REG.FIFOLevel, 0x80)
+
+        self.write_fifo(data)
 
-        for b in data:
-            self.write(REG.FIFOData, b)
+        if self.irq:
+            self.write(REG.DivlEn, 0x04)
 
         self.write(REG.Command, PCD.CALCCRC)
 
-        i = 0xFF
-        while True:
-            n = self.read(REG.DivIrq)
-            i -= 1
-            if not (i and not (n & 4)):
-                break
+        self.wait_for_irq(REG.DivIrq, 0x04, self.irq_timeout)
+
+        if self.irq:
+            self.write(REG.DivlEn, 0x00)
 
         return [
             self.read(REG.CRCResultL),
             self.read(REG.CRCResultM)
         ]
 
-    def select_tag(self, serial: list[int]) -> Result[SelectTagResult]:
-        buffer = [PICC.SElECTTAG, 0x70]
+    def crc(self, data) -> list[int]:
+        result = crc_a(data)
+        if self.verify_crc:
+            chip_result = self.calculate_crc(data)
+            if chip_result != result:
+                logger.error(f'crc: host {result} != chip {chip_result} for {list(data)}')
+                return chip_result
+        return result
+
+    def check_crc(self, frames: list[list[int]] = None) -> Status:
+        mismatches = 0
+        for frame in frames if frames is not None else crc_corpus():
+            if self.calculate_crc(frame) != crc_a(frame):
+                logger.error(f'check_crc: mismatch for {frame}')
+                mismatches += 1
+        return Status.OK if mismatches == 0 else Status.BAD_CRC_ERROR
+
+    def select_tag(self, serial: list[int], level: int = 0) -> Result[SelectTagResult]:
+        # Full bytes, request() leaves 7 bit framing behind when anti_collision is skipped
+        self.write(REG.BitFraming, 0)
 
-        for i in range(5):
+        buffer = [SEL_CODES[level], 0x70]
+
+        for i in range(4):
             buffer.append(serial[i])
+        buffer.append(bcc(serial[:4]))
 
-        buffer.extend(self.calculate_crc(buffer))
+        buffer.extend(self.crc(buffer))
 
-        res = self.transceive(PCD.TRANSCEIVE, buffer)
+        res = self.transceive(PCD.TRANSCEIVE, buffer, profile='select')
 
         if res.status == Status.OK and res.size != 0x18:
             res.status = Status.SELECT_TAG_BAD_SIZE_ERROR
-        else:
+        elif res.status == Status.OK:
             logger.debug(f'select_tag: size={res.data[0]}')
 
-        return Result(res.status, SelectTagResult(res.data[0]))
+        return Result(res.status, SelectTagResult(res.data[0] if res.data else None))
+
+    def select_uid(self, uid: list[int]) -> Result[SelectTagResult]:
+        # SELECT of a known 4, 7 or 10 byte UID through its cascade levels, no anticollision needed
+        for level, part in enumerate(cascade_levels(uid)):
+            res = self.select_tag(part, level)
+            if res.status != Status.OK:
+                break
+        return res
+
+    def select_card(self, atqa: list[int] = None) -> Result[CardSelection]:
+        # After request(): anticollision and SELECT on cascade levels 1-3 until the SAK says the UID is complete.
+        # With several cards in the field one of them ends up ACTIVE, the others stay READY
+        uid = []
+        for level in range(len(SEL_CODES)):
+            res = self.anti_collision(level)
+            if res.status != Status.OK:
+                return Result(res.status, CardSelection(uid, None, atqa))
+
+            selected = self.select_tag(res.uid, level)
+            if selected.status != Status.OK:
+                return Result(selected.status, CardSelection(uid, None, atqa))
+
+            if not selected.tag_type & SAK_CASCADE:
+                uid.extend(res.uid[:4])
+                return Result(Status.OK, CardSelection(uid, selected.tag_type, atqa))
+
+            if res.uid[0] != CASCADE_TAG:
+                break
+            uid.extend(res.uid[1:4])
+
+        logger.error(f'select_card: UID incomplete after {level + 1} cascade levels')
+        return Result(Status.ANTI_COLLISION_BAD_UID_SIZE_ERROR, CardSelection(uid, None, atqa))
+
+    def activate(self, reg_mode: int = PICC.REQIDL) -> Result[CardSelection]:
+        res = self.request(reg_mode)
+        if res.status != Status.OK:
+            return Result(res.status, CardSelection([], None, None))
+        return self.select_card(res.atqa)
+
+    def inventory(self, max_cards: int = 16, handler=None, reset_field: bool = False) -> Result[list[CardSelection]]:
+        # Every card in the field: select one, call handler(reader, card) while it is ACTIVE, HALT it and
+        # repeat until REQA stays unanswered. Halted cards ignore REQA until they leave the field, and a WUPA
+        # would wake the ones already counted too. reset_field switches the field off for 5 ms first, which
+        # brings cards halted before (e.g. by the previous inventory) back to IDLE
+        if reset_field:
+            self.antenna_off()
+            time.sleep(0.005)
+            self.antenna_on()
+
+        cards = []
+        # A REQA right after a failed selection only drops the READY cards back to IDLE, so one
+        # unanswered REQA doesn't mean the field is empty
+        silent = 0
+        failures = 0
+        status = Status.OK
+
+        while len(cards) < max_cards:
+            res = self.request(PICC.REQIDL)
+            if res.status != Status.OK:
+                silent += 1
+                if silent == 2:
+                    break
+                continue
+            silent = 0
+
+            card = self.select_card(res.atqa)
+            if card.status != Status.OK:
+                failures += 1
+                if failures == 3:
+                    logger.error(f'inventory: giving up after {failures} failed selections')
+                    status = card.status
+                    break
+                continue
+            failures = 0
+
+            cards.append(card.value)
+            if handler is not None:
+                handler(self, card.value)
+            # Sent enciphered if the handler authenticated, a card that was read stays halted too
+            self.halt()
+            self.stop_crypto1()
+
+        return Result(status, cards)
 
     def authenticate(self, mode: int, addr: int, key: list[int], serial: list[int]) -> Status:
         buffer = [mode, addr]
         buffer.extend(key)
-        buffer.extend(serial[:4])
+        # Crypto1 takes the last 4 bytes of a 7 or 10 byte UID
+        buffer.extend(serial[:4] if len(serial) <= 5 else serial[-4:])
 
-        res = self.transceive(PCD.AUTHENT, buffer)
+        res = self.transceive(PCD.AUTHENT, buffer, profile='auth')
 
         if res.status != Status.OK:
             logger.error(f'authenticate: error {res.status.name}')
@@ -217,28 +547,62 @@ class MFRC522:
 
         return res.status
 
+    def halt(self) -> Status:
+        # A halted card only answers WUPA (REQALL) until it leaves the field
+        self.write(REG.BitFraming, 0)
+        res = self.transceive(PCD.TRANSCEIVE, HALT_FRAME, profile='halt')
+        # HALT is never answered, anything that comes back is a NAK
+        return Status.OK if res.status == Status.NO_TAG_ERROR else Status.ERROR
+
     def stop_crypto1(self):
         self.clear_bit_mask(REG.Status2, 8)
 
     def read_block(self, addr: int) -> Result[BlockData]:
-        data = [PICC.READ, addr]
-        data.extend(self.calculate_crc(data))
-        res = self.transceive(PCD.TRANSCEIVE, data)
+        if self.verify_crc:
+            data = [PICC.READ, addr]
+            data.extend(self.crc(data))
+        else:
+            data = READ_FRAMES[addr]
+        res = self.transceive(PCD.TRANSCEIVE, data, profile='read')
+        if res.status == Status.OK and res.size != (BLOCK_SIZE + 2) * 8:
+            # 4 bit NAK instead of 16 bytes of data and CRC
+            res.status = Status.READ_BLOCK_BAD_SIZE_ERROR
+        elif res.status == Status.OK and crc_a(res.data[:BLOCK_SIZE]) != res.data[BLOCK_SIZE:]:
+            res.status = Status.BAD_CRC_ERROR
+        block = res.data[:BLOCK_SIZE]
         if res.status != Status.OK:
             logger.error('read_block: read error')
         else:
-            if len(res.data) == 16:
-                logger.debug(f'Sector {addr}: {res.data}')
-        return Result(res.status, BlockData(addr, res.data))
+            logger.debug(f'Sector {addr}: {block}')
+        return Result(res.status, BlockData(addr, bytes(block) if self.compact else block))
+
+    def fast_read(self, start: int, end: int) -> Result[PagesData]:
+        # Ultralight EV1/NTAG FAST_READ of pages start..end in one exchange, answers longer than the FIFO
+        # are drained while they arrive
+        data = [PICC.FAST_READ, start, end]
+        data.extend(self.crc(data))
+        size = (end - start + 1) * PAGE_SIZE
+        res = self.transceive(PCD.TRANSCEIVE, data, drain=size + 2 > self.MAX_LEN, profile='read')
+        if res.status == Status.OK and res.size != (size + 2) * 8:
+            res.status = Status.READ_BLOCK_BAD_SIZE_ERROR
+        elif res.status == Status.OK and crc_a(res.data[:size]) != res.data[size:]:
+            res.status = Status.BAD_CRC_ERROR
+        pages = res.data[:size]
+        if res.status != Status.OK:
+            logger.error(f'fast_read: pages {start}-{end}: error {res.status.name}')
+        return Result(res.status, PagesData(start, bytes(pages) if self.compact else pages))
 
     def write_block(self, addr: int, data: list[int]) -> Status:
         if len(data) != 16:
             logger.error('write_block: len(data) != 16')
             return Status.WRITE_BLOCK_BAD_SIZE_ERROR
 
-        buffer = [PICC.WRITE, addr]
-        buffer.extend(self.calculate_crc(buffer))
-        res = self.transceive(PCD.TRANSCEIVE, buffer)
+        if self.verify_crc:
+            buffer = [PICC.WRITE, addr]
+            buffer.extend(self.crc(buffer))
+        else:
+            buffer = WRITE_FRAMES[addr]
+        res = self.transceive(PCD.TRANSCEIVE, buffer, profile='write')
 
         if res.status != Status.OK:
             return res.status
@@ -248,9 +612,9 @@ class MFRC522:
         
         buffer = []
         buffer.extend(data)
-        buffer.extend(self.calculate_crc(buffer))
+        buffer.extend(self.crc(buffer))
         
-        res = self.transceive(PCD.TRANSCEIVE, buffer)
+        res = self.transceive(PCD.TRANSCEIVE, buffer, profile='write_data')
 
         if res.status != Status.OK:
             return res.status
@@ -260,19 +624,180 @@ class MFRC522:
         
         return Status.OK
 
-    def read_blocks(self, key: list[int], uid: list[int], block_count: int) -> Result[BlocksData]:
-        buffer = dict()
+    def send_command(self, buffer: list[int], profile: str = 'write') -> Status:
+        # Frame (CRC appended here) answered by a 4 bit ACK/NAK
+        buffer = list(buffer)
+        buffer.extend(self.crc(buffer))
+        res = self.transceive(PCD.TRANSCEIVE, buffer, profile=profile)
+        if res.status != Status.OK:
+            return res.status
+        if res.size != 4 or res.data[0] & 0xF != 0xA:
+            return Status.WRITE_BLOCK_BAD_DATA_ERROR
+        return Status.OK
+
+    def value_command(self, command: int, addr: int, operand: int) -> Status:
+        # INCREMENT/DECREMENT/RESTORE: the command is ACKed, the 4 byte operand only answered with a NAK.
+        # The result stays in the card's transfer buffer until transfer() writes it to a block
+        status = self.send_command([command, addr], 'command')
+        if status != Status.OK:
+            return status
+
+        buffer = list((operand & 0xFFFFFFFF).to_bytes(4, 'little'))
+        buffer.extend(self.crc(buffer))
+        res = self.transceive(PCD.TRANSCEIVE, buffer, profile='value')
+
+        # Silence until the timer runs out is success
+        if res.status == Status.NO_TAG_ERROR:
+            return Status.OK
+        if res.status == Status.OK:
+            logger.error(f'value_command: {command:#04x} on block {addr} NAKed')
+            return Status.WRITE_BLOCK_BAD_DATA_ERROR
+        return res.status
+
+    def increment(self, addr: int, delta: int) -> Status:
+        return self.value_command(PICC.INCREMENT, addr, delta)
+
+    def decrement(self, addr: int, delta: int) -> Status:
+        return self.value_command(PICC.DECREMENT, addr, delta)
+
+    def restore(self, addr: int) -> Status:
+        # Loads the value of the block unchanged, transfer() then copies it (e.g. to a backup block)
+        return self.value_command(PICC.RESTORE, addr, 0)
+
+    def transfer(self, addr: int) -> Status:
+        return self.send_command([PICC.TRANSFER, addr], 'write_data')
+
+    def read_value(self, addr: int) -> Result[int]:
+        res = self.read_block(addr)
+        if res.status != Status.OK:
+            return Result(res.status, None)
+        value = parse_value_block(res.data)
+        if value is None:
+            return Result(Status.DATA_CORRUPTED_ERROR, None)
+        return Result(Status.OK, value[0])
+
+    def write_value(self, addr: int, value: int) -> Status:
+        # Formats the block as a value block, its own address as the address byte
+        return self.write_block(addr, value_block(value, addr))
+
+    def apply_values(self, key: list[int], uid: list[int], operations, backups: dict[int, int] = None,
+                     mode: int = PICC.AUTHENT1A) -> Result[WriteReport]:
+        # operations - (block, delta) pairs, several per block are summed up. Every sector is authenticated
+        # once and every block gets one INCREMENT/DECREMENT and one TRANSFER, the TRANSFER commits it.
+        # backups - block -> backup block in the same sector, it receives the new value by RESTORE + TRANSFER
+        deltas = dict()
+        for block, delta in operations:
+            deltas[block] = deltas.get(block, 0) + delta
+
+        by_sector = dict()
+        for block in sorted(deltas):
+            by_sector.setdefault(sector_of(block), []).append(block)
+
+        backups = backups or dict()
+        report = dict()
+        status = Status.OK
+        broken = False
+
+        for sector, sector_block_ids in by_sector.items():
+            todo = []
+            for block in sector_block_ids:
+                if deltas[block] == 0:
+                    report[block] = WriteOutcome.SKIPPED
+                else:
+                    todo.append(block)
+            if not todo:
+                continue
+
+            sector_status = self.reselect(uid) if broken else Status.OK
+            if sector_status == Status.OK:
+                sector_status = self.authenticate(mode, todo[0], key, uid)
+
+            for block in todo:
+                if sector_status == Status.OK:
+                    delta = deltas[block]
+                    sector_status = self.increment(block, delta) if delta > 0 else self.decrement(block, -delta)
+                if sector_status == Status.OK:
+                    sector_status = self.transfer(block)
+                report[block] = WriteOutcome.WRITTEN if sector_status == Status.OK else WriteOutcome.FAILED
+
+                backup = backups.get(block)
+                if sector_status == Status.OK and backup is not None:
+                    sector_status = self.restore(block)
+                    if sector_status == Status.OK:
+                        sector_status = self.transfer(backup)
+                    report[backup] = WriteOutcome.WRITTEN if sector_status == Status.OK else WriteOutcome.FAILED
+
+            if sector_status != Status.OK and status == Status.OK:
+                status = sector_status
+            broken = sector_status != Status.OK
+
+        return Result(status, WriteReport(dict(sorted(report.items()))))
+
+    def read_blocks(self, key: list[int], uid: list[int], block_count: int,
+                    mode: int = PICC.AUTHENT1A) -> Result[BlocksData]:
+        # One authentication opens the whole sector, so only the first block of each is authenticated
+        result = CompactBlocks(block_count) if self.compact else BlocksData(dict())
+        sector = None
         for i in range(block_count):
-            status = self.authenticate(PICC.AUTHENT1A, i, key, uid)
-            if status == Status.OK:
-                block = self.read_block(i)
-                if block.status != Status.OK:
-                    return Result(block.status, BlocksData(buffer))
-                buffer[i] = block.data
+            if sector_of(i) != sector:
+                sector = sector_of(i)
+                status = self.authenticate(mode, i, key, uid)
+                if status != Status.OK:
+                    return Result(status, result)
+            block = self.read_block(i)
+            if block.status != Status.OK:
+                return Result(block.status, result)
+            if self.compact:
+                result.set(i, block.data)
             else:
-                return Result(status, BlocksData(buffer))
+                result.data[i] = block.data
+
+        return Result(Status.OK, result)
+
+    def reselect(self, serial: list[int]) -> Status:
+        # A failed authentication or a NAK sends the card back to IDLE/HALT, WUPA + SELECT makes it ACTIVE again
+        self.stop_crypto1()
+        res = self.request(PICC.REQALL)
+        if res.status != Status.OK:
+            return res.status
+        return self.select_uid(serial).status
 
-        return Result(Status.OK, BlocksData(buffer))
+    def read_sectors(self, key: list[int], uid: list[int], sectors=None, blocks=None,
+                     block_count: int = CLASSIC_1K_BLOCKS, mode: int = PICC.AUTHENT1A) -> Result[SectorsData]:
+        # Reads the given blocks, or all blocks of the given sectors (default every sector of block_count blocks).
+        # Every sector is authenticated once, a failing sector doesn't stop the others
+        if blocks is None:
+            if sectors is None:
+                sectors = range(sector_count(block_count))
+            blocks = [block for sector in sectors for block in sector_blocks(sector)]
+
+        by_sector = dict()
+        for block in blocks:
+            by_sector.setdefault(sector_of(block), []).append(block)
+
+        buffer = dict()
+        statuses = dict()
+        broken = False
+
+        for sector, sector_block_ids in by_sector.items():
+            status = self.reselect(uid) if broken else Status.OK
+
+            if status == Status.OK:
+                status = self.authenticate(mode, sector_block_ids[0], key, uid)
+
+            if status == Status.OK:
+                for block in sector_block_ids:
+                    res = self.read_block(block)
+                    if res.status != Status.OK:
+                        status = res.status
+                        break
+                    buffer[block] = res.data
+
+            statuses[sector] = status
+            broken = status != Status.OK
+
+        failed = [status for status in statuses.values() if status != Status.OK]
+        return Result(failed[0] if failed else Status.OK, SectorsData(buffer, statuses))
 
     def write_blocks(self, data: BlocksData) -> Status:
         for block_id, block_data in data.data.items():
@@ -280,3 +805,50 @@ class MFRC522:
             if status != Status.OK:
                 return status
         return Status.OK
+
+    def write_blocks_diff(self, key: list[int], uid: list[int], data: BlocksData, skip_trailers: bool = True,
+                          mode: int = PICC.AUTHENT1A) -> Result[WriteReport]:
+        # Authenticates every sector once, reads the target blocks and writes only the ones that differ.
+        # Block 0 is never written, trailers only with skip_trailers=False (they are written last in their sector)
+        by_sector = dict()
+        for block in sorted(data.data):
+            by_sector.setdefault(sector_of(block), []).append(block)
+
+        report = dict()
+        status = Status.OK
+        broken = False
+
+        for sector, sector_block_ids in by_sector.items():
+            todo = []
+            for block in sector_block_ids:
+                if block == 0 or (skip_trailers and is_trailer(block)):
+                    report[block] = WriteOutcome.SKIPPED
+                else:
+                    todo.append(block)
+            if not todo:
+                continue
+
+            sector_status = self.reselect(uid) if broken else Status.OK
+            if sector_status == Status.OK:
+                sector_status = self.authenticate(mode, todo[0], key, uid)
+
+            for block in todo:
+                if sector_status != Status.OK:
+                    report[block] = WriteOutcome.FAILED
+                    continue
+
+                res = self.read_block(block)
+                sector_status = res.status
+                if sector_status == Status.OK and list(res.data) == list(data.data[block]):
+                    report[block] = WriteOutcome.SKIPPED
+                    continue
+
+                if sector_status == Status.OK:
+                    sector_status = self.write_block(block, data.data[block])
+                report[block] = WriteOutcome.WRITTEN if sector_status == Status.OK else WriteOutcome.FAILED
+
+            if sector_status != Status.OK and status == Status.OK:
+                status = sector_status
+            broken = sector_status != Status.OK
+
+        return Result(status, WriteReport(dict(sorted(report.items()))))
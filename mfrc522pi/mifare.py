@@ -0,0 +1,125 @@
+# MIFARE Classic memory layout: sectors, trailers, access bits and value blocks, ISO14443-3 cascade levels,
+# Ultralight/NTAG pages
+
+CLASSIC_MINI_BLOCKS = 20
+CLASSIC_1K_BLOCKS = 64
+CLASSIC_4K_BLOCKS = 256
+
+BLOCK_SIZE = 16
+PAGE_SIZE = 4
+
+DEFAULT_KEY = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
+DEFAULT_ACCESS_BITS = [0xFF, 0x07, 0x80, 0x69]
+
+# Anticollision/SELECT command of cascade level 1, 2 and 3
+SEL_CODES = (0x93, 0x95, 0x97)
+# Stands in for the first UID byte of a level when the UID continues on the next one
+CASCADE_TAG = 0x88
+# SAK bit set while the UID is incomplete
+SAK_CASCADE = 0x04
+
+
+def sector_of(block: int) -> int:
+    if block < 128:
+        return block // 4
+    return 32 + (block - 128) // 16
+
+
+def sector_first_block(sector: int) -> int:
+    if sector < 32:
+        return sector * 4
+    return 128 + (sector - 32) * 16
+
+
+def sector_size(sector: int) -> int:
+    return 4 if sector < 32 else 16
+
+
+def sector_blocks(sector: int) -> range:
+    first = sector_first_block(sector)
+    return range(first, first + sector_size(sector))
+
+
+def sector_trailer(sector: int) -> int:
+    return sector_first_block(sector) + sector_size(sector) - 1
+
+
+def is_trailer(block: int) -> bool:
+    return block == sector_trailer(sector_of(block))
+
+
+def sector_count(block_count: int) -> int:
+    return sector_of(block_count - 1) + 1 if block_count > 0 else 0
+
+
+def access_group(block: int) -> int:
+    # Index of the access condition group (0-2 data, 3 trailer) that covers the block
+    sector = sector_of(block)
+    offset = block - sector_first_block(sector)
+    if block == sector_trailer(sector):
+        return 3
+    return offset if sector_size(sector) == 4 else offset // 5
+
+
+def decode_access_bits(trailer) -> list[tuple[int, int, int]]:
+    # Returns (C1, C2, C3) for each of the 4 groups, None if the inverted copies don't match
+    b6, b7, b8 = trailer[6], trailer[7], trailer[8]
+    c1, c2, c3 = b7 >> 4, b8 & 0xF, b8 >> 4
+    if (~b6 & 0xF) != c1 or (~b6 >> 4 & 0xF) != c2 or (~b7 & 0xF) != c3:
+        return None
+    return [((c1 >> i) & 1, (c2 >> i) & 1, (c3 >> i) & 1) for i in range(4)]
+
+
+def encode_access_bits(groups: list[tuple[int, int, int]], user_byte: int = 0x69) -> list[int]:
+    c1 = sum(g[0] << i for i, g in enumerate(groups))
+    c2 = sum(g[1] << i for i, g in enumerate(groups))
+    c3 = sum(g[2] << i for i, g in enumerate(groups))
+    return [
+        (~c2 & 0xF) << 4 | (~c1 & 0xF),
+        c1 << 4 | (~c3 & 0xF),
+        c3 << 4 | c2,
+        user_byte
+    ]
+
+
+def default_trailer() -> list[int]:
+    return DEFAULT_KEY + DEFAULT_ACCESS_BITS + DEFAULT_KEY
+
+
+def value_block(value: int, addr: int = 0) -> list[int]:
+    # 32 bit signed value (little endian), inverted and again, then the address byte (free for backup
+    # management) plain, inverted, plain, inverted
+    raw = list((value & 0xFFFFFFFF).to_bytes(4, 'little'))
+    inverted = [~x & 0xFF for x in raw]
+    addr &= 0xFF
+    return raw + inverted + raw + [addr, ~addr & 0xFF, addr, ~addr & 0xFF]
+
+
+def parse_value_block(data) -> tuple[int, int]:
+    # Returns (value, address byte), None if the block is not in value block format
+    data = list(data)
+    if len(data) != BLOCK_SIZE or data[:4] != data[8:12] or data[12] != data[14] or data[13] != data[15]:
+        return None
+    if any(a ^ b != 0xFF for a, b in zip(data[:4], data[4:8])) or data[12] ^ data[13] != 0xFF:
+        return None
+    return int.from_bytes(bytes(data[:4]), 'little', signed=True), data[12]
+
+
+def bcc(data) -> int:
+    result = 0
+    for x in data:
+        result ^= x
+    return result
+
+
+def cascade_levels(uid) -> list[list[int]]:
+    # 5 bytes per cascade level: 4 UID bytes, or the cascade tag and 3 of them, followed by the BCC.
+    # A serial returned by anti_collision() (4 bytes and BCC) is a single size UID
+    uid = list(uid)
+    if len(uid) <= 5:
+        parts = [uid[:4]]
+    elif len(uid) == 7:
+        parts = [[CASCADE_TAG] + uid[:3], uid[3:]]
+    else:
+        parts = [[CASCADE_TAG] + uid[:3], [CASCADE_TAG] + uid[3:6], uid[6:10]]
+    return [part + [bcc(part)] for part in parts]
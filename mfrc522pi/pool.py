@@ -0,0 +1,105 @@
+# Several MFRC522 modules on one Pi, polled concurrently with a thread per SPI bus
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.data import CardEvent
+import threading
+import queue
+import time
+import re
+
+
+def spi_bus(dev: str) -> str:
+    # '/dev/spidev1.0' -> '1', readers on one bus share its lock and polling thread
+    match = re.search(r'spidev(\d+)\.\d+', dev or '')
+    return match.group(1) if match else None
+
+
+class ReaderPool:
+    def __init__(self, gpio=None, idle_interval: float = 0.05):
+        if gpio is None:
+            import RPi.GPIO as gpio
+
+        self.gpio = gpio
+        self.idle_interval = idle_interval
+        self.readers = dict()
+        self.buses = dict()
+        self.locks = dict()
+        self.events = queue.Queue()
+        self.threads = []
+        self.running = threading.Event()
+        # GPIO setup of the readers goes through one lock, RPi.GPIO mode and pin state are process wide
+        self.gpio_lock = threading.Lock()
+
+    def add(self, reader_id: str, reader: MFRC522 = None, bus: str = None, **reader_args) -> MFRC522:
+        if self.running.is_set():
+            raise RuntimeError('Readers can only be added to a stopped pool')
+
+        if reader is None:
+            with self.gpio_lock:
+                reader = MFRC522(gpio=self.gpio, **reader_args)
+
+        if bus is None:
+            bus = spi_bus(reader_args.get('dev', getattr(reader.transport, 'dev', None)))
+        if bus is None:
+            bus = reader_id
+
+        self.readers[reader_id] = reader
+        self.buses.setdefault(bus, []).append(reader_id)
+        self.locks.setdefault(bus, threading.Lock())
+        return reader
+
+    def lock(self, reader_id: str) -> threading.Lock:
+        # Hold it to talk to a reader from outside the pool while it is polling
+        for bus, reader_ids in self.buses.items():
+            if reader_id in reader_ids:
+                return self.locks[bus]
+        raise KeyError(reader_id)
+
+    def start(self):
+        self.running.set()
+        for bus in self.buses:
+            thread = threading.Thread(target=self.poll_bus, args=(bus,), name=f'mfrc522pi-bus{bus}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.running.clear()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def poll_bus(self, bus: str):
+        lock = self.locks[bus]
+        present = {reader_id: None for reader_id in self.buses[bus]}
+
+        while self.running.is_set():
+            for reader_id in self.buses[bus]:
+                with lock:
+                    uid = self.readers[reader_id].detect(present[reader_id] is not None)
+                if uid is not None and uid != present[reader_id]:
+                    self.events.put(CardEvent(uid, time.time(), reader_id))
+                present[reader_id] = uid
+
+            # Also with cards in the field, so the bus lock is free most of the time
+            time.sleep(self.idle_interval)
+
+    def get(self, timeout: float = None) -> CardEvent:
+        # Next card arrival on any reader, None on timeout
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __iter__(self):
+        while self.running.is_set() or not self.events.empty():
+            event = self.get(timeout=self.idle_interval)
+            if event is not None:
+                yield event
+
+    def cleanup(self):
+        self.stop()
+        pins = set()
+        for reader in self.readers.values():
+            reader.cleanup(gpio=False)
+            pins.update(reader.pins())
+        with self.gpio_lock:
+            self.gpio.cleanup(sorted(pins))
@@ -0,0 +1,85 @@
+# Card presence tracking: arrival, still present and departure events with HALT based re-detection
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.status import *
+from mfrc522pi.data import *
+from mfrc522pi.abi import *
+import time
+
+
+class PresenceTracker:
+    def __init__(self, reader: MFRC522, name: str = None, debounce: int = 3, fast_interval: float = 0.02,
+                 idle_interval: float = 0.25, present_interval: float = 1.0):
+        # debounce - missed presence checks in a row before a card is reported as departed
+        # fast_interval - poll period while a card is present or has just left
+        # idle_interval - poll period an empty field backs off to (doubling from fast_interval)
+        # present_interval - minimal period between PRESENT events of one card
+        self.reader = reader
+        self.name = name
+        self.debounce = debounce
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.present_interval = present_interval
+
+        self.uid = None
+        self.misses = 0
+        self.interval = fast_interval
+        self.last_present = 0.0
+        self.active = False
+
+    def event(self, kind: CardEventKind, now: float) -> CardEvent:
+        if kind != CardEventKind.DEPARTED:
+            self.last_present = now
+        return CardEvent(self.uid, now, self.name, kind)
+
+    def release(self):
+        # The card was handed over after the last event, HALT it so REQIDL polls don't see it again
+        if self.active:
+            self.reader.halt()
+            self.reader.stop_crypto1()
+            self.active = False
+
+    def poll(self) -> CardEvent:
+        # One polling step, returns an event or None. After ARRIVED/PRESENT the card is selected
+        # and can be used until the next poll()
+        self.release()
+        now = time.monotonic()
+
+        if self.uid is None:
+            uid = self.reader.detect()
+            if uid is None:
+                self.interval = min(self.interval * 2, self.idle_interval)
+                return None
+
+            self.uid = uid
+            self.misses = 0
+            self.active = True
+            self.interval = self.fast_interval
+            return self.event(CardEventKind.ARRIVED, now)
+
+        # A halted card only answers WUPA, it is selected by its full UID
+        if self.reader.request(PICC.REQALL).status == Status.OK and \
+                self.reader.select_uid(self.uid).status == Status.OK:
+            self.misses = 0
+            self.active = True
+            if now - self.last_present >= self.present_interval:
+                return self.event(CardEventKind.PRESENT, now)
+            return None
+
+        self.misses += 1
+        if self.misses < self.debounce:
+            return None
+
+        event = self.event(CardEventKind.DEPARTED, now)
+        self.uid = None
+        self.misses = 0
+        return event
+
+    def events(self):
+        while True:
+            event = self.poll()
+            if event is not None:
+                yield event
+            time.sleep(self.interval)
+
+    def __iter__(self):
+        return self.events()
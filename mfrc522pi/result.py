@@ -6,6 +6,8 @@ T = TypeVar('T')
 
 
 class Result(Generic[T]):
+    __slots__ = ('status', 'value')
+
     def __init__(self, status: Status, value: T = None):
         self.status = status
         self.value = value
@@ -20,4 +22,7 @@ class Result(Generic[T]):
         return self.value
 
     def __getattr__(self, name: str):
-        return self.value.__getattribute__(name)
+        # Only called for names that aren't status/value, forwards .data, .uid, .size etc. to the value
+        if name == 'value' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.value, name)
@@ -0,0 +1,37 @@
+# Shadow copies of MFRC522 registers that only change when the host writes them
+from mfrc522pi.abi import REG
+from typing import Optional
+
+
+# Volatile registers (CommIrq, DivIrq, FIFOLevel, Status2, Error, ...) are never shadowed
+SHADOWED_REGISTERS = frozenset((
+    REG.BitFraming,
+    REG.TxControl,
+    REG.Mode,
+    REG.TMode,
+    REG.TPrescaler,
+    REG.TReloadH,
+    REG.TReloadL,
+    REG.TxAuto,
+    REG.RFCfg,
+))
+
+
+class RegisterShadow:
+    def __init__(self, registers=SHADOWED_REGISTERS):
+        self.registers = frozenset(registers)
+        self.values = dict()
+        self.saved = 0
+
+    def get(self, reg: int) -> Optional[int]:
+        value = self.values.get(reg)
+        if value is not None:
+            self.saved += 1
+        return value
+
+    def update(self, reg: int, value: int):
+        if reg in self.registers:
+            self.values[reg] = value
+
+    def invalidate(self):
+        self.values.clear()
@@ -14,3 +14,5 @@ class Status(Enum):
     WRITE_BLOCK_BAD_SIZE_ERROR = 8
     WRITE_BLOCK_BAD_DATA_ERROR = 9
     DATA_CORRUPTED_ERROR = 10
+    READ_BLOCK_BAD_SIZE_ERROR = 11
+    COLLISION_ERROR = 12
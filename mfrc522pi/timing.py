@@ -0,0 +1,118 @@
+# RF timeout profiles: the chip timer (TReload) is programmed per command type instead of one fixed timeout,
+# and the profiles of commands a card answers can tighten to the response times measured by the chip timer
+from mfrc522pi.logger import logger
+import math
+
+
+# The timer runs from the 13.56 MHz carrier
+CARRIER = 13560000
+# TPrescaler 0x2A6: (2 * 678 + 1) / 13.56 MHz = 100 us per tick. The default timeouts fit in TReloadL,
+# switching profiles is one register write
+PRESCALER = 0x2A6
+TICK = (2 * PRESCALER + 1) / CARRIER
+# 106 kbit/s, 128 carrier cycles per bit and 9 bits per byte with parity
+BYTE_TIME = 9 * 128 / CARRIER
+
+# Seconds the chip waits for an answer after the end of transmission (the timer stops when the answer starts).
+# A card answers REQA, anticollision and SELECT after ~90 us, HALT and the operand of INCREMENT/DECREMENT/
+# RESTORE are only answered with a NAK, so their timeout is what success costs
+DEFAULT_TIMEOUTS = {
+    'request': 0.001,
+    'anticollision': 0.001,
+    'select': 0.001,
+    'halt': 0.001,
+    'auth': 0.005,
+    'read': 0.005,
+    # ACK of INCREMENT/DECREMENT/RESTORE before the operand
+    'command': 0.005,
+    # ACK of the WRITE command, the card answers it right away. Same limit as write_data, so a block write
+    # doesn't switch TReload twice unless adaptive tightened one of them
+    'write': 0.010,
+    # ACKs of the written data and of TRANSFER, sent after the EEPROM is programmed. Measured separately
+    # from 'write', the two response times are far apart
+    'write_data': 0.010,
+    # A card NAKs a bad operand within ~1 ms (the datasheet's NAK window), silence after that is success
+    'value': 0.001,
+    # Anything else, e.g. GET_VERSION or frames sent with transceive() directly
+    'default': 0.025,
+}
+
+# Profiles answered on success, only these are tightened
+ADAPTIVE_PROFILES = ('request', 'anticollision', 'select', 'auth', 'read', 'command', 'write', 'write_data')
+
+# Adaptive timeouts are rounded up to this, so small changes don't rewrite TReload every command
+QUANTUM = 0.00025
+
+# Host side deadline on top of the chip timeout and the frames on air, covers scheduling and SPI latency
+DEADLINE_SLACK = 0.005
+
+
+def timer_ticks(timeout: float) -> int:
+    return max(1, min(0xFFFF, math.ceil(timeout / TICK)))
+
+
+class TimeoutProfiles:
+    def __init__(self, timeouts: dict = None, adaptive: bool = False, alpha: float = 0.125, scale: float = 2.0,
+                 floor: float = 0.0005, min_samples: int = 8, probe: int = 16):
+        # timeouts - profile -> seconds, overrides DEFAULT_TIMEOUTS. They are upper bounds, adaptive never
+        # waits longer. An adaptive profile waits scale * (smoothed response time + 4 * deviation), at least
+        # floor, once min_samples answers were measured. After probe unanswered REQAs in a row one waits
+        # the full limit, so cards slower than the tightened timeout are still found
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or dict())}
+        self.adaptive = adaptive
+        self.alpha = alpha
+        self.scale = scale
+        self.floor = floor
+        self.min_samples = min_samples
+        self.probe = probe
+        # profile -> [samples, smoothed response time, smoothed deviation]
+        self.estimates = dict()
+        self.silent = 0
+
+    def timeout(self, profile: str) -> float:
+        limit = self.timeouts.get(profile, self.timeouts['default'])
+        estimate = self.estimates.get(profile)
+        if estimate is None or estimate[0] < self.min_samples:
+            return limit
+        if profile == 'request' and self.silent >= self.probe:
+            return limit
+        _, mean, deviation = estimate
+        timeout = max(self.floor, self.scale * (mean + 4 * deviation))
+        return min(limit, math.ceil(timeout / QUANTUM) * QUANTUM)
+
+    def ticks(self, profile: str) -> int:
+        return timer_ticks(self.timeout(profile))
+
+    def deadline(self, profile: str, sent: int, received: int) -> float:
+        # Software backstop of a command, it only fires when the chip timer didn't end the command
+        return self.timeout(profile) + (sent + received) * BYTE_TIME + DEADLINE_SLACK
+
+    def observe(self, profile: str, response_time: float):
+        if not self.adaptive or profile not in ADAPTIVE_PROFILES:
+            return
+        if profile == 'request':
+            self.silent = 0
+        estimate = self.estimates.get(profile)
+        if estimate is None:
+            self.estimates[profile] = [1, response_time, response_time / 2]
+            return
+        # Smoothed like a TCP round trip time (RFC 6298)
+        estimate[0] += 1
+        estimate[2] += self.alpha * (abs(response_time - estimate[1]) - estimate[2])
+        estimate[1] += self.alpha * (response_time - estimate[1])
+
+    def missed(self, profile: str):
+        # Unanswered REQAs are the empty field, only counted for the probe. Otherwise a card was known to be
+        # there and the answer didn't come, the timeout may have been too tight: the profile starts over
+        # from its limit
+        if profile == 'request':
+            self.silent = 0 if self.silent >= self.probe else self.silent + 1
+        elif self.estimates.pop(profile, None) is not None:
+            logger.debug(f'timeouts: {profile} missed, back to {self.timeouts.get(profile)} s')
+
+    def reset(self):
+        self.estimates = dict()
+        self.silent = 0
+
+    def snapshot(self) -> dict:
+        return {profile: self.timeout(profile) for profile in self.timeouts}
@@ -0,0 +1,302 @@
+# SPI traffic recorder, deterministic replay and trace summaries
+# Usage: python3 -m mfrc522pi.trace summary [--json] TRACE [TRACE ...]
+#        python3 -m mfrc522pi.trace dump TRACE
+#
+# Trace file: header, then one record per transfer: microseconds since the previous transfer, length,
+# the bytes sent and the bytes received (same length)
+from mfrc522pi.transport import Transport, POLLED_REGISTERS
+from mfrc522pi.abi import *
+from collections import Counter, deque
+from dataclasses import dataclass
+import argparse
+import struct
+import json
+import time
+import sys
+
+
+MAGIC = bytes('MFRC522PI_TRACE'.encode('utf-8'))
+TRACE_VERSION = 1
+# magic, version, start time (unix seconds)
+HEADER = struct.Struct('>15sHd')
+# us since the previous transfer, length
+RECORD = struct.Struct('>IH')
+
+REGISTER_NAMES = {value: name for name, value in vars(REG).items() if not name.startswith('_')}
+
+
+class TraceMismatch(Exception):
+    pass
+
+
+@dataclass
+class TraceTransfer:
+    # Seconds since the start of the trace
+    time: float
+    sent: bytes
+    received: bytes
+
+    @property
+    def is_read(self) -> bool:
+        return bool(self.sent[0] & 0x80)
+
+    @property
+    def register(self) -> int:
+        return (self.sent[0] >> 1) & 0x3F
+
+    def accesses(self) -> list[tuple[int, int]]:
+        # (register, value) per register touched. A read sends one address byte per value it clocks out
+        if self.is_read:
+            return [((self.sent[i] >> 1) & 0x3F, self.received[i + 1]) for i in range(len(self.sent) - 1)]
+        return [(self.register, value) for value in self.sent[1:]]
+
+
+class RecordingTransport(Transport):
+    def __init__(self, transport: Transport, filename: str, buffer_size: int = 64 * 1024):
+        # Records are collected in memory and written buffer_size bytes at a time
+        self.transport = transport
+        self.file = open(filename, 'wb')
+        self.file.write(HEADER.pack(MAGIC, TRACE_VERSION, time.time()))
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.last = time.perf_counter_ns()
+
+    def transfer(self, data: tuple) -> tuple:
+        result = self.transport.transfer(data)
+        now = time.perf_counter_ns()
+        delta = min((now - self.last) // 1000, 0xFFFFFFFF)
+        self.last = now
+        buffer = self.buffer
+        buffer += RECORD.pack(delta, len(data))
+        buffer.extend(data)
+        buffer.extend(result)
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+        return result
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.transport.close()
+
+    def __getattr__(self, name: str):
+        if name == 'transport':
+            raise AttributeError(name)
+        return getattr(self.transport, name)
+
+
+def load_trace(filename: str) -> tuple[float, list[TraceTransfer]]:
+    # Returns the start time and the transfers, a torn last record is dropped
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    magic, version, start = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != TRACE_VERSION:
+        raise ValueError(f'{filename} is not a mfrc522pi trace')
+
+    transfers = []
+    offset = HEADER.size
+    now = 0.0
+    while offset + RECORD.size <= len(raw):
+        delta, length = RECORD.unpack_from(raw, offset)
+        offset += RECORD.size
+        if offset + 2 * length > len(raw):
+            break
+        now += delta / 1e6
+        transfers.append(TraceTransfer(now, raw[offset:offset + length], raw[offset + length:offset + 2 * length]))
+        offset += 2 * length
+    return start, transfers
+
+
+class ReplayTransport(Transport):
+    def __init__(self, filename: str, strict: bool = True):
+        # strict - every transfer has to match the recorded one, TraceMismatch otherwise.
+        # Otherwise reads are answered per register with the values recorded for it in order, writes are
+        # accepted, so modified code (e.g. fewer polls, burst reads) can run against a captured session
+        self.start, self.transfers = load_trace(filename)
+        self.strict = strict
+        self.position = 0
+        self.values = dict()
+        self.last = dict()
+        for transfer in self.transfers:
+            if transfer.is_read:
+                for register, value in transfer.accesses():
+                    self.values.setdefault(register, deque()).append(value)
+
+    def transfer(self, data: tuple) -> tuple:
+        if self.strict:
+            if self.position >= len(self.transfers):
+                raise TraceMismatch(f'transfer {self.position}: trace ended')
+            recorded = self.transfers[self.position]
+            if bytes(data) != recorded.sent:
+                raise TraceMismatch(f'transfer {self.position}: sent {bytes(data).hex()}, '
+                                    f'recorded {recorded.sent.hex()}')
+            self.position += 1
+            return tuple(recorded.received)
+
+        self.position += 1
+        if not data[0] & 0x80:
+            return (0,) * len(data)
+        result = [0]
+        for address in data[:-1]:
+            register = (address >> 1) & 0x3F
+            queue = self.values.get(register)
+            if queue:
+                self.last[register] = queue.popleft()
+            result.append(self.last.get(register, 0))
+        return tuple(result)
+
+    def remaining(self) -> int:
+        return len(self.transfers) - self.position
+
+
+# Trace analysis
+
+def picc_operation(frame: bytes, previous: str) -> str:
+    if not frame:
+        return 'transceive'
+    command = frame[0]
+    if previous in ('write', 'increment', 'decrement', 'restore') and len(frame) > 2:
+        return previous + ' (data)'
+    if command == PICC.REQIDL and len(frame) == 1:
+        return 'request (REQA)'
+    if command == PICC.REQALL and len(frame) == 1:
+        return 'request (WUPA)'
+    if command in (0x93, 0x95, 0x97) and len(frame) > 1:
+        return 'select' if frame[1] == 0x70 else 'anticollision'
+    names = {
+        PICC.READ: 'read', PICC.WRITE: 'write', PICC.UL_WRITE: 'ul_write', PICC.HALT: 'halt',
+        PICC.INCREMENT: 'increment', PICC.DECREMENT: 'decrement', PICC.RESTORE: 'restore',
+        PICC.TRANSFER: 'transfer', PICC.FAST_READ: 'fast_read', PICC.GET_VERSION: 'get_version',
+    }
+    return names.get(command, f'transceive 0x{command:02X}')
+
+
+def operations(transfers: list[TraceTransfer]) -> list[tuple[str, list[TraceTransfer]]]:
+    # Splits a trace into chip commands. A command starts with the CommIEn write of transceive or the
+    # DivIrq clear of calculate_crc, writes right before it (e.g. BitFraming) are counted as its setup
+    starts = [
+        i for i, t in enumerate(transfers)
+        if not t.is_read and len(t.sent) == 2 and (
+            (t.register == REG.CommIEn and t.sent[1] != 0x80) or (t.register == REG.DivIrq and t.sent[1] == 0x04))
+    ]
+    for n, start in enumerate(starts):
+        previous = starts[n - 1] if n else -1
+        while start - 1 > previous and not transfers[start - 1].is_read:
+            start -= 1
+        starts[n] = start
+
+    result = []
+    bounds = [0] + starts + [len(transfers)]
+    name = 'setup'
+    for begin, end in zip(bounds, bounds[1:]):
+        segment = transfers[begin:end]
+        if not segment:
+            continue
+        fifo = bytearray()
+        command = None
+        for t in segment:
+            if not t.is_read and t.register == REG.FIFOData:
+                fifo += t.sent[1:]
+            elif not t.is_read and t.register == REG.Command and t.sent[1] != PCD.IDLE:
+                command = t.sent[1] & 0x0F
+        if command == PCD.TRANSCEIVE:
+            name = picc_operation(bytes(fifo), name)
+        elif command == PCD.AUTHENT:
+            name = 'authenticate'
+        elif command == PCD.CALCCRC:
+            name = 'calculate_crc'
+        elif begin:
+            name = 'other'
+        result.append((name, segment))
+    return result
+
+
+def is_poll(transfer: TraceTransfer) -> bool:
+    return transfer.is_read and len(transfer.sent) == 2 and transfer.register in POLLED_REGISTERS
+
+
+def summarize(transfers: list[TraceTransfer], top: int = 10) -> dict:
+    per_operation = dict()
+    for name, segment in operations(transfers):
+        entry = per_operation.setdefault(name, {'count': 0, 'transfers': 0, 'bytes': 0, 'polls': 0})
+        entry['count'] += 1
+        entry['transfers'] += len(segment)
+        entry['bytes'] += sum(len(t.sent) for t in segment)
+        entry['polls'] += sum(1 for t in segment if is_poll(t))
+
+    # A poll lasts until the next transfer
+    polling = sum(b.time - a.time for a, b in zip(transfers, transfers[1:]) if is_poll(a))
+
+    reads = Counter()
+    writes = Counter()
+    for t in transfers:
+        for register, _ in t.accesses():
+            (reads if t.is_read else writes)[register] += 1
+    hot = (reads + writes).most_common(top)
+
+    return {
+        'transfers': len(transfers),
+        'bytes': sum(len(t.sent) for t in transfers),
+        'duration_s': transfers[-1].time if transfers else 0.0,
+        'polls': sum(1 for t in transfers if is_poll(t)),
+        'polling_s': polling,
+        'operations': per_operation,
+        'registers': [
+            {'register': REGISTER_NAMES.get(register, hex(register)), 'reads': reads[register],
+             'writes': writes[register]}
+            for register, _ in hot
+        ],
+    }
+
+
+def print_summary(name: str, summary: dict):
+    print(f'{name}: {summary["transfers"]} transfers, {summary["bytes"]} bytes, {summary["duration_s"] * 1e3:.1f} ms, '
+          f'{summary["polls"]} polls ({summary["polling_s"] * 1e3:.1f} ms polling)')
+    print(f'  {"operation":22} {"count":>6} {"transfers":>10} {"per op":>7} {"polls":>6}')
+    for op, entry in summary['operations'].items():
+        print(f'  {op:22} {entry["count"]:6} {entry["transfers"]:10} {entry["transfers"] / entry["count"]:7.1f} '
+              f'{entry["polls"]:6}')
+    print(f'  {"register":22} {"reads":>6} {"writes":>10}')
+    for entry in summary['registers']:
+        print(f'  {entry["register"]:22} {entry["reads"]:6} {entry["writes"]:10}')
+
+
+def dump(transfers: list[TraceTransfer]):
+    for t in transfers:
+        direction = 'R' if t.is_read else 'W'
+        values = ' '.join(f'{REGISTER_NAMES.get(register, hex(register))}={value:02X}'
+                          for register, value in t.accesses())
+        print(f'{t.time * 1e3:10.3f} ms {direction} {values}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mfrc522pi SPI trace tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    summary = sub.add_parser('summary', help='transfers per operation, polling time and hot registers')
+    summary.add_argument('traces', nargs='+')
+    summary.add_argument('--top', type=int, default=10, help='hot registers to list')
+    summary.add_argument('--json', action='store_true')
+    dump_parser = sub.add_parser('dump', help='print every transfer')
+    dump_parser.add_argument('trace')
+    args = parser.parse_args()
+
+    if args.command == 'dump':
+        dump(load_trace(args.trace)[1])
+        return
+
+    summaries = {name: summarize(load_trace(name)[1], args.top) for name in args.traces}
+    if args.json:
+        json.dump(summaries, sys.stdout, indent=2)
+        print()
+        return
+    for name, s in summaries.items():
+        print_summary(name, s)
+
+
+if __name__ == '__main__':
+    main()
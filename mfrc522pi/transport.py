@@ -0,0 +1,79 @@
+# SPI transports that MFRC522 talks to the chip through
+from mfrc522pi.abi import REG
+import time
+
+
+class Transport:
+    def transfer(self, data: tuple) -> tuple:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SpiTransport(Transport):
+    def __init__(self, dev: str = '/dev/spidev0.0', speed: int = 1000000):
+        self.dev = dev
+        self.speed = speed
+        # SPI-Py is only needed (and installable) on the Pi
+        import spi
+        self.spi = spi
+        self.handle = spi.openSPI(device=dev, mode=0, speed=speed)
+
+    def transfer(self, data: tuple) -> tuple:
+        return self.spi.transfer(self.handle, data)
+
+    def set_speed(self, speed: int):
+        # SPI-Py takes the clock when the device is opened
+        self.spi.closeSPI(self.handle)
+        self.handle = self.spi.openSPI(device=self.dev, mode=0, speed=speed)
+        self.speed = speed
+
+    def close(self):
+        self.spi.closeSPI(self.handle)
+
+
+# Single register reads of these are the iterations of the completion poll loops
+POLLED_REGISTERS = (REG.CommIrq, REG.DivIrq)
+
+
+class CountingTransport(Transport):
+    def __init__(self, transport: Transport, latency: float = 0.0, speed: int = None, sleep: bool = False):
+        # latency is a fixed cost per transfer and speed the SPI clock used to model time on the bus.
+        # The modelled time is accumulated in bus_time and only really spent when sleep is set
+        self.transport = transport
+        self.latency = latency
+        self.speed = speed
+        self.sleep = sleep
+        self.reset()
+
+    def reset(self):
+        self.transfers = 0
+        self.bytes = 0
+        self.polls = 0
+        self.bus_time = 0.0
+
+    def transfer(self, data: tuple) -> tuple:
+        self.transfers += 1
+        self.bytes += len(data)
+        if len(data) == 2 and data[0] & 0x80 and (data[0] >> 1) & 0x3F in POLLED_REGISTERS:
+            self.polls += 1
+
+        cost = self.latency
+        if self.speed:
+            cost += len(data) * 8 / self.speed
+        self.bus_time += cost
+        if self.sleep and cost > 0:
+            deadline = time.perf_counter() + cost
+            while time.perf_counter() < deadline:
+                pass
+
+        return self.transport.transfer(data)
+
+    def set_speed(self, speed: int):
+        self.speed = speed
+        if hasattr(self.transport, 'set_speed'):
+            self.transport.set_speed(speed)
+
+    def close(self):
+        self.transport.close()
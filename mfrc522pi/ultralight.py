@@ -0,0 +1,95 @@
+# MIFARE Ultralight / NTAG21x: card size from GET_VERSION and page reads with FAST_READ.
+# Cards without FAST_READ (the original Ultralight) are read with 4 page READs
+from mfrc522pi.mfrc522 import MFRC522
+from mfrc522pi.mifare import PAGE_SIZE
+from mfrc522pi.crc import crc_a
+from mfrc522pi.logger import logger
+from mfrc522pi.result import *
+from mfrc522pi.status import *
+from mfrc522pi.data import *
+from mfrc522pi.abi import *
+
+
+ULTRALIGHT_PAGES = 16
+
+# GET_VERSION storage size byte -> pages
+STORAGE_PAGES = {
+    0x0B: 20,   # Ultralight EV1 MF0UL11
+    0x0E: 41,   # Ultralight EV1 MF0UL21
+    0x0F: 45,   # NTAG213
+    0x11: 135,  # NTAG215
+    0x13: 231,  # NTAG216
+}
+
+# Pages per FAST_READ, 256 bytes: a full NTAG216 in 4 exchanges
+FAST_READ_PAGES = 64
+
+
+class UltralightReader:
+    def __init__(self, reader: MFRC522, chunk: int = FAST_READ_PAGES):
+        # chunk - pages per FAST_READ, 15 or less keeps every answer within the FIFO (no draining)
+        self.reader = reader
+        self.chunk = chunk
+        # uid -> False once the card NAKed FAST_READ
+        self.fast_read = dict()
+
+    def version(self, uid: list[int]) -> Result[list[int]]:
+        # GET_VERSION, the original Ultralight NAKs it and is reselected
+        data = [PICC.GET_VERSION]
+        data.extend(self.reader.crc(data))
+        res = self.reader.transceive(PCD.TRANSCEIVE, data, profile='read')
+        if res.status == Status.OK and (res.size != 10 * 8 or crc_a(res.data[:8]) != res.data[8:]):
+            res.status = Status.READ_BLOCK_BAD_SIZE_ERROR
+        if res.status != Status.OK:
+            self.reader.reselect(uid)
+            return Result(res.status, None)
+        return Result(Status.OK, res.data[:8])
+
+    def pages(self, uid: list[int]) -> int:
+        res = self.version(uid)
+        if res.status != Status.OK:
+            # Original Ultralight, it has no FAST_READ either
+            self.fast_read[tuple(uid)] = False
+            return ULTRALIGHT_PAGES
+        pages = STORAGE_PAGES.get(res.value[6])
+        if pages is None:
+            logger.error(f'ultralight: unknown storage size {res.value[6]:#04x}, reading {ULTRALIGHT_PAGES} pages')
+            return ULTRALIGHT_PAGES
+        return pages
+
+    def read_pages(self, uid: list[int], start: int, count: int) -> Result[PagesData]:
+        # The card has to be selected
+        data = bytearray()
+        page = start
+        end = start + count
+
+        while page < end and self.fast_read.get(tuple(uid), True):
+            last = min(page + self.chunk, end) - 1
+            res = self.reader.fast_read(page, last)
+            if res.status != Status.OK:
+                if page == start and res.status == Status.READ_BLOCK_BAD_SIZE_ERROR:
+                    # NAK: no FAST_READ, the card went back to IDLE
+                    self.fast_read[tuple(uid)] = False
+                    status = self.reader.reselect(uid)
+                    if status != Status.OK:
+                        return Result(status, PagesData(start, self.pages_data(data)))
+                    break
+                return Result(res.status, PagesData(start, self.pages_data(data)))
+            data += bytes(res.data)
+            page = last + 1
+
+        while page < end:
+            # READ returns 4 pages, wrapping around at the end of the memory
+            res = self.reader.read_block(page)
+            if res.status != Status.OK:
+                return Result(res.status, PagesData(start, self.pages_data(data)))
+            data += bytes(res.data[:(end - page) * PAGE_SIZE])
+            page += 4
+
+        return Result(Status.OK, PagesData(start, self.pages_data(data)))
+
+    def read_card(self, uid: list[int]) -> Result[PagesData]:
+        return self.read_pages(uid, 0, self.pages(uid))
+
+    def pages_data(self, data: bytearray):
+        return bytes(data) if self.reader.compact else list(data)
@@ -1,38 +1,146 @@
 # mfrc522pi utilities
+from mfrc522pi.mifare import BLOCK_SIZE
 from mfrc522pi.status import *
 from mfrc522pi.result import *
 from mfrc522pi.data import *
 import struct
+import mmap
+import zlib
 
 
 MAGIC = bytes('MFRC522PI_DATA'.encode('utf-8'))
 
+# v2: header, (block, offset) index and the blocks back to back. The CRC32 covers the header fields before it
+# (UID, SAK, ATQA, ...), the index and the data. Offsets are from the start of the file
+MAGIC_V2 = bytes('MFRC522PI_DUMP'.encode('utf-8'))
+DUMP_VERSION = 2
+# magic, version, uid length, uid, sak (0xFFFF unknown), atqa, block size, block count, crc32
+DUMP_HEADER = struct.Struct('>14sHB10sH2sHII')
+INDEX_ENTRY = struct.Struct('>II')
+
+
+def save_blocks(filename: str, data: BlocksData, uid: list[int] = None, atqa: list[int] = None,
+                sak: int = None, version: int = DUMP_VERSION) -> Status:
+    blocks = data.data
+    # Nothing is written that load_blocks would reject
+    if any(len(block_data) != BLOCK_SIZE for block_data in blocks.values()):
+        return Status.WRITE_BLOCK_BAD_SIZE_ERROR
+    if uid is not None and len(uid) > 10:
+        return Status.ANTI_COLLISION_BAD_UID_SIZE_ERROR
+
+    if version == 1:
+        body = bytearray(MAGIC + struct.pack('>I', len(blocks)))
+        for block_id, block_data in blocks.items():
+            body += struct.pack('>I', block_id) + bytes(block_data)
+    else:
+        block_ids = sorted(blocks)
+        data_start = DUMP_HEADER.size + INDEX_ENTRY.size * len(block_ids)
+        index = b''.join(INDEX_ENTRY.pack(block_id, data_start + i * BLOCK_SIZE)
+                         for i, block_id in enumerate(block_ids))
+        payload = b''.join(bytes(blocks[block_id]) for block_id in block_ids)
+        uid = bytes(uid or b'')
+        header = DUMP_HEADER.pack(MAGIC_V2, version, len(uid), uid, 0xFFFF if sak is None else sak,
+                                  bytes(atqa or b'\0\0'), BLOCK_SIZE, len(block_ids), 0)[:-4]
+        crc = zlib.crc32(payload, zlib.crc32(index, zlib.crc32(header)))
+        body = header + struct.pack('>I', crc) + index + payload
 
-def save_blocks(filename: str, data: BlocksData) -> Status:
     with open(filename, 'wb') as f:
-        f.write(MAGIC)
-        f.write(struct.pack('>I', len(data.data)))
-        for sector_id, sector_data in data.data.items():
-            f.write(struct.pack('>I', sector_id))
-            for b in sector_data:
-                f.write(struct.pack('B', b))
+        f.write(body)
+
+    return Status.OK
+
 
+def load_v1(raw: bytes, blocks: dict) -> Status:
+    if len(raw) < len(MAGIC) + 4:
+        return Status.DATA_CORRUPTED_ERROR
+    sectors_count = struct.unpack_from('>I', raw, len(MAGIC))[0]
+    offset = len(MAGIC) + 4
+    if len(raw) < offset + sectors_count * (4 + BLOCK_SIZE):
+        return Status.DATA_CORRUPTED_ERROR
+    for _ in range(sectors_count):
+        sector_id = struct.unpack_from('>I', raw, offset)[0]
+        blocks[sector_id] = raw[offset + 4:offset + 4 + BLOCK_SIZE]
+        offset += 4 + BLOCK_SIZE
     return Status.OK
 
 
-def load_blocks(filename: str) -> Result[BlocksData]:
-    result = Result(Status.OK, BlocksData(dict()))
+def load_blocks(filename: str, compact: bool = False) -> Result[BlocksData]:
+    # Reads v2 dumps and the original MFRC522PI_DATA files, compact returns CompactBlocks
+    with open(filename, 'rb') as f:
+        raw = f.read()
+
+    blocks = dict()
+    if raw.startswith(MAGIC_V2):
+        res = open_dump(raw)
+        status = res.status
+        if status == Status.OK:
+            status = Status.OK if res.value.verify() else Status.DATA_CORRUPTED_ERROR
+        if status == Status.OK:
+            blocks = {block_id: res.value.block(block_id) for block_id in res.value.index}
+    elif raw.startswith(MAGIC):
+        status = load_v1(raw, blocks)
+    else:
+        status = Status.DATA_CORRUPTED_ERROR
+
+    if compact:
+        return Result(status, CompactBlocks(max(blocks, default=-1) + 1, blocks))
+    return Result(status, BlocksData({block_id: list(block_data) for block_id, block_data in blocks.items()}))
+
+
+class DumpFile:
+    # Random access to a v2 dump, only the header and the index are parsed.
+    # buffer is anything bytes-like, e.g. an mmap (see map_dump)
+    def __init__(self, buffer, header: DumpHeader, index: dict[int, int]):
+        self.buffer = buffer
+        self.header = header
+        self.index = index
+
+    def block(self, block_id: int) -> bytes:
+        offset = self.index[block_id]
+        return bytes(self.buffer[offset:offset + self.header.block_size])
+
+    def verify(self) -> bool:
+        start = DUMP_HEADER.size
+        return zlib.crc32(self.buffer[start:start + len(self.index) * (INDEX_ENTRY.size + self.header.block_size)],
+                          zlib.crc32(self.buffer[:start - 4])) == self.header.crc32
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_dump(buffer) -> Result[DumpFile]:
+    if len(buffer) < DUMP_HEADER.size or buffer[:len(MAGIC_V2)] != MAGIC_V2:
+        return Result(Status.DATA_CORRUPTED_ERROR, None)
+
+    magic, version, uid_len, uid, sak, atqa, block_size, count, crc32 = DUMP_HEADER.unpack_from(buffer)
+    # Blocks are sliced by block_size, any other size would hand out partial or merged blocks
+    if version != DUMP_VERSION or block_size != BLOCK_SIZE or uid_len > 10 or \
+            len(buffer) < DUMP_HEADER.size + count * (INDEX_ENTRY.size + block_size):
+        return Result(Status.DATA_CORRUPTED_ERROR, None)
+
+    header = DumpHeader(version, list(uid[:uid_len]), list(atqa), None if sak == 0xFFFF else sak,
+                        block_size, count, crc32)
+    index = dict(INDEX_ENTRY.iter_unpack(buffer[DUMP_HEADER.size:DUMP_HEADER.size + count * INDEX_ENTRY.size]))
+    return Result(Status.OK, DumpFile(buffer, header, index))
+
+
+def map_dump(filename: str) -> Result[DumpFile]:
+    # mmap a v2 dump, block() then touches only the pages of the block it returns
     with open(filename, 'rb') as f:
-        magic = f.read(len(MAGIC))
-        if magic != MAGIC:
-            result.status = Status.DATA_CORRUPTED_ERROR
-            return result
-        sectors_count = struct.unpack('>I', f.read(4))[0]
-        for _ in range(sectors_count):
-            sector_id = struct.unpack('>I', f.read(4))[0]
-            sector_data = []
-            for i in range(16):
-                sector_data.append(struct.unpack('B', f.read(1))[0])
-            result.value.data[sector_id] = sector_data
-    return result
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return Result(Status.DATA_CORRUPTED_ERROR, None)
 
+    res = open_dump(buffer)
+    if res.status != Status.OK:
+        buffer.close()
+    return res
@@ -0,0 +1,13 @@
+# Fixtures running the driver against the emulated chip, no Pi or module needed
+from mfrc522pi import MFRC522
+from mfrc522pi.emulator import EmulatedMFRC522, EmulatedGPIO
+import pytest
+
+
+@pytest.fixture
+def make_reader():
+    # Builds a reader on an emulated chip with the given cards in the field, returns (reader, chip)
+    def make(*cards, **kwargs):
+        chip = EmulatedMFRC522(list(cards))
+        return MFRC522(transport=chip, gpio=EmulatedGPIO(), **kwargs), chip
+    return make
@@ -0,0 +1,77 @@
+# AsyncMFRC522 on the emulator, driven with asyncio.run
+from mfrc522pi import *
+from mfrc522pi.aio import AsyncMFRC522
+from mfrc522pi.emulator import MifareClassic
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_operations(make_reader):
+    reader, _ = make_reader(MifareClassic(UID, data={8: [0x42] * 16}))
+
+    async def run():
+        async with AsyncMFRC522(reader) as aio:
+            res = await aio.activate()
+            assert res.status == Status.OK
+            assert await aio.authenticate(PICC.AUTHENT1A, 8, DEFAULT_KEY, UID) == Status.OK
+            return await aio.read_block(8)
+
+    assert list(asyncio.run(run()).data) == [0x42] * 16
+
+
+def test_cards(make_reader):
+    card = MifareClassic(UID)
+    reader, chip = make_reader(card)
+
+    async def swap():
+        # The card leaves for a few polls and comes back
+        chip.remove_card(card)
+        await asyncio.sleep(0.02)
+        chip.add_card(card)
+
+    async def collect():
+        events = []
+        # References to the running swaps, the loop only keeps weak ones
+        swaps = []
+        async with AsyncMFRC522(reader, name='door', poll_interval=0.001) as aio:
+            async for event in aio.cards():
+                events.append(event)
+                if len(events) == 2:
+                    return events
+                # Runs while cards() keeps polling
+                swaps.append(asyncio.create_task(swap()))
+
+    events = asyncio.run(asyncio.wait_for(collect(), 5))
+    assert [event.uid for event in events] == [UID, UID]
+    assert events[0].reader == 'door'
+
+
+def test_shared_executor_left_running(make_reader):
+    executor = ThreadPoolExecutor(max_workers=1)
+    first, _ = make_reader()
+    second, _ = make_reader()
+
+    async def run():
+        async with AsyncMFRC522(first, executor=executor):
+            pass
+        async with AsyncMFRC522(second, executor=executor) as aio:
+            return await aio.call(second.version)
+
+    assert asyncio.run(run()) is not None
+    assert executor.submit(lambda: 1).result() == 1
+    executor.shutdown()
+
+
+def test_own_executor_shut_down(make_reader):
+    reader, _ = make_reader()
+    aio = AsyncMFRC522(reader)
+    asyncio.run(aio.close())
+    assert aio.owns_executor
+    try:
+        aio.executor.submit(lambda: 1)
+    except RuntimeError:
+        return
+    assert False, 'executor still running'
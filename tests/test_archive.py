@@ -0,0 +1,85 @@
+# Card archive: appends, reopening and recovery from damaged files
+from mfrc522pi.archive import CardArchive
+from mfrc522pi.data import BlocksData
+from mfrc522pi.status import Status
+import os
+import pytest
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / 'cards.arch')
+    with CardArchive(path) as archive:
+        for i in range(10):
+            archive.append(BlocksData({0: [i] * 16, 1: [0] * 16}), [1, 2, 3, i])
+    return path
+
+
+def damage(path: str, offset: int):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        byte = f.read(1)[0]
+        f.seek(offset)
+        f.write(bytes([byte ^ 1]))
+    # The index would hide the damage, recovery is what a scan does
+    os.remove(path + '.idx')
+
+
+def test_reopen(archive_path):
+    with CardArchive(archive_path, writable=False) as archive:
+        assert len(archive) == 10
+        res = archive.get([1, 2, 3, 7])
+        assert res.status == Status.OK
+        assert res.value.data[0] == [7] * 16
+        assert archive.get([9, 9, 9, 9]).status != Status.OK
+
+
+def test_latest_record_wins(archive_path):
+    with CardArchive(archive_path) as archive:
+        archive.append(BlocksData({0: [0x42] * 16}), [1, 2, 3, 4])
+    with CardArchive(archive_path, writable=False) as archive:
+        assert len(archive) == 10
+        assert archive.get([1, 2, 3, 4]).value.data == {0: [0x42] * 16}
+
+
+def test_damaged_record_keeps_the_rest(archive_path):
+    size = os.path.getsize(archive_path)
+    # Inside the first block record, shared by no other card
+    damage(archive_path, 20)
+    with CardArchive(archive_path) as archive:
+        assert os.path.getsize(archive_path) == size
+        assert len(archive) == 10
+        assert archive.stats.damaged_bytes > 0
+        assert archive.get([1, 2, 3, 0]).status == Status.DATA_CORRUPTED_ERROR
+        assert archive.get([1, 2, 3, 5]).value.data[0] == [5] * 16
+        assert archive.append(BlocksData({0: [9] * 16}), [9, 9, 9, 9]) == Status.OK
+    with CardArchive(archive_path, writable=False) as archive:
+        assert len(archive) == 11
+
+
+def test_torn_tail_is_truncated(archive_path):
+    size = os.path.getsize(archive_path)
+    with open(archive_path, 'ab') as f:
+        f.write(b'C\x04')
+    with CardArchive(archive_path) as archive:
+        assert os.path.getsize(archive_path) == size
+        assert len(archive) == 10
+        assert archive.append(BlocksData({0: [9] * 16}), [9, 9, 9, 9]) == Status.OK
+        assert archive.get([9, 9, 9, 9]).value.data[0] == [9] * 16
+
+
+def test_long_uid_rejected(archive_path):
+    size = os.path.getsize(archive_path)
+    with CardArchive(archive_path) as archive:
+        status = archive.append(BlocksData({0: [0x42] * 16}), list(range(11)))
+        assert status == Status.ANTI_COLLISION_BAD_UID_SIZE_ERROR
+        assert len(archive) == 10
+    assert os.path.getsize(archive_path) == size
+
+
+def test_ten_byte_uid(archive_path):
+    uid = list(range(10))
+    with CardArchive(archive_path) as archive:
+        assert archive.append(BlocksData({0: [0x42] * 16}), uid) == Status.OK
+    with CardArchive(archive_path, writable=False) as archive:
+        assert archive.get(uid).value.data == {0: [0x42] * 16}
@@ -0,0 +1,38 @@
+# Benchmark scenarios run once each, and the comparisons the README quotes
+from mfrc522pi.bench import SCENARIOS, run, run_scenario
+import pytest
+
+
+# The startup group spawns fresh interpreters, too slow for every test run
+NAMES = sorted(name for name, (group, _, _) in SCENARIOS.items() if group != 'startup')
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_scenario_runs(name):
+    result = run_scenario(name, 1, dict())
+    assert result['runs'] == 1
+    assert result['transfers'] >= 0
+
+
+def test_report():
+    report = run(['detect', 'dump_1k'], 2)
+    assert [result['name'] for result in report['results']] == ['detect', 'dump_1k']
+    assert report['results'][1]['transfers'] > report['results'][0]['transfers']
+
+
+def test_value_debit_cheaper():
+    debit = run_scenario('value_debit', 2, dict())
+    rmw = run_scenario('value_debit_rmw', 2, dict())
+    assert debit['rf_us'] < rmw['rf_us']
+
+
+def test_shadow_saves_transfers():
+    plain = run_scenario('dump_1k', 1, dict())
+    shadowed = run_scenario('dump_1k', 1, {'shadow': True})
+    assert shadowed['transfers'] < plain['transfers']
+
+
+def test_adaptive_empty_field():
+    fixed = run_scenario('request_idle', 2, dict())
+    adaptive = run_scenario('request_idle', 2, {'adaptive': True})
+    assert adaptive['rf_us'] <= fixed['rf_us']
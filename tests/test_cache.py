@@ -0,0 +1,117 @@
+# CardCache: hits, validation, TTL and eviction against the emulator
+from mfrc522pi import *
+from mfrc522pi.cache import CardCache
+from mfrc522pi.emulator import MifareClassic
+import mfrc522pi.cache
+import pytest
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+@pytest.fixture
+def card():
+    return MifareClassic(UID, data={1: [0x11] * 16, 4: [0x04] * 16, 8: [0x08] * 16})
+
+
+def active(make_reader, card):
+    reader, chip = make_reader(card)
+    assert reader.activate().status == Status.OK
+    return reader, chip
+
+
+def test_read_blocks_hit(make_reader, card):
+    reader, chip = active(make_reader, card)
+    cache = CardCache()
+    first = cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    chip.transfers = 0
+    second = cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    assert second.status == Status.OK
+    assert second.value.data == first.value.data
+    assert chip.transfers == 0
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_hits_are_copies(make_reader, card):
+    reader, _ = active(make_reader, card)
+    cache = CardCache()
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 16).value.data[1][0] = 0xFF
+    res = cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    assert res.value.data[1] == [0x11] * 16
+    res.value.data[1][0] = 0xFF
+    assert cache.read_block(reader, DEFAULT_KEY, UID, 1).data == [0x11] * 16
+
+
+def test_stale_entry(make_reader, card):
+    reader, _ = active(make_reader, card)
+    cache = CardCache(validate_block=4)
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    card.blocks[4] = [0x44] * 16
+    card.blocks[8] = [0x88] * 16
+    res = cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    assert res.status == Status.OK
+    assert res.value.data[8] == [0x88] * 16
+    assert cache.stats.stale == 1
+    assert cache.stats.misses == 2
+
+
+def test_validated_hit(make_reader, card):
+    reader, chip = active(make_reader, card)
+    cache = CardCache(validate_block=4)
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    card.blocks[8] = [0x88] * 16
+    # Only the validation block is read, unchanged it vouches for the rest
+    res = cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    assert res.value.data[8] == [0x08] * 16
+    assert cache.stats.hits == 1
+
+
+def test_read_block_hit_with_validation(make_reader, card):
+    reader, _ = active(make_reader, card)
+    cache = CardCache(validate_block=4)
+    assert cache.read_block(reader, DEFAULT_KEY, UID, 8).data == [0x08] * 16
+    res = cache.read_block(reader, DEFAULT_KEY, UID, 8)
+    assert res.status == Status.OK
+    assert res.data == [0x08] * 16
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stale) == (1, 1, 0)
+
+
+def test_ttl(make_reader, card, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(mfrc522pi.cache.time, 'monotonic', lambda: now[0])
+    reader, _ = active(make_reader, card)
+    cache = CardCache(ttl=10)
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    now[0] += 5
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 16)
+    assert cache.stats.hits == 1
+    now[0] += 20
+    assert cache.read_blocks(reader, DEFAULT_KEY, UID, 16).status == Status.OK
+    assert cache.stats.expired == 1
+    assert cache.stats.misses == 2
+
+
+def test_lru_eviction():
+    cache = CardCache(max_entries=2)
+    for i in range(3):
+        cache.put(cache.key([i]), BlocksData({0: [i] * 16}))
+    assert cache.get(cache.key([0])) is None
+    assert cache.get(cache.key([2])).data == {0: [2] * 16}
+    assert cache.stats.evictions == 1
+    assert cache.bytes == 2 * 16
+
+
+def test_key_type(make_reader, card):
+    reader, _ = active(make_reader, card)
+    modes = []
+    authenticate = reader.authenticate
+
+    def recording(mode, *args):
+        modes.append(mode)
+        return authenticate(mode, *args)
+
+    reader.authenticate = recording
+    cache = CardCache(validate_block=4)
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 8, mode=PICC.AUTHENT1B)
+    cache.read_blocks(reader, DEFAULT_KEY, UID, 8, mode=PICC.AUTHENT1B)
+    assert modes and set(modes) == {PICC.AUTHENT1B}
@@ -0,0 +1,84 @@
+# SPI clock calibration and runtime downshift over an emulated link that corrupts bits above max_speed
+from mfrc522pi import *
+from mfrc522pi.calibrate import SPEEDS, SpeedStep, Calibration, SpeedGovernor, calibrate, choose_speed, \
+    save_calibration, load_calibration
+from mfrc522pi.emulator import *
+import pytest
+
+
+def link_reader(max_speed: int = 4000000, error_rate: float = 0.2):
+    link = EmulatedLink(EmulatedMFRC522([MifareClassic([1, 2, 3, 4])]), max_speed=max_speed,
+                        error_rate=error_rate, seed=1)
+    return MFRC522(transport=link, gpio=EmulatedGPIO()), link
+
+
+def steps(*passed: bool) -> list[SpeedStep]:
+    return [SpeedStep(speed, 10, 0 if ok else 1) for speed, ok in zip(SPEEDS, passed)]
+
+
+def test_choose_speed():
+    assert choose_speed(steps(True, True, True, True, True, True)) == SPEEDS[-1]
+    # The fastest passing step is close to the failing one, margin steps are given up
+    assert choose_speed(steps(True, True, True, False)) == SPEEDS[1]
+    assert choose_speed(steps(True, True, True, False), margin=0) == SPEEDS[2]
+    assert choose_speed(steps(True, False), margin=3) == SPEEDS[0]
+    assert choose_speed(steps(False)) is None
+
+
+def test_calibrate(tmp_path):
+    reader, link = link_reader()
+    filename = str(tmp_path / 'calibration.json')
+    res = calibrate(reader, rounds=5, filename=filename, seed=1)
+    assert res.status == Status.OK
+    # 5 MHz fails, 4 MHz is too close to it
+    assert [step.passed() for step in res.value.steps] == [True, True, True, False]
+    assert res.value.speed == 2000000
+    assert link.speed == 2000000
+    # The reader is usable at the chosen clock
+    assert reader.activate().status == Status.OK
+
+    loaded = load_calibration(filename, res.value.dev)
+    assert loaded == res.value
+
+
+def test_calibrate_broken_link():
+    reader, _ = link_reader(max_speed=500000, error_rate=1.0)
+    res = calibrate(reader, speeds=(1000000, 2000000), rounds=2, seed=1)
+    assert res.status != Status.OK
+
+
+def test_load_missing(tmp_path):
+    assert load_calibration(str(tmp_path / 'missing.json')) is None
+
+
+def test_save_keeps_other_devices(tmp_path):
+    filename = str(tmp_path / 'calibration.json')
+    save_calibration(filename, Calibration('/dev/spidev0.0', 4000000))
+    save_calibration(filename, Calibration('/dev/spidev1.0', 2000000))
+    assert load_calibration(filename, '/dev/spidev0.0').speed == 4000000
+    assert load_calibration(filename, '/dev/spidev1.0').speed == 2000000
+
+
+def test_governor_downshift():
+    reader, link = link_reader()
+    governor = SpeedGovernor(reader, max_errors=3, seed=1).instrument()
+    reader.set_speed(8000000)
+    for _ in range(500):
+        reader.activate()
+        reader.halt()
+        if link.speed <= 4000000:
+            break
+    assert governor.downshifts >= 1
+    assert link.speed <= 4000000
+    reader.init()
+    assert reader.activate().status == Status.OK
+
+
+def test_governor_keeps_speed_on_rf_errors(make_reader):
+    # An empty field only times out, the link check passes and the clock stays
+    reader, chip = make_reader()
+    governor = SpeedGovernor(reader, max_errors=2, seed=1).instrument()
+    for _ in range(10):
+        governor.record(True)
+    assert governor.checks == 5
+    assert governor.downshifts == 0
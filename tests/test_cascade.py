@@ -0,0 +1,79 @@
+# Cascade levels of 4, 7 and 10 byte UIDs and the inventory of several cards in the field
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+import pytest
+
+
+UID_4 = [0xDE, 0xAD, 0xBE, 0xEF]
+UID_7 = [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66]
+UID_10 = [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66, 0x77, 0x88, 0x99]
+
+
+def card(uid) -> EmulatedCard:
+    return EmulatedCard(uid, [0x44 if len(uid) > 4 else 0x04, 0x00], 0x08)
+
+
+def with_bcc(level: list[int]) -> list[int]:
+    return level + [bcc(level)]
+
+
+def test_cascade_levels_of_uid():
+    assert cascade_levels(UID_4) == [with_bcc(UID_4)]
+    assert cascade_levels(UID_7) == [with_bcc([CASCADE_TAG] + UID_7[:3]), with_bcc(UID_7[3:])]
+    assert cascade_levels(UID_10) == [with_bcc([CASCADE_TAG] + UID_10[:3]), with_bcc([CASCADE_TAG] + UID_10[3:6]),
+                                      with_bcc(UID_10[6:])]
+
+
+@pytest.mark.parametrize('uid', [UID_4, UID_7, UID_10])
+def test_activate(make_reader, uid):
+    reader, _ = make_reader(card(uid))
+    res = reader.activate()
+    assert res.status == Status.OK
+    assert res.value.uid == uid
+    assert res.value.sak == 0x08
+
+
+@pytest.mark.parametrize('uid', [UID_4, UID_7, UID_10])
+def test_detect_full_uid(make_reader, uid):
+    reader, _ = make_reader(card(uid))
+    assert reader.detect() == uid
+
+
+@pytest.mark.parametrize('uid', [UID_4, UID_7, UID_10])
+def test_select_uid_after_halt(make_reader, uid):
+    emulated = card(uid)
+    reader, _ = make_reader(emulated)
+    assert reader.activate().status == Status.OK
+    assert reader.halt() == Status.OK
+    assert reader.request(PICC.REQALL).status == Status.OK
+    assert reader.select_uid(uid).status == Status.OK
+    assert emulated.state == emulated.ACTIVE
+
+
+def test_collision_resolved(make_reader):
+    # Same first cascade level up to the last bits, then different lengths
+    uids = [[0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66], [0x04, 0x11, 0x22, 0x30, 0x44, 0x55, 0x67],
+            [0x08, 0x11, 0x22, 0x33]]
+    reader, _ = make_reader(*[card(uid) for uid in uids])
+    res = reader.activate()
+    assert res.status == Status.OK
+    assert res.value.uid in uids
+
+
+def test_inventory(make_reader):
+    uids = [UID_4, UID_7, UID_10, [0xDE, 0xAD, 0xBE, 0xEE]]
+    reader, _ = make_reader(*[card(uid) for uid in uids])
+    seen = []
+    res = reader.inventory(handler=lambda reader, selection: seen.append(selection.uid))
+    assert res.status == Status.OK
+    assert sorted(selection.uid for selection in res.value) == sorted(uids)
+    assert seen == [selection.uid for selection in res.value]
+
+    # Halted cards stay out until the field is reset
+    assert reader.inventory().value == []
+    assert len(reader.inventory(reset_field=True).value) == len(uids)
+
+
+def test_inventory_max_cards(make_reader):
+    reader, _ = make_reader(*[card([0x10 + i, 0, 0, i]) for i in range(5)])
+    assert len(reader.inventory(max_cards=3).value) == 3
@@ -0,0 +1,45 @@
+# Compact block representation: bytes blocks and one CompactBlocks buffer per card
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+import pytest
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_compact_reader(make_reader):
+    card = MifareClassic(UID, data={5: [0x55] * 16})
+    reader, _ = make_reader(card, compact=True)
+    assert reader.activate().status == Status.OK
+    res = reader.read_blocks(DEFAULT_KEY, UID, 64)
+    assert res.status == Status.OK
+    assert isinstance(res.value, CompactBlocks)
+    assert res.value.block(5) == bytes([0x55] * 16)
+    assert len(res.value) == 64
+    # BlocksData API on top
+    assert res.value.data[5] == [0x55] * 16
+    plain, _ = make_reader(MifareClassic(UID, data={5: [0x55] * 16}))
+    assert plain.activate().status == Status.OK
+    assert res.value == plain.read_blocks(DEFAULT_KEY, UID, 64).value
+
+    assert reader.authenticate(PICC.AUTHENT1A, 4, DEFAULT_KEY, UID) == Status.OK
+    assert reader.read_block(5).data == bytes([0x55] * 16)
+
+
+def test_compact_blocks():
+    blocks = CompactBlocks(8, {1: [1] * 16, 3: bytes([3] * 16)})
+    assert blocks.ids() == [1, 3]
+    assert 2 not in blocks and 3 in blocks
+    with pytest.raises(KeyError):
+        blocks.block(2)
+    assert dict(blocks.data) == {1: [1] * 16, 3: [3] * 16}
+    assert CompactBlocks.from_blocks(blocks.to_blocks(), 8) == blocks
+
+
+def test_compact_dump_round_trip(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    blocks = CompactBlocks(4, {0: [0] * 16, 2: [2] * 16})
+    assert save_blocks(filename, blocks) == Status.OK
+    res = load_blocks(filename, compact=True)
+    assert res.status == Status.OK
+    assert res.value == blocks.to_blocks()
@@ -0,0 +1,43 @@
+# write_blocks_diff: only blocks whose content differs are written
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_only_changed_blocks_written(make_reader):
+    card = MifareClassic(UID, data={4: [0x44] * 16, 5: [0x55] * 16})
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    target = BlocksData({4: [0x44] * 16, 5: [0x05] * 16, 8: [0x08] * 16})
+    res = reader.write_blocks_diff(DEFAULT_KEY, UID, target)
+    assert res.status == Status.OK
+    assert res.value.blocks == {4: WriteOutcome.SKIPPED, 5: WriteOutcome.WRITTEN, 8: WriteOutcome.WRITTEN}
+    assert card.blocks[5] == [0x05] * 16
+    assert card.blocks[8] == [0x08] * 16
+
+    # The same target again writes nothing
+    res = reader.write_blocks_diff(DEFAULT_KEY, UID, target)
+    assert res.value.count(WriteOutcome.WRITTEN) == 0
+
+
+def test_manufacturer_block_and_trailers_skipped(make_reader):
+    card = MifareClassic(UID)
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    trailer = list(card.blocks[7])
+    res = reader.write_blocks_diff(DEFAULT_KEY, UID, BlocksData({0: [0] * 16, 7: [0] * 16}))
+    assert res.status == Status.OK
+    assert res.value.count(WriteOutcome.SKIPPED) == 2
+    assert card.blocks[7] == trailer
+
+
+def test_failed_sector_doesnt_stop_others(make_reader):
+    card = MifareClassic(UID, data={7: [1, 2, 3, 4, 5, 6] + DEFAULT_ACCESS_BITS + DEFAULT_KEY})
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    res = reader.write_blocks_diff(DEFAULT_KEY, UID, BlocksData({4: [0x44] * 16, 8: [0x88] * 16}))
+    assert res.status != Status.OK
+    assert res.value.blocks == {4: WriteOutcome.FAILED, 8: WriteOutcome.WRITTEN}
+    assert card.blocks[8] == [0x88] * 16
@@ -0,0 +1,44 @@
+# Command completion on the IRQ pin instead of polling CommIrq/DivIrq over SPI
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+from mfrc522pi.metrics import Metrics
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+IRQ_PIN = 18
+
+
+def irq_reader(*cards, **kwargs):
+    chip = EmulatedMFRC522(list(cards))
+    gpio = EmulatedGPIO()
+    gpio.connect_irq(IRQ_PIN, chip)
+    return MFRC522(transport=chip, gpio=gpio, irq=IRQ_PIN, **kwargs), chip
+
+
+def test_read():
+    reader, _ = irq_reader(MifareClassic(UID, data={8: [0x24] * 16}))
+    assert reader.activate().status == Status.OK
+    assert reader.authenticate(PICC.AUTHENT1A, 8, DEFAULT_KEY, UID) == Status.OK
+    assert list(reader.read_block(8).data) == [0x24] * 16
+
+
+def test_one_status_read_per_wait():
+    metrics = Metrics()
+    reader, _ = irq_reader(MifareClassic(UID), metrics=metrics)
+    metrics.reset()
+    assert reader.activate().status == Status.OK
+    # CommIrq is only read once the pin went low
+    assert metrics.polls == sum(metrics.waits.values())
+
+
+def test_empty_field():
+    reader, _ = irq_reader()
+    assert reader.request(PICC.REQIDL).status != Status.OK
+    # The pin is released again, the next command doesn't see a stale interrupt
+    assert not reader.irq.asserted()
+
+
+def test_chip_crc():
+    # CalcCRC completion (DivIrq) is waited for on the pin too
+    reader, _ = irq_reader(verify_crc=True)
+    assert reader.check_crc() == Status.OK
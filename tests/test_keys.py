@@ -0,0 +1,66 @@
+# KeyRing: key dictionary authentication with memoized keys per card and per family
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+from mfrc522pi.keys import KeyRing, SectorKey
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+SITE_KEY = [0x01, 0x02, 0x03, 0x04, 0x05, 0x06]
+KEYS = [(PICC.AUTHENT1A, DEFAULT_KEY), (PICC.AUTHENT1A, SITE_KEY)]
+
+
+def site_card(uid=UID) -> MifareClassic:
+    # Sectors 1 and 2 are opened by the site key
+    trailer = SITE_KEY + DEFAULT_ACCESS_BITS + SITE_KEY
+    return MifareClassic(uid, data={5: [0x55] * 16, 7: trailer, 11: trailer})
+
+
+def test_finds_and_remembers_keys(make_reader):
+    reader, _ = make_reader(site_card())
+    ring = KeyRing(KEYS)
+    assert reader.activate().status == Status.OK
+    res = ring.read_sectors(reader, UID, sectors=[0, 1, 2])
+    assert res.status == Status.OK
+    assert list(res.value.data[5]) == [0x55] * 16
+    assert ring.cards[tuple(UID)][1] == SectorKey(PICC.AUTHENT1A, SITE_KEY)
+    # Two keys tried for the site sectors
+    assert ring.stats.attempts == 5
+
+    reader.halt()
+    assert reader.activate(PICC.REQALL).status == Status.OK
+    ring.read_sectors(reader, UID, sectors=[0, 1, 2])
+    assert ring.stats.memo_hits == 3
+    assert ring.stats.attempts == 8
+
+
+def test_family_key_used_for_new_cards(make_reader):
+    ring = KeyRing(KEYS)
+    for uid in ([1, 1, 1, 1], [2, 2, 2, 2]):
+        reader, _ = make_reader(site_card(uid))
+        assert reader.activate().status == Status.OK
+        assert ring.read_sectors(reader, uid, sectors=[1], family='badge').status == Status.OK
+    # The second card opened sector 1 on the first attempt with the family's key
+    assert ring.stats.attempts == 3
+    assert ring.stats.memo_hits == 1
+
+
+def test_no_key(make_reader):
+    reader, _ = make_reader(site_card())
+    ring = KeyRing([(PICC.AUTHENT1A, DEFAULT_KEY)])
+    assert reader.activate().status == Status.OK
+    res = ring.read_sectors(reader, UID, sectors=[0, 1, 2])
+    assert res.value.sectors[0] == Status.OK
+    assert res.value.sectors[1] != Status.OK
+    assert ring.stats.failures == 2
+    # Later sectors still read after the failed ones
+    assert reader.authenticate(PICC.AUTHENT1A, 12, DEFAULT_KEY, UID) == Status.OK
+
+
+def test_lru_of_cards():
+    ring = KeyRing(max_cards=2)
+    key = SectorKey(PICC.AUTHENT1A, DEFAULT_KEY)
+    for uid in ([1], [2], [3]):
+        ring.remember(uid, 0, key)
+    assert list(ring.cards) == [(2,), (3,)]
+    ring.forget([2])
+    assert list(ring.cards) == [(3,)]
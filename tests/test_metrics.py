@@ -0,0 +1,61 @@
+# Metrics of an instrumented reader and the Prometheus text exporter
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+from mfrc522pi.metrics import Metrics, prometheus_text, write_prometheus
+import re
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+# Sample line of the text format: name, optional labels with escaped values, value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\\n]|\\[\\"n])*",?)*\})? \S+$')
+
+
+def test_counts(make_reader):
+    metrics = Metrics({'reader': 'door'})
+    reader, chip = make_reader(MifareClassic(UID), metrics=metrics)
+    chip.transfers = 0
+    assert reader.activate().status == Status.OK
+    assert reader.authenticate(PICC.AUTHENT1A, 4, DEFAULT_KEY, UID) == Status.OK
+    assert reader.read_block(4).status == Status.OK
+    reader.halt()
+    reader.request(PICC.REQIDL)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['spi']['transfers'] == chip.transfers
+    assert snapshot['statuses']['read_block'] == {'OK': 1}
+    assert snapshot['latency']['authenticate']['count'] == 1
+    # The HALT and the REQA into the empty field end with the timer
+    assert snapshot['timer_expiries'] == 2
+
+
+def test_prometheus_text(make_reader):
+    metrics = Metrics({'reader': 'door'})
+    reader, _ = make_reader(MifareClassic(UID), metrics=metrics)
+    reader.activate()
+    text = metrics.prometheus()
+    assert '# TYPE mfrc522pi_operation_seconds histogram' in text
+    assert 'mfrc522pi_spi_transfers_total{reader="door"} ' in text
+    assert 'le="+Inf"' in text
+    for line in text.splitlines():
+        assert line.startswith('#') or SAMPLE.match(line), line
+
+
+def test_label_values_escaped():
+    metrics = Metrics({'reader': 'door "A"\\\nside'})
+    text = prometheus_text([metrics])
+    assert 'reader="door \\"A\\"\\\\\\nside"' in text
+    for line in text.splitlines():
+        assert line.startswith('#') or SAMPLE.match(line), line
+
+
+def test_several_readers(make_reader, tmp_path):
+    first, second = Metrics({'reader': 'a'}), Metrics({'reader': 'b'})
+    make_reader(metrics=first)
+    make_reader(metrics=second)
+    filename = str(tmp_path / 'mfrc522pi.prom')
+    write_prometheus(filename, [first, second])
+    with open(filename) as f:
+        text = f.read()
+    assert text.count('# TYPE mfrc522pi_spi_transfers_total counter') == 1
+    assert 'reader="a"' in text and 'reader="b"' in text
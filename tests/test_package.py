@@ -0,0 +1,38 @@
+# The lazy export table of mfrc522pi against the modules it points to
+import mfrc522pi
+import ast
+import os
+import pytest
+
+
+def defined_names(module: str) -> set[str]:
+    # Public top level names a star import of the module used to expose, minus imported ones
+    path = os.path.join(os.path.dirname(mfrc522pi.__file__), f'{module}.py')
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            names.add(node.target.id)
+    # Type variables only exist for annotations
+    return {name for name in names if not name.startswith('_') and name != 'T'}
+
+
+@pytest.mark.parametrize('module', sorted(mfrc522pi._EXPORTS))
+def test_exports_match_module(module):
+    assert set(mfrc522pi._EXPORTS[module]) == defined_names(module)
+
+
+def test_exports_resolve():
+    for name in mfrc522pi.__all__:
+        assert getattr(mfrc522pi, name) is not None
+
+
+def test_result_is_generic():
+    from mfrc522pi.result import Result
+    assert Result[int].__origin__ is Result
+    assert Result(mfrc522pi.Status.OK, 1).get() == 1
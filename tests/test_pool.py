@@ -0,0 +1,64 @@
+# ReaderPool with emulated readers on several buses
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+from mfrc522pi.pool import ReaderPool, spi_bus
+import pytest
+
+
+@pytest.fixture
+def pool():
+    pool = ReaderPool(gpio=EmulatedGPIO(), idle_interval=0.001)
+    yield pool
+    pool.cleanup()
+
+
+def add_reader(pool, reader_id: str, bus: str, *cards):
+    chip = EmulatedMFRC522(list(cards))
+    pool.add(reader_id, MFRC522(transport=chip, gpio=pool.gpio), bus=bus)
+    return chip
+
+
+def test_spi_bus():
+    assert spi_bus('/dev/spidev1.0') == '1'
+    assert spi_bus('/dev/spidev0.1') == '0'
+    assert spi_bus(None) is None
+
+
+def test_events_from_all_readers(pool):
+    add_reader(pool, 'door', '0', MifareClassic([1, 2, 3, 4]))
+    add_reader(pool, 'side', '0', MifareClassic([5, 6, 7, 8]))
+    add_reader(pool, 'gate', '1', MifareClassic([9, 9, 9, 9]))
+    pool.start()
+    events = [pool.get(timeout=2) for _ in range(3)]
+    pool.stop()
+    assert {(event.reader, tuple(event.uid)) for event in events} == {
+        ('door', (1, 2, 3, 4)), ('side', (5, 6, 7, 8)), ('gate', (9, 9, 9, 9))}
+    # One thread per bus
+    assert pool.buses == {'0': ['door', 'side'], '1': ['gate']}
+
+
+def test_card_staying_reports_once(pool):
+    card = MifareClassic([1, 2, 3, 4])
+    chip = add_reader(pool, 'door', '0', card)
+    pool.start()
+    assert pool.get(timeout=2).uid == [1, 2, 3, 4]
+    assert pool.get(timeout=0.05) is None
+    # Leaves and comes back: a new arrival
+    with pool.lock('door'):
+        chip.remove_card(card)
+    assert pool.get(timeout=0.05) is None
+    with pool.lock('door'):
+        chip.add_card(card)
+    assert pool.get(timeout=2).uid == [1, 2, 3, 4]
+
+
+def test_add_to_running_pool(pool):
+    add_reader(pool, 'door', '0')
+    pool.start()
+    with pytest.raises(RuntimeError):
+        add_reader(pool, 'gate', '1')
+
+
+def test_lock_unknown_reader(pool):
+    with pytest.raises(KeyError):
+        pool.lock('door')
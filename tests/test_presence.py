@@ -0,0 +1,64 @@
+# PresenceTracker: arrival, presence and debounced departure
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+from mfrc522pi.presence import PresenceTracker
+import pytest
+
+
+UID_7 = [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66]
+
+
+def kinds(tracker, polls: int) -> list:
+    return [(event.kind, event.uid) for event in (tracker.poll() for _ in range(polls)) if event is not None]
+
+
+@pytest.mark.parametrize('card', [MifareClassic([1, 2, 3, 4]), Ntag21x(UID_7)], ids=['classic', 'ntag'])
+def test_arrival_and_departure(make_reader, card):
+    reader, chip = make_reader(card)
+    tracker = PresenceTracker(reader, name='door', debounce=2, present_interval=3600)
+    assert kinds(tracker, 4) == [(CardEventKind.ARRIVED, card.uid)]
+    # Selected after a poll and halted at the next one, the presence check finds it by its UID
+    assert card.state == card.ACTIVE
+    tracker.release()
+    assert card.state == card.HALT
+    chip.remove_card(card)
+    assert kinds(tracker, 1) == []
+    assert kinds(tracker, 1) == [(CardEventKind.DEPARTED, card.uid)]
+    assert kinds(tracker, 3) == []
+
+
+def test_present_events(make_reader):
+    card = MifareClassic([1, 2, 3, 4])
+    reader, _ = make_reader(card)
+    tracker = PresenceTracker(reader, present_interval=0)
+    events = kinds(tracker, 3)
+    assert [kind for kind, _ in events] == [CardEventKind.ARRIVED, CardEventKind.PRESENT, CardEventKind.PRESENT]
+
+
+def test_card_usable_after_event(make_reader):
+    card = MifareClassic([1, 2, 3, 4], data={4: [0x44] * 16})
+    reader, _ = make_reader(card)
+    tracker = PresenceTracker(reader, present_interval=0)
+    for _ in range(2):
+        event = tracker.poll()
+        assert reader.authenticate(PICC.AUTHENT1A, 4, DEFAULT_KEY, event.uid) == Status.OK
+        assert list(reader.read_block(4).data) == [0x44] * 16
+
+
+def test_short_dropout_debounced(make_reader):
+    card = MifareClassic([1, 2, 3, 4])
+    reader, chip = make_reader(card)
+    tracker = PresenceTracker(reader, debounce=3, present_interval=3600)
+    tracker.poll()
+    chip.remove_card(card)
+    assert kinds(tracker, 2) == []
+    chip.add_card(card)
+    assert kinds(tracker, 3) == []
+    assert tracker.uid == card.uid
+
+
+def test_idle_backoff(make_reader):
+    reader, _ = make_reader()
+    tracker = PresenceTracker(reader, fast_interval=0.01, idle_interval=0.05)
+    kinds(tracker, 5)
+    assert tracker.interval == 0.05
@@ -0,0 +1,60 @@
+# Card operations of the driver against the emulator
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+import pytest
+
+
+UID_4 = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_detect_empty_field(make_reader):
+    reader, _ = make_reader()
+    assert reader.request(PICC.REQIDL).status != Status.OK
+    assert reader.detect() is None
+
+
+def test_auth_read_write(make_reader):
+    reader, _ = make_reader(MifareClassic(UID_4))
+    assert reader.activate().status == Status.OK
+    assert reader.authenticate(PICC.AUTHENT1A, 8, DEFAULT_KEY, UID_4) == Status.OK
+    assert reader.write_block(8, [0x42] * 16) == Status.OK
+    res = reader.read_block(8)
+    assert res.status == Status.OK
+    assert list(res.data) == [0x42] * 16
+    reader.stop_crypto1()
+
+
+def test_auth_wrong_key(make_reader):
+    reader, _ = make_reader(MifareClassic(UID_4))
+    assert reader.activate().status == Status.OK
+    assert reader.authenticate(PICC.AUTHENT1A, 8, [0x00] * 6, UID_4) != Status.OK
+
+
+def test_read_blocks(make_reader):
+    reader, _ = make_reader(MifareClassic(UID_4, data={1: [0x11] * 16, 62: [0x62] * 16}))
+    assert reader.activate().status == Status.OK
+    res = reader.read_blocks(DEFAULT_KEY, UID_4, 64)
+    assert res.status == Status.OK
+    assert list(res.data[1]) == [0x11] * 16
+    assert list(res.data[62]) == [0x62] * 16
+
+
+@pytest.mark.parametrize('version', sorted(SELF_TEST_FIFO))
+def test_self_test(make_reader, version):
+    reader, chip = make_reader()
+    chip.VERSION = version
+    chip.hard_reset()
+    res = reader.self_test()
+    assert res.status == Status.OK
+    assert res.value == list(SELF_TEST_FIFO[version])
+
+
+def test_self_test_failure(make_reader):
+    reader, chip = make_reader()
+    chip.autotest_result = bytes(64)
+    res = reader.self_test()
+    assert res.status == Status.DATA_CORRUPTED_ERROR
+    assert res.value == [0x00] * 64
+    # The reader is initialised again afterwards
+    chip.autotest_result = None
+    assert reader.self_test().status == Status.OK
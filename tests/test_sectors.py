@@ -0,0 +1,52 @@
+# One authentication per sector in read_blocks / read_sectors
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+OTHER_KEY = [0x01, 0x02, 0x03, 0x04, 0x05, 0x06]
+
+
+def counting(reader) -> list[int]:
+    calls = []
+    authenticate = reader.authenticate
+
+    def wrapper(mode, addr, *args):
+        calls.append(addr)
+        return authenticate(mode, addr, *args)
+
+    reader.authenticate = wrapper
+    return calls
+
+
+def test_read_blocks_once_per_sector(make_reader):
+    reader, _ = make_reader(MifareClassic(UID))
+    calls = counting(reader)
+    assert reader.activate().status == Status.OK
+    assert reader.read_blocks(DEFAULT_KEY, UID, 64).status == Status.OK
+    assert calls == [sector_first_block(sector) for sector in range(16)]
+
+
+def test_read_sectors_skips_locked_sector(make_reader):
+    # Sector 1 has another key A, the sectors after it are still read
+    card = MifareClassic(UID, data={5: [0x55] * 16, 8: [0x88] * 16,
+                                    7: OTHER_KEY + DEFAULT_ACCESS_BITS + DEFAULT_KEY})
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    res = reader.read_sectors(DEFAULT_KEY, UID, sectors=[0, 1, 2])
+    assert res.status != Status.OK
+    assert res.value.sectors[0] == Status.OK
+    assert res.value.sectors[1] != Status.OK
+    assert res.value.sectors[2] == Status.OK
+    assert list(res.value.data[8]) == [0x88] * 16
+    assert 5 not in res.value.data
+
+
+def test_read_sectors_blocks(make_reader):
+    reader, _ = make_reader(MifareClassic(UID, data={4: [0x44] * 16, 6: [0x66] * 16}))
+    calls = counting(reader)
+    assert reader.activate().status == Status.OK
+    res = reader.read_sectors(DEFAULT_KEY, UID, blocks=[4, 6])
+    assert res.status == Status.OK
+    assert sorted(res.value.data) == [4, 6]
+    assert calls == [4]
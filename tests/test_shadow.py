@@ -0,0 +1,44 @@
+# Register shadow cache: fewer SPI reads for the same card operations
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def read_card(reader) -> list[int]:
+    assert reader.activate().status == Status.OK
+    res = reader.read_blocks(DEFAULT_KEY, UID, 8)
+    assert res.status == Status.OK
+    reader.halt()
+    return res.value.data[5]
+
+
+def test_same_result_fewer_transfers(make_reader):
+    plain, plain_chip = make_reader(MifareClassic(UID, data={5: [0x55] * 16}))
+    shadowed, shadowed_chip = make_reader(MifareClassic(UID, data={5: [0x55] * 16}), shadow=True)
+    plain_chip.transfers = shadowed_chip.transfers = 0
+    assert read_card(plain) == read_card(shadowed) == [0x55] * 16
+    assert shadowed_chip.transfers < plain_chip.transfers
+    assert shadowed.shadow.saved > 0
+
+
+def test_volatile_registers_not_shadowed():
+    shadow = RegisterShadow()
+    shadow.update(REG.CommIrq, 0x30)
+    shadow.update(REG.BitFraming, 0x07)
+    assert shadow.get(REG.CommIrq) is None
+    assert shadow.get(REG.BitFraming) == 0x07
+    assert shadow.saved == 1
+    shadow.invalidate()
+    assert shadow.get(REG.BitFraming) is None
+
+
+def test_reset_invalidates(make_reader):
+    reader, chip = make_reader(shadow=True)
+    reader.antenna_off()
+    reader.reset()
+    reader.init()
+    # The shadow must not claim the antenna is still off after the chip was reset and initialised
+    assert reader.read(REG.TxControl) & 0x03 == 0x03
+    assert reader.read_shadowed(REG.TxControl) == reader.read(REG.TxControl)
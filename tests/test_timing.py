@@ -0,0 +1,98 @@
+# Timeout profiles on their own and programmed into the emulated chip timer
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+from mfrc522pi.timing import *
+import pytest
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_limits():
+    timeouts = TimeoutProfiles({'write': 0.02})
+    assert timeouts.timeout('request') == DEFAULT_TIMEOUTS['request']
+    assert timeouts.timeout('write') == 0.02
+    assert timeouts.timeout('unknown') == DEFAULT_TIMEOUTS['default']
+    # 100 us ticks, the short profiles fit TReloadL
+    assert timeouts.ticks('request') == 10
+    assert timer_ticks(100) == 0xFFFF
+
+
+def test_adaptive_tightens():
+    timeouts = TimeoutProfiles(adaptive=True)
+    for _ in range(timeouts.min_samples - 1):
+        timeouts.observe('auth', 0.0004)
+    assert timeouts.timeout('auth') == DEFAULT_TIMEOUTS['auth']
+    timeouts.observe('auth', 0.0004)
+    assert timeouts.floor <= timeouts.timeout('auth') < DEFAULT_TIMEOUTS['auth']
+    # Never above the limit
+    for _ in range(50):
+        timeouts.observe('auth', 1.0)
+    assert timeouts.timeout('auth') == DEFAULT_TIMEOUTS['auth']
+
+
+def test_not_adaptive_ignores_samples():
+    timeouts = TimeoutProfiles()
+    for _ in range(20):
+        timeouts.observe('read', 0.0001)
+    assert timeouts.timeout('read') == DEFAULT_TIMEOUTS['read']
+
+
+def test_missed_answer_resets_profile():
+    timeouts = TimeoutProfiles(adaptive=True)
+    for _ in range(20):
+        timeouts.observe('read', 0.0002)
+    assert timeouts.timeout('read') < DEFAULT_TIMEOUTS['read']
+    timeouts.missed('read')
+    assert timeouts.timeout('read') == DEFAULT_TIMEOUTS['read']
+
+
+def test_request_probe():
+    timeouts = TimeoutProfiles(adaptive=True, probe=4)
+    for _ in range(20):
+        timeouts.observe('request', 0.0001)
+    tight = timeouts.timeout('request')
+    assert tight < DEFAULT_TIMEOUTS['request']
+    for _ in range(4):
+        timeouts.missed('request')
+    assert timeouts.timeout('request') == DEFAULT_TIMEOUTS['request']
+    timeouts.missed('request')
+    assert timeouts.timeout('request') == tight
+
+
+def test_empty_field_costs_request_timeout(make_reader):
+    reader, chip = make_reader()
+    chip.rf_time = 0
+    reader.request(PICC.REQIDL)
+    assert chip.rf_time == pytest.approx(DEFAULT_TIMEOUTS['request'], rel=0.2)
+
+
+def test_write_phases_measured_apart(make_reader):
+    reader, _ = make_reader(MifareClassic(UID), timeouts=TimeoutProfiles(adaptive=True))
+    assert reader.activate().status == Status.OK
+    assert reader.authenticate(PICC.AUTHENT1A, 4, DEFAULT_KEY, UID) == Status.OK
+    for i in range(3):
+        assert reader.write_block(4, [i] * 16) == Status.OK
+    assert reader.write_value(5, 10) == Status.OK
+    assert reader.increment(5, 1) == Status.OK
+    assert reader.transfer(5) == Status.OK
+    estimates = reader.timeouts.estimates
+    assert estimates['write'][0] == 4
+    assert estimates['write_data'][0] == 5
+
+
+def test_slow_card_found_again(make_reader):
+    card = MifareClassic(UID)
+    reader, chip = make_reader(card, timeouts=TimeoutProfiles(adaptive=True, probe=4))
+    for _ in range(10):
+        assert reader.activate(PICC.REQALL).status == Status.OK
+        reader.halt()
+    # Slower than the tightened timeouts: the probes find the card at the full REQA limit, and every
+    # missed answer after that puts its profile back to the limit
+    chip.response_time = 0.0008
+    found = []
+    for _ in range(20):
+        found.append(reader.activate(PICC.REQALL).status == Status.OK)
+        reader.halt()
+    assert not found[0]
+    assert all(found[-5:])
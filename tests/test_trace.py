@@ -0,0 +1,65 @@
+# SPI traces: recording against the emulator, strict and loose replay, summaries
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+from mfrc522pi.trace import *
+import pytest
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def session(reader) -> list:
+    assert reader.activate().status == Status.OK
+    res = reader.read_blocks(DEFAULT_KEY, UID, 8)
+    reader.halt()
+    return res.value.data[5]
+
+
+@pytest.fixture
+def trace(tmp_path):
+    filename = str(tmp_path / 'door.trace')
+    chip = EmulatedMFRC522([MifareClassic(UID, data={5: [0x55] * 16})])
+    transport = RecordingTransport(chip, filename)
+    assert session(MFRC522(transport=transport, gpio=EmulatedGPIO())) == [0x55] * 16
+    transport.close()
+    return filename, chip.transfers
+
+
+def test_recorded(trace):
+    filename, transfers = trace
+    _, recorded = load_trace(filename)
+    assert len(recorded) == transfers
+
+
+def test_strict_replay(trace):
+    filename, _ = trace
+    transport = ReplayTransport(filename)
+    assert session(MFRC522(transport=transport, gpio=EmulatedGPIO())) == [0x55] * 16
+    assert transport.remaining() == 0
+
+
+def test_strict_replay_mismatch(trace):
+    filename, _ = trace
+    reader = MFRC522(transport=ReplayTransport(filename), gpio=EmulatedGPIO())
+    with pytest.raises(TraceMismatch):
+        # Another block than recorded
+        reader.activate()
+        reader.authenticate(PICC.AUTHENT1A, 12, DEFAULT_KEY, UID)
+
+
+def test_loose_replay(trace):
+    # Modified code: the shadow cache drops register reads, values are still served per register
+    filename, _ = trace
+    transport = ReplayTransport(filename, strict=False)
+    reader = MFRC522(transport=transport, gpio=EmulatedGPIO(), shadow=True)
+    assert session(reader) == [0x55] * 16
+
+
+def test_summary(trace):
+    filename, transfers = trace
+    _, recorded = load_trace(filename)
+    summary = summarize(recorded)
+    assert summary['transfers'] == transfers
+    assert summary['polls'] > 0
+    assert sum(entry['transfers'] for entry in summary['operations'].values()) <= transfers
+    assert {'read', 'halt'} <= set(summary['operations'])
@@ -0,0 +1,93 @@
+# Answers longer than the FIFO, FAST_READ and UltralightReader on Ultralight and NTAG21x
+from mfrc522pi import *
+from mfrc522pi.emulator import *
+from mfrc522pi.ultralight import UltralightReader
+import pytest
+
+
+UID_7 = [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66]
+
+
+def pattern(pages: int) -> dict:
+    return {page: [page, page ^ 0xFF, 0x5A, 0xA5] for page in range(4, pages)}
+
+
+def test_fast_read_drains_fifo(make_reader):
+    card = Ntag21x(UID_7, 216, data=pattern(40))
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    # 36 pages, 146 bytes with the CRC: more than twice the FIFO
+    res = reader.fast_read(4, 39)
+    assert res.status == Status.OK
+    assert list(res.data) == card.read_pages(4, 36)
+
+
+def test_fifo_overflow_without_drain(make_reader):
+    reader, _ = make_reader(Ntag21x(UID_7, 216))
+    assert reader.activate().status == Status.OK
+    data = [PICC.FAST_READ, 4, 39]
+    data.extend(crc_a(data))
+    res = reader.transceive(PCD.TRANSCEIVE, data, profile='read')
+    assert res.status != Status.OK
+
+
+def test_fast_read_nak(make_reader):
+    reader, _ = make_reader(Ntag21x(UID_7, 213))
+    assert reader.activate().status == Status.OK
+    # NTAG213 ends at page 44
+    assert reader.fast_read(40, 60).status != Status.OK
+
+
+@pytest.mark.parametrize('model', sorted(Ntag21x.MODELS))
+def test_read_card_ntag(make_reader, model):
+    _, pages, _ = Ntag21x.MODELS[model]
+    card = Ntag21x(UID_7, model, data=pattern(pages))
+    reader, _ = make_reader(card)
+    res = reader.activate()
+    assert res.status == Status.OK
+    ultralight = UltralightReader(reader)
+    assert ultralight.pages(res.value.uid) == pages
+    res = ultralight.read_card(res.value.uid)
+    assert res.status == Status.OK
+    assert list(res.value.data) == card.read_pages(0, pages)
+
+
+def test_read_card_ultralight(make_reader):
+    # No GET_VERSION and no FAST_READ: 16 pages with READ
+    card = MifareUltralight(UID_7, data=pattern(16))
+    reader, _ = make_reader(card)
+    uid = reader.activate().value.uid
+    ultralight = UltralightReader(reader)
+    res = ultralight.read_card(uid)
+    assert res.status == Status.OK
+    assert list(res.value.data) == card.read_pages(0, 16)
+    assert ultralight.fast_read[tuple(uid)] is False
+
+
+@pytest.mark.parametrize('chunk', [1, 15, 16, 64])
+def test_read_pages_chunks(make_reader, chunk):
+    card = Ntag21x(UID_7, 215, data=pattern(135))
+    reader, _ = make_reader(card)
+    uid = reader.activate().value.uid
+    res = UltralightReader(reader, chunk=chunk).read_pages(uid, 10, 100)
+    assert res.status == Status.OK
+    assert list(res.value.data) == card.read_pages(10, 100)
+
+
+def test_fewer_transfers_than_read(make_reader):
+    card = Ntag21x(UID_7, 216, data=pattern(231))
+    reader, chip = make_reader(card)
+    uid = reader.activate().value.uid
+    chip.transfers = 0
+    UltralightReader(reader).read_pages(uid, 0, 231)
+    fast = chip.transfers
+    chip.transfers = 0
+    for page in range(0, 231, 4):
+        assert reader.read_block(page).status == Status.OK
+    assert fast < chip.transfers / 4
+
+
+def test_compact_pages(make_reader):
+    reader, _ = make_reader(Ntag21x(UID_7, 213), compact=True)
+    uid = reader.activate().value.uid
+    assert isinstance(UltralightReader(reader).read_card(uid).value.data, bytes)
@@ -0,0 +1,75 @@
+# Dump files: save_blocks / load_blocks round trips and rejected input
+from mfrc522pi import *
+import struct
+import pytest
+
+
+UID = [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66]
+BLOCKS = {0: list(range(16)), 1: [0x42] * 16, 63: [0xFF] * 16}
+
+
+@pytest.mark.parametrize('version', [1, DUMP_VERSION])
+def test_round_trip(tmp_path, version):
+    filename = str(tmp_path / 'card.dump.bin')
+    assert save_blocks(filename, BlocksData(dict(BLOCKS)), uid=UID, atqa=[0x44, 0x00], sak=0x08,
+                       version=version) == Status.OK
+    res = load_blocks(filename)
+    assert res.status == Status.OK
+    assert res.value.data == BLOCKS
+
+
+def test_header(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    save_blocks(filename, BlocksData(dict(BLOCKS)), uid=UID, atqa=[0x44, 0x00], sak=0x08)
+    res = map_dump(filename)
+    assert res.status == Status.OK
+    with res.value as dump:
+        assert dump.header.version == DUMP_VERSION
+        assert dump.header.uid == UID
+        assert dump.header.sak == 0x08
+        assert dump.block(1) == bytes([0x42] * 16)
+        assert dump.verify()
+
+
+def test_header_covered_by_crc(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    save_blocks(filename, BlocksData(dict(BLOCKS)), uid=UID)
+    with open(filename, 'r+b') as f:
+        # First UID byte
+        f.seek(len(MAGIC_V2) + 3)
+        f.write(b'\x05')
+    assert load_blocks(filename).status == Status.DATA_CORRUPTED_ERROR
+
+
+def test_other_block_size(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    save_blocks(filename, BlocksData(dict(BLOCKS)), uid=UID)
+    with open(filename, 'rb') as f:
+        raw = bytearray(f.read())
+    # 8 byte blocks: the file is still long enough for the index and the data
+    struct.pack_into('>H', raw, DUMP_HEADER.size - 10, 8)
+    assert open_dump(bytes(raw)).status == Status.DATA_CORRUPTED_ERROR
+
+
+def test_other_version(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    save_blocks(filename, BlocksData(dict(BLOCKS)), uid=UID)
+    with open(filename, 'rb') as f:
+        raw = bytearray(f.read())
+    struct.pack_into('>H', raw, len(MAGIC_V2), DUMP_VERSION + 1)
+    assert open_dump(bytes(raw)).status == Status.DATA_CORRUPTED_ERROR
+
+
+def test_rejects_bad_input(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    assert save_blocks(filename, BlocksData({0: [0] * 15})) == Status.WRITE_BLOCK_BAD_SIZE_ERROR
+    assert save_blocks(filename, BlocksData({0: [0] * 16}), uid=[0] * 11) == \
+        Status.ANTI_COLLISION_BAD_UID_SIZE_ERROR
+
+
+def test_truncated_v1(tmp_path):
+    filename = str(tmp_path / 'card.dump.bin')
+    save_blocks(filename, BlocksData(dict(BLOCKS)), version=1)
+    with open(filename, 'r+b') as f:
+        f.truncate(30)
+    assert load_blocks(filename).status == Status.DATA_CORRUPTED_ERROR
@@ -0,0 +1,104 @@
+# MIFARE value blocks: format, INCREMENT/DECREMENT/RESTORE + TRANSFER and batched apply_values
+from mfrc522pi import *
+from mfrc522pi.emulator import MifareClassic
+import pytest
+
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+@pytest.mark.parametrize('value', [0, 1, -1, 120, 2 ** 31 - 1, -2 ** 31])
+def test_value_block_format(value):
+    assert parse_value_block(value_block(value, 9)) == (value, 9)
+
+
+def test_not_a_value_block():
+    block = value_block(100, 4)
+    block[5] ^= 0x01
+    assert parse_value_block(block) is None
+    assert parse_value_block([0x42] * 16) is None
+
+
+def active(make_reader, card):
+    reader, chip = make_reader(card)
+    assert reader.activate().status == Status.OK
+    assert reader.authenticate(PICC.AUTHENT1A, 4, DEFAULT_KEY, UID) == Status.OK
+    return reader, chip
+
+
+def test_value_operations(make_reader):
+    card = MifareClassic(UID, data={4: value_block(100, 4)})
+    reader, _ = active(make_reader, card)
+    assert reader.increment(4, 25) == Status.OK
+    assert reader.transfer(4) == Status.OK
+    assert reader.decrement(4, 5) == Status.OK
+    assert reader.transfer(4) == Status.OK
+    res = reader.read_value(4)
+    assert res.status == Status.OK
+    assert res.value == 120
+    assert parse_value_block(card.blocks[4]) == (120, 4)
+
+
+def test_restore_to_backup(make_reader):
+    card = MifareClassic(UID, data={4: value_block(77, 4)})
+    reader, _ = active(make_reader, card)
+    assert reader.restore(4) == Status.OK
+    assert reader.transfer(6) == Status.OK
+    assert parse_value_block(card.blocks[6])[0] == 77
+
+
+def test_write_value(make_reader):
+    card = MifareClassic(UID)
+    reader, _ = active(make_reader, card)
+    assert reader.write_value(5, -3) == Status.OK
+    assert reader.read_value(5).value == -3
+
+
+def test_value_on_data_block(make_reader):
+    # The operand of a value command on a block without the value format is NAKed
+    reader, _ = active(make_reader, MifareClassic(UID, data={4: [0x42] * 16}))
+    assert reader.decrement(4, 1) != Status.OK
+
+
+def test_read_value_of_data_block(make_reader):
+    reader, _ = active(make_reader, MifareClassic(UID, data={4: [0x42] * 16}))
+    assert reader.read_value(4).status != Status.OK
+
+
+def test_apply_values_with_backup(make_reader):
+    card = MifareClassic(UID, data={4: value_block(50, 4), 5: value_block(50, 5)})
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    res = reader.apply_values(DEFAULT_KEY, UID, [(4, -20), (4, 5)], backups={4: 5})
+    assert res.status == Status.OK
+    assert res.value.blocks == {4: WriteOutcome.WRITTEN, 5: WriteOutcome.WRITTEN}
+    assert parse_value_block(card.blocks[4])[0] == 35
+    assert parse_value_block(card.blocks[5])[0] == 35
+
+
+def test_apply_values_across_sectors(make_reader):
+    card = MifareClassic(UID, data={4: value_block(10, 4), 8: [0x42] * 16, 12: value_block(10, 12)})
+    reader, _ = make_reader(card)
+    assert reader.activate().status == Status.OK
+    res = reader.apply_values(DEFAULT_KEY, UID, [(4, 1), (8, 1), (12, -1), (13, 0)])
+    # Block 8 isn't a value block, the sectors after it are still done
+    assert res.status != Status.OK
+    assert res.value.blocks == {4: WriteOutcome.WRITTEN, 8: WriteOutcome.FAILED, 12: WriteOutcome.WRITTEN,
+                                13: WriteOutcome.SKIPPED}
+    assert parse_value_block(card.blocks[4])[0] == 11
+    assert parse_value_block(card.blocks[12])[0] == 9
+
+
+def test_debit_cheaper_than_read_modify_write(make_reader):
+    # DECREMENT + TRANSFER against READ + WRITE of the new value, in modelled time on air
+    card = MifareClassic(UID, data={4: value_block(100, 4)})
+    reader, chip = active(make_reader, card)
+    chip.rf_time = 0
+    assert reader.decrement(4, 1) == Status.OK
+    assert reader.transfer(4) == Status.OK
+    debit = chip.rf_time
+    chip.rf_time = 0
+    value = reader.read_value(4).value
+    assert reader.write_value(4, value - 1) == Status.OK
+    assert debit < chip.rf_time
+    assert reader.read_value(4).value == 98